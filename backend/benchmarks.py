@@ -0,0 +1,403 @@
+"""CareerIQ micro-benchmarks for the CPU-side work behind each report.
+
+Times the synchronous hot paths in server.py against generated fixtures (resumes
+as PDF/DOCX, a LinkedIn "Save to PDF" export, section JSON for every tier) and
+records wall time, peak traced memory and retained allocations per function,
+plus the prompt size sent for each pipeline stage.
+
+    python benchmarks.py                               # print the table
+    python benchmarks.py --compare                     # exit 1 if a stage prompt grew
+    python benchmarks.py --save-baseline               # re-record the prompt token baseline
+    python benchmarks.py --save-baseline --timing --baseline /tmp/bench.json
+    python benchmarks.py --compare --timing --baseline /tmp/bench.json
+
+The committed benchmark_baseline.json holds only the prompt token counts per
+stage, which are deterministic, so --compare is a reliable gate on any machine.
+Timing and memory are too noisy to compare across machines. They are checked
+only with --timing, against a baseline saved with --timing on the same machine
+and with the same --filter, since timings shift with the cases run alongside
+them; other baselines are refused. Timing is gated on the best per-call time
+over --rounds interleaved rounds, and peak memory must grow by both
+--memory-tolerance and --memory-floor-kib to count as a regression.
+"""
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from itertools import count
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# server.py reads these at import time; nothing here touches Mongo or the network
+for key, value in {
+    "MONGO_URL": "mongodb://127.0.0.1:1",
+    "DB_NAME": "careeriq_bench",
+    "OPENAI_API_KEY": "sk-bench",
+    "RAZORPAY_KEY_ID": "rzp_test_bench",
+    "RAZORPAY_KEY_SECRET": "bench_secret"
+}.items():
+    os.environ.setdefault(key, value)
+
+from docx import Document
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+
+import server
+from load_harness import RESUME_PARAGRAPHS, synthesize
+
+BACKEND_DIR = Path(__file__).parent
+DEFAULT_BASELINE = BACKEND_DIR / "benchmark_baseline.json"
+
+TIERS = [499, 2999, 4498]
+
+# Schema each report section key is synthesized from
+SECTION_SCHEMAS = {
+    "diagnosis": "diagnosis_output",
+    "risk": "risk_output",
+    "execution": "execution_output",
+    "decisions": "decision_output"
+}
+
+# Earlier roles appended to the base resume to build the long fixture
+EXTRA_ROLES = [
+    "Product Lead, Nimbus Logistics (Mar 2012 - Jun 2014): Ran the fleet tracking product across 4 cities. "
+    "Hired and managed 3 analysts. Negotiated vendor contracts worth 80 L.",
+    "Business Analyst, Coral Insurance (Jul 2010 - Feb 2012): Modelled claims workflows and cut settlement time by 22%. "
+    "Presented quarterly findings to the COO.",
+    "Consultant, Meridian Advisory (Jun 2008 - Jun 2010): Delivered market-entry studies for 6 retail clients. "
+    "Led workshops with regional heads and wrote the final recommendations.",
+    "Projects: Built an internal pricing simulator used by 40 sales managers. Mentored 12 associate PMs through the APM programme.",
+    "Certifications: Pragmatic Marketing, AWS Cloud Practitioner, Certified Scrum Product Owner."
+]
+
+LINKEDIN_SECTIONS = [
+    ("Contact", ["www.linkedin.com/in/priya-sharma-pm", "priya.sharma@example.com"]),
+    ("Top Skills", ["Product Strategy", "Payments", "Stakeholder Management"]),
+    ("Summary", [
+        "Product leader with ten years across payments, retail and logistics. I build onboarding and growth "
+        "products, run experiments at scale and work closely with engineering and design leads."
+    ]),
+    ("Experience", RESUME_PARAGRAPHS[2:5] + EXTRA_ROLES[:3]),
+    ("Education", ["Indian Institute of Management Bangalore - MBA (2012 - 2014)",
+                   "National Institute of Technology Tiruchirappalli - B.Tech, Computer Science (2008 - 2012)"])
+]
+
+# ============== FIXTURES ==============
+
+def resume_paragraphs(pages: int) -> List[str]:
+    """Base resume, padded with earlier roles until it spans roughly `pages` pages"""
+    return list(RESUME_PARAGRAPHS) + EXTRA_ROLES * (3 * (pages - 1))
+
+def build_pdf(blocks: List[tuple]) -> bytes:
+    """Render (style, text) blocks to a PDF with ReportLab"""
+    styles = getSampleStyleSheet()
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    story = []
+    for style, text in blocks:
+        story.append(Paragraph(text, styles[style]))
+        story.append(Spacer(1, 6))
+    doc.build(story)
+    return buffer.getvalue()
+
+def build_docx(paragraphs: List[str]) -> bytes:
+    document = Document()
+    for paragraph in paragraphs:
+        document.add_paragraph(paragraph)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+def synthesize_schema(schema_name: str, list_items: int) -> Dict[str, Any]:
+    schema = server._strict_json_schema(server.SCHEMA_MODELS[schema_name].model_json_schema())
+    return synthesize(schema, schema.get("$defs", {}), count(1), list_items)
+
+def build_fixtures(list_items: int) -> Dict[str, Any]:
+    short_resume = resume_paragraphs(1)
+    long_resume = resume_paragraphs(4)
+    linkedin_blocks = []
+    for heading, lines in LINKEDIN_SECTIONS:
+        linkedin_blocks.append(("Heading2", heading))
+        linkedin_blocks.extend(("Normal", line) for line in lines)
+
+    sections = {key: synthesize_schema(schema, list_items) for key, schema in SECTION_SCHEMAS.items()}
+    reports = {}
+    for tier in TIERS:
+        report = {
+            "metadata": {"prompt_versions": server.PROMPT_VERSIONS, "linkedin_provided": True, "confidence_level": "full"},
+            "disclaimer": server.REPORT_DISCLAIMER,
+            "identity_block": {"name": "Priya Sharma", "current_role": "Senior Product Manager", "target_role": "Director of Product"}
+        }
+        for key in server.report_sections_for_tier(tier):
+            report[key] = sections[key]
+        reports[tier] = report
+
+    return {
+        "resume_short_pdf": build_pdf([("Normal", p) for p in short_resume]),
+        "resume_long_pdf": build_pdf([("Normal", p) for p in long_resume]),
+        "resume_short_docx": build_docx(short_resume),
+        "resume_long_docx": build_docx(long_resume),
+        "linkedin_pdf": build_pdf(linkedin_blocks),
+        "extraction": synthesize_schema("extraction_json", list_items),
+        "sections": sections,
+        "reports": reports
+    }
+
+# ============== PROMPT ASSEMBLY ==============
+# Stage inputs come from the same builders run_analysis_pipeline uses.
+
+CANDIDATE = {"full_name": "Priya Sharma", "current_role": "Senior Product Manager", "target_role": "Director of Product"}
+
+STAGE_PROMPTS = {
+    "signal_extraction": (server.SIGNAL_EXTRACTION_PROMPT, server.SIGNAL_EXTRACTION_INSTRUCTIONS),
+    "diagnosis": (server.DIAGNOSIS_PROMPT, server.DIAGNOSIS_INSTRUCTIONS),
+    "risk": (server.RISK_PROMPT, server.RISK_INSTRUCTIONS),
+    "execution_guardrails": (server.EXECUTION_GUARDRAILS_PROMPT, server.EXECUTION_GUARDRAILS_INSTRUCTIONS),
+    "decision_intelligence": (server.DECISION_INTELLIGENCE_PROMPT, server.DECISION_INTELLIGENCE_INSTRUCTIONS)
+}
+
+def stage_input(stage: str, fixtures: Dict[str, Any], resume_text: str, linkedin_text: str) -> str:
+    target_role = CANDIDATE["target_role"]
+    if stage == "signal_extraction":
+        return server.build_extraction_input(target_role, resume_text, linkedin_text, True)
+    extraction_result = fixtures["extraction"]
+    sections = fixtures["sections"]
+    header = server.build_candidate_header(target_role, CANDIDATE["full_name"], CANDIDATE["current_role"])
+    if stage == "diagnosis":
+        return server.build_diagnosis_input(header, True, extraction_result)
+    if stage == "risk":
+        return server.build_section_input(header, extraction_result, sections["diagnosis"])
+    if stage == "execution_guardrails":
+        return server.build_section_input(header, extraction_result, sections["diagnosis"], sections["risk"])
+    return server.build_section_input(header, extraction_result, sections["diagnosis"], sections["risk"], sections["execution"])
+
+def stage_messages(stage: str, fixtures: Dict[str, Any], resume_text: str, linkedin_text: str) -> List[Dict[str, str]]:
+    prompt, instructions = STAGE_PROMPTS[stage]
+    return server.build_llm_messages(prompt, stage_input(stage, fixtures, resume_text, linkedin_text), instructions)
+
+# Pipeline stage that produces each report section
+SECTION_STAGES = {
+    "diagnosis": "diagnosis",
+    "risk": "risk",
+    "execution": "execution_guardrails",
+    "decisions": "decision_intelligence"
+}
+
+def prompt_sizes(fixtures: Dict[str, Any], resume_text: str, linkedin_text: str) -> Dict[str, Any]:
+    """Estimated prompt tokens per stage, and per tier for the stages that tier runs"""
+    stages = {}
+    for stage in ["signal_extraction"] + list(SECTION_STAGES.values()):
+        system, user = stage_messages(stage, fixtures, resume_text, linkedin_text)
+        stages[stage] = {
+            "system_tokens": server.estimate_tokens(system["content"]),
+            "user_tokens": server.estimate_tokens(user["content"]),
+            "total_tokens": server.estimate_tokens(system["content"]) + server.estimate_tokens(user["content"])
+        }
+    tiers = {}
+    for tier in TIERS:
+        tier_stages = ["signal_extraction"] + [SECTION_STAGES[key] for key in server.report_sections_for_tier(tier)]
+        tiers[str(tier)] = sum(stages[stage]["total_tokens"] for stage in tier_stages)
+    return {"stages": stages, "tiers": tiers}
+
+# ============== MEASUREMENT ==============
+
+def time_calls(fn: Callable[[], Any], repeat: int) -> List[float]:
+    """Wall time of `repeat` back-to-back calls, with the GC held off"""
+    gc.collect()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return timings
+
+def measure(fn: Callable[[], Any], timings: List[float]) -> Dict[str, Any]:
+    """Summarize the timed calls, then one traced call for memory"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        baseline_size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    del result
+    retained = [stat for stat in after.compare_to(before, "filename") if stat.count_diff > 0]
+
+    return {
+        "median_ms": round(statistics.median(timings) * 1000, 4),
+        "min_ms": round(min(timings) * 1000, 4),
+        "max_ms": round(max(timings) * 1000, 4),
+        "peak_kib": round((peak - baseline_size) / 1024, 1),
+        "retained_blocks": sum(stat.count_diff for stat in retained),
+        "runs": len(timings)
+    }
+
+def build_cases(fixtures: Dict[str, Any], resume_text: str, linkedin_text: str) -> Dict[str, Callable[[], Any]]:
+    session = {"session_id": "bench-session", "full_name": CANDIDATE["full_name"], "current_role": CANDIDATE["current_role"],
+               "target_role": CANDIDATE["target_role"]}
+    cases: Dict[str, Callable[[], Any]] = {}
+    for name in ("resume_short_pdf", "resume_long_pdf", "linkedin_pdf"):
+        cases[f"extract_text_from_pdf[{name}]"] = lambda data=fixtures[name]: server.extract_text_from_pdf(data)
+    for name in ("resume_short_docx", "resume_long_docx"):
+        cases[f"extract_text_from_docx[{name}]"] = lambda data=fixtures[name]: server.extract_text_from_docx(data)
+    cases["hash_content[resume+linkedin]"] = lambda: server.hash_content(resume_text + linkedin_text)
+    for stage in ["signal_extraction"] + list(SECTION_STAGES.values()):
+        cases[f"prompt_assembly[{stage}]"] = lambda stage=stage: stage_messages(stage, fixtures, resume_text, linkedin_text)
+    for key, stage in SECTION_STAGES.items():
+        content = fixtures["sections"][key]
+        cases[f"validate_llm_output[{stage}]"] = lambda stage=stage, content=content: server.validate_llm_output(stage, content)
+        cases[f"local_pre_audit[{stage}]"] = lambda stage=stage, content=content: server.local_pre_audit(stage, content)
+    for tier, report in fixtures["reports"].items():
+        cases[f"generate_pdf_report[{tier}]"] = lambda report=report, tier=tier: server.generate_pdf_report(report, {**session, "tier": tier})
+    return cases
+
+def machine_environment(args) -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "list_items": args.list_items
+    }
+
+def run_benchmarks(args) -> Dict[str, Any]:
+    fixtures = build_fixtures(args.list_items)
+    resume_text = server.extract_text_from_pdf(fixtures["resume_long_pdf"])
+    linkedin_text = server.extract_text_from_pdf(fixtures["linkedin_pdf"])
+
+    cases = {
+        name: fn for name, fn in build_cases(fixtures, resume_text, linkedin_text).items()
+        if not args.filter or args.filter in name
+    }
+    for fn in cases.values():
+        for _ in range(args.warmup):
+            fn()
+    # Rounds are interleaved across cases, so a burst of host noise lands in one
+    # round of many benchmarks rather than every call of one
+    timings: Dict[str, List[float]] = {name: [] for name in cases}
+    for _ in range(args.rounds):
+        for name, fn in cases.items():
+            timings[name].extend(time_calls(fn, args.repeat))
+    results = {name: measure(fn, timings[name]) for name, fn in cases.items()}
+
+    return {
+        "environment": machine_environment(args),
+        "filter": args.filter,
+        "fixtures": {
+            name: len(fixtures[name]) for name in ("resume_short_pdf", "resume_long_pdf", "resume_short_docx", "resume_long_docx", "linkedin_pdf")
+        },
+        "benchmarks": results,
+        "prompt_tokens": prompt_sizes(fixtures, resume_text, linkedin_text)
+    }
+
+# ============== BASELINES ==============
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], args) -> List[str]:
+    """Prompt growth beyond --token-tolerance; with --timing also time and memory regressions"""
+    regressions = []
+    for name, now in (current["benchmarks"].items() if args.timing else ()):
+        before = baseline.get("benchmarks", {}).get(name)
+        if not before:
+            continue
+        # The fastest call is the least disturbed by scheduling noise; changes under --min-delta-ms are noise
+        delta_ms = now["min_ms"] - before["min_ms"]
+        if delta_ms > args.min_delta_ms and now["min_ms"] > before["min_ms"] * (1 + args.tolerance):
+            regressions.append(f"{name}: min {before['min_ms']} -> {now['min_ms']} ms")
+        delta_kib = now["peak_kib"] - before["peak_kib"]
+        if delta_kib > args.memory_floor_kib and now["peak_kib"] > before["peak_kib"] * (1 + args.memory_tolerance):
+            regressions.append(f"{name}: peak {before['peak_kib']} -> {now['peak_kib']} KiB")
+
+    before_stages = baseline.get("prompt_tokens", {}).get("stages", {})
+    for stage, now in current["prompt_tokens"]["stages"].items():
+        before = before_stages.get(stage)
+        if before and now["total_tokens"] > before["total_tokens"] * (1 + args.token_tolerance):
+            regressions.append(f"prompt {stage}: {before['total_tokens']} -> {now['total_tokens']} tokens")
+    return regressions
+
+def print_report(summary: Dict[str, Any], baseline: Optional[Dict[str, Any]]):
+    previous = (baseline or {}).get("benchmarks", {})
+    print("=" * 98)
+    print(f"{'Benchmark':<48}{'median ms':>11}{'min ms':>10}{'peak KiB':>10}{'retained':>10}{'vs base':>9}")
+    for name, row in summary["benchmarks"].items():
+        change = ""
+        if name in previous and previous[name]["min_ms"]:
+            change = f"{(row['min_ms'] / previous[name]['min_ms'] - 1) * 100:+.0f}%"
+        print(f"{name:<48}{row['median_ms']:>11}{row['min_ms']:>10}{row['peak_kib']:>10}{row['retained_blocks']:>10}{change:>9}")
+    print("-" * 98)
+    print(f"{'Prompt (estimated tokens)':<48}{'system':>11}{'user':>10}{'total':>10}")
+    for stage, row in summary["prompt_tokens"]["stages"].items():
+        print(f"{stage:<48}{row['system_tokens']:>11}{row['user_tokens']:>10}{row['total_tokens']:>10}")
+    tiers = ", ".join(f"₹{tier}: {tokens}" for tier, tokens in summary["prompt_tokens"]["tiers"].items())
+    print(f"Prompt tokens per report (first attempt, no retries) - {tiers}")
+    print("=" * 98)
+
+def main():
+    parser = argparse.ArgumentParser(description="CareerIQ CPU micro-benchmarks")
+    parser.add_argument("--repeat", type=int, default=20, help="timed calls per round")
+    parser.add_argument("--rounds", type=int, default=5, help="rounds of --repeat calls; the best call is compared")
+    parser.add_argument("--warmup", type=int, default=2, help="untimed calls before timing")
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this text")
+    parser.add_argument("--list-items", type=int, default=4, help="items per array in synthesized section JSON")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="baseline file to save or compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="write the prompt token counts (and with --timing, timings) as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="exit 1 if a stage prompt (and with --timing, a benchmark) regressed")
+    parser.add_argument("--timing", action="store_true", help="include time and memory in --save-baseline and --compare (same machine only)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed best-call time increase (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05, help="ignore time increases smaller than this")
+    parser.add_argument("--memory-tolerance", type=float, default=0.25, help="allowed peak memory increase")
+    parser.add_argument("--memory-floor-kib", type=float, default=64, help="ignore peak memory increases smaller than this")
+    parser.add_argument("--token-tolerance", type=float, default=0.05, help="allowed prompt size increase per stage")
+    parser.add_argument("--json-out", help="write the results as JSON to this path")
+    args = parser.parse_args()
+
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else None
+    if args.compare and baseline is None:
+        parser.error(f"no baseline at {baseline_path}; generate one with `python benchmarks.py --save-baseline --baseline {baseline_path}`")
+    if args.compare and baseline.get("list_items", baseline.get("environment", {}).get("list_items")) != args.list_items:
+        parser.error(f"{baseline_path} was saved with a different --list-items; prompt sizes are not comparable")
+    if args.compare and args.timing:
+        if "benchmarks" not in baseline:
+            parser.error(f"{baseline_path} has no timings; save one on this machine with --save-baseline --timing --baseline <path>")
+        if baseline["environment"] != machine_environment(args):
+            parser.error(f"{baseline_path} was saved on {baseline['environment']}; timings only compare on the same machine")
+        if baseline.get("filter") != args.filter:
+            parser.error(f"{baseline_path} was saved with --filter {baseline.get('filter') or '(none)'}; timings only compare for the same cases")
+
+    summary = run_benchmarks(args)
+    print_report(summary, baseline)
+
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps(summary, indent=2))
+        print(f"Results written to {args.json_out}")
+    if args.save_baseline:
+        saved = summary if args.timing else {"list_items": args.list_items, "prompt_tokens": summary["prompt_tokens"]}
+        baseline_path.write_text(json.dumps(saved, indent=2) + "\n")
+        print(f"Baseline written to {baseline_path}")
+    if args.compare:
+        regressions = compare(summary, baseline, args)
+        if regressions:
+            print(f"{len(regressions)} regression(s) against {baseline_path}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions against {baseline_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,828 @@
+"""CareerIQ pipeline capacity simulator.
+
+A discrete-event model of run_analysis_pipeline under OpenAI limits, for sizing
+workers, OPENAI_MAX_CONCURRENCY and the account's RPM/TPM tier before paying
+for them. Reports arrive as a Poisson stream with a tier mix. Each one runs
+the pipeline's stage graph:
+
+    input validation (LLM only when the local check is unsure)
+    → signal extraction → diagnosis → risk → [execution → decisions for ₹4498]
+
+Every section is audited and regenerated (or repaired) on rejection, as
+generate_section_with_retry does. LLM calls queue in a per-worker model of
+LLMRateLimiter: AIMD concurrency plus RPM/TPM buckets, shared across workers
+with --shared-limiter. Calls are admitted by an account-level model of
+OpenAI's own limits, so an oversubscribed setup sees 429s, retry-after pauses
+and halved concurrency. Slow calls are hedged past their stage p95, counted
+from the limiter slot, unless the limiter is backed up or paused.
+
+Stage latencies and token counts come from llm_logs (--from-logs), from cassette
+recordings (--from-cassettes) or from rough built-in placeholders. Both logged
+and recorded latencies include any limiter wait, so take them from a quiet period.
+With --from-logs, rejection rates come from the audit_outcome record logged for
+every audited draft.
+
+    python capacity_sim.py run --rate 6 --concurrency 16 --from-logs mongodb://localhost:27017
+    python capacity_sim.py run --rate 6 --policy speculative --tier-mix 499=0.5 2999=0.3 4498=0.2
+    python capacity_sim.py curve --rates 2 4 8 16 --concurrency 8 16 32 --policies sequential best_of_n --csv-out curve.csv
+
+Upgrade pipelines and the circuit breaker are not modelled.
+"""
+import argparse
+import csv
+import heapq
+import json
+import math
+import random
+import sys
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from itertools import count
+from pathlib import Path
+from typing import Any, Callable, Dict, Generator, List, Optional, Tuple
+
+# Section stages per tier, in pipeline order (mirrors report_sections_for_tier)
+TIER_STAGES = {
+    499: ["diagnosis", "risk"],
+    2999: ["diagnosis", "risk"],
+    4498: ["diagnosis", "risk", "execution_guardrails", "decision_intelligence"]
+}
+
+# Placeholder profiles used when no logs or cassettes are given:
+# (median seconds, log-normal sigma, prompt tokens, completion tokens)
+DEFAULT_PROFILES = {
+    "input_validation": (3.0, 0.3, 1500, 150),
+    "signal_extraction": (25.0, 0.35, 3800, 2500),
+    "diagnosis": (30.0, 0.35, 5300, 3000),
+    "risk": (20.0, 0.35, 6600, 1800),
+    "execution_guardrails": (18.0, 0.35, 8700, 1500),
+    "decision_intelligence": (35.0, 0.35, 11700, 3500),
+    "quality_auditor": (8.0, 0.3, 7000, 400),
+    "section_repair": (10.0, 0.35, 9000, 800)
+}
+
+POLICIES = ["sequential", "speculative", "best_of_n"]
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+# ============== SIMULATION KERNEL ==============
+# Processes are generators that yield events; the clock jumps between events.
+
+class Event:
+    def __init__(self, sim: "Simulation"):
+        self.sim = sim
+        self.callbacks: List[Callable[["Event"], None]] = []
+        self.triggered = False
+        self.value: Any = None
+
+    def succeed(self, value: Any = None):
+        if self.triggered:
+            return
+        self.triggered = True
+        self.value = value
+        callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            self.sim.schedule(0, callback, self)
+
+class Process(Event):
+    def __init__(self, sim: "Simulation", generator: Generator):
+        super().__init__(sim)
+        self.generator = generator
+        self.waiting: Optional[Event] = None
+        self.error: Optional[Exception] = None
+        sim.schedule(0, self._step, None)
+
+    def _step(self, value: Any, error: Optional[Exception] = None):
+        if self.triggered:
+            return
+        try:
+            event = self.generator.throw(error) if error else self.generator.send(value)
+        except StopIteration as stop:
+            self.succeed(stop.value)
+            return
+        except Exception as e:
+            # Raised into whoever waits on this process, like an awaited task
+            self.error = e
+            self.succeed(None)
+            return
+        self.waiting = event
+        if event.triggered:
+            self.sim.schedule(0, self._resume, event)
+        else:
+            event.callbacks.append(self._resume)
+
+    def _resume(self, event: Event):
+        if self.triggered or self.waiting is not event:
+            return
+        self.waiting = None
+        self._step(event.value, event.error if isinstance(event, Process) else None)
+
+    def cancel(self):
+        """Stop the process; its finally blocks run (releasing limiter slots)"""
+        if self.triggered:
+            return
+        if self.waiting is not None and self._resume in self.waiting.callbacks:
+            self.waiting.callbacks.remove(self._resume)
+        self.waiting = None
+        self.generator.close()
+        self.succeed(None)
+
+class Simulation:
+    def __init__(self):
+        self.now = 0.0
+        self._queue: List[Tuple[float, int, Callable, Any]] = []
+        self.sequence = count()
+
+    def schedule(self, delay: float, callback: Callable, argument: Any = None):
+        heapq.heappush(self._queue, (self.now + delay, next(self.sequence), callback, argument))
+
+    def timeout(self, delay: float) -> Event:
+        event = Event(self)
+        self.schedule(delay, lambda _: event.succeed())
+        return event
+
+    def spawn(self, generator: Generator) -> Process:
+        return Process(self, generator)
+
+    def any_of(self, events: List[Event]) -> Event:
+        """Fires with the first of `events` to fire"""
+        combined = Event(self)
+        for event in events:
+            if event.triggered:
+                combined.succeed(event)
+                break
+            event.callbacks.append(lambda fired: combined.succeed(fired))
+        return combined
+
+    def run(self, until: float):
+        while self._queue and self._queue[0][0] <= until:
+            self.now, _, callback, argument = heapq.heappop(self._queue)
+            callback(argument)
+        self.now = max(self.now, until)
+
+# ============== RATE LIMIT MODEL ==============
+
+class Bucket:
+    """Continuously refilling per-minute budget (TokenBucket without the waiting)"""
+
+    def __init__(self, sim: Simulation, per_minute: float):
+        self.sim = sim
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = 0.0
+
+    def refill(self):
+        self.available = min(self.capacity, self.available + (self.sim.now - self.updated) * self.rate)
+        self.updated = self.sim.now
+
+    def wait_for(self, amount: float) -> float:
+        self.refill()
+        return max(0.0, (min(amount, self.capacity) - self.available) / self.rate)
+
+    def take(self, amount: float):
+        self.refill()
+        self.available -= min(amount, self.capacity)
+
+    def charge(self, amount: float):
+        """Usage beyond the estimate; may go negative (debt)"""
+        self.refill()
+        self.available -= amount
+
+class Ticket(Event):
+    def __init__(self, sim: Simulation, key: Tuple, tokens: int):
+        super().__init__(sim)
+        self.key = key
+        self.tokens = tokens
+
+class WorkerLimiter:
+    """LLMRateLimiter for one worker: pause after 429s, AIMD concurrency, RPM/TPM buckets"""
+
+    def __init__(self, sim: Simulation, max_concurrency: int, requests: Bucket, tokens: Bucket):
+        self.sim = sim
+        self.max_limit = max_concurrency
+        self.limit = float(max_concurrency)
+        self.in_flight = 0
+        self.requests = requests
+        self.tokens = tokens
+        self.paused_until = 0.0
+        self.last_decrease = -math.inf
+        self.queue: List[Ticket] = []
+        self.wake_at: Optional[float] = None
+        self.busy_time = 0.0
+        self.busy_since = 0.0
+
+    def request(self, key: Tuple, tokens: int) -> Ticket:
+        ticket = Ticket(self.sim, key, tokens)
+        self.queue.append(ticket)
+        self.dispatch()
+        return ticket
+
+    def congested(self) -> bool:
+        return bool(self.queue) or self.sim.now < self.paused_until
+
+    def cancel(self, ticket: Ticket):
+        if ticket in self.queue:
+            self.queue.remove(ticket)
+
+    def _track(self, change: int):
+        self.busy_time += self.in_flight * (self.sim.now - self.busy_since)
+        self.busy_since = self.sim.now
+        self.in_flight += change
+
+    def release(self, throttled: bool, extra_tokens: int = 0):
+        if extra_tokens > 0:
+            self.tokens.charge(extra_tokens)
+        self._track(-1)
+        if throttled:
+            if self.sim.now - self.last_decrease > 1.0:
+                self.limit = max(1.0, self.limit / 2)
+                self.last_decrease = self.sim.now
+        else:
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+        self.dispatch()
+
+    def throttle(self, retry_after: float):
+        self.paused_until = max(self.paused_until, self.sim.now + retry_after)
+        self._wake(self.paused_until - self.sim.now)
+
+    def _wake(self, delay: float):
+        at = self.sim.now + delay
+        if self.wake_at is None or at < self.wake_at - 1e-9 or self.wake_at <= self.sim.now:
+            self.wake_at = at
+            self.sim.schedule(delay, lambda _: self.dispatch())
+
+    def dispatch(self):
+        while self.queue:
+            if self.sim.now < self.paused_until:
+                return self._wake(self.paused_until - self.sim.now)
+            if self.in_flight >= max(1, int(self.limit)):
+                return
+            ticket = min(self.queue, key=lambda t: t.key)
+            wait = max(self.requests.wait_for(1), self.tokens.wait_for(ticket.tokens))
+            # Sub-millisecond waits are float residue from refilling; treat them as ready
+            if wait > 1e-3:
+                return self._wake(wait)
+            self.queue.remove(ticket)
+            self.requests.take(1)
+            self.tokens.take(ticket.tokens)
+            self._track(1)
+            ticket.succeed()
+
+class Account:
+    """OpenAI's side of the limits: a request over the account's RPM/TPM gets a 429"""
+
+    def __init__(self, sim: Simulation, rpm: int, tpm: int):
+        self.requests = Bucket(sim, rpm)
+        self.tokens = Bucket(sim, tpm)
+
+    def admit(self, tokens: int) -> Optional[float]:
+        """None when admitted, else the retry-after seconds"""
+        wait = max(self.requests.wait_for(1), self.tokens.wait_for(tokens))
+        if wait > 1e-3:
+            return max(1.0, math.ceil(wait))
+        self.requests.take(1)
+        self.tokens.take(tokens)
+        return None
+
+# ============== STAGE PROFILES ==============
+
+class StageProfile:
+    """Latency and token samples for one prompt; empirical when available"""
+
+    def __init__(self, name: str, samples: List[Tuple[float, int, int]]):
+        self.name = name
+        self.samples = samples
+        self.p95 = percentile([sample[0] for sample in samples], 0.95) or 0.0
+
+    @classmethod
+    def lognormal(cls, name: str, median: float, sigma: float, prompt_tokens: int, completion_tokens: int, rng: random.Random):
+        samples = [(median * rng.lognormvariate(0, sigma), prompt_tokens, completion_tokens) for _ in range(2000)]
+        return cls(name, samples)
+
+    def draw(self, rng: random.Random) -> Tuple[float, int, int]:
+        return rng.choice(self.samples)
+
+def profiles_from_logs(mongo_url: str, db_name: str, hours: float) -> Tuple[Dict[str, List[Tuple[float, int, int]]], Dict[str, Any]]:
+    """Samples per prompt from llm_logs, plus rejection and LLM-validation rates"""
+    from pymongo import MongoClient
+
+    cutoff = (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()
+    samples: Dict[str, List[Tuple[float, int, int]]] = defaultdict(list)
+    audits: Dict[str, Dict[Tuple[str, str], int]] = defaultdict(lambda: defaultdict(int))
+    client = MongoClient(mongo_url, serverSelectionTimeoutMS=5000)
+    try:
+        cursor = client[db_name].llm_logs.find(
+            {"timestamp": {"$gte": cutoff}, "latency_ms": {"$ne": None}},
+            {"_id": 0, "prompt_name": 1, "latency_ms": 1, "prompt_tokens": 1, "completion_tokens": 1}
+        )
+        for log in cursor:
+            name = log.get("prompt_name")
+            samples[name].append((log["latency_ms"] / 1000, log.get("prompt_tokens") or 0, log.get("completion_tokens") or 0))
+        # One record per audited draft, whatever the retry mode; speculative drafts
+        # may belong to a discarded upstream section, so they are left out
+        rows = client[db_name].llm_logs.aggregate([
+            {"$match": {"timestamp": {"$gte": cutoff}, "audit_outcome": {"$exists": True}, "speculative": {"$ne": True}}},
+            {"$group": {"_id": {"section": "$section", "outcome": "$audit_outcome", "source": "$audit_source"}, "count": {"$sum": 1}}}
+        ])
+        for row in rows:
+            audits[row["_id"]["section"]][(row["_id"]["outcome"], row["_id"]["source"])] += row["count"]
+    finally:
+        client.close()
+
+    rejection = {}
+    rejected = rejected_locally = 0
+    for stage, outcomes in audits.items():
+        if stage not in DEFAULT_PROFILES:
+            continue
+        stage_rejected = sum(n for (outcome, _), n in outcomes.items() if outcome == "rejected")
+        rejection[stage] = round(stage_rejected / sum(outcomes.values()), 3)
+        rejected += stage_rejected
+        rejected_locally += sum(n for (outcome, source), n in outcomes.items() if outcome == "rejected" and source != "llm")
+    extractions = len(samples.get("signal_extraction", []))
+    rates = {
+        "reject_rate": rejection,
+        "local_reject_share": round(rejected_locally / rejected, 3) if rejected else None,
+        "llm_validation_rate": round(len(samples.get("input_validation", [])) / extractions, 3) if extractions else None
+    }
+    return samples, rates
+
+def profiles_from_cassettes(directory: Path) -> Dict[str, List[Tuple[float, int, int]]]:
+    samples: Dict[str, List[Tuple[float, int, int]]] = defaultdict(list)
+    for path in directory.glob("*/*.json"):
+        cassette = json.loads(path.read_text())
+        for response in cassette.get("responses", []):
+            usage = response.get("usage") or {}
+            samples[cassette.get("prompt_name", path.parent.name)].append(
+                (response.get("latency_ms", 0) / 1000, usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0))
+            )
+    return samples
+
+def build_profiles(args, rng: random.Random) -> Tuple[Dict[str, StageProfile], Dict[str, Any]]:
+    observed: Dict[str, List[Tuple[float, int, int]]] = {}
+    rates: Dict[str, Any] = {}
+    if args.from_logs:
+        observed, rates = profiles_from_logs(args.from_logs, args.db_name, args.hours)
+    elif args.from_cassettes:
+        observed = profiles_from_cassettes(Path(args.from_cassettes))
+
+    profiles = {}
+    for name, (median, sigma, prompt_tokens, completion_tokens) in DEFAULT_PROFILES.items():
+        if len(observed.get(name, [])) >= args.min_samples:
+            profiles[name] = StageProfile(name, observed[name])
+        else:
+            median *= args.latency_scale
+            profiles[name] = StageProfile.lognormal(name, median, sigma, prompt_tokens, completion_tokens, rng)
+    sources = {name: "observed" if len(observed.get(name, [])) >= args.min_samples else "default" for name in profiles}
+    return profiles, {**rates, "sources": sources}
+
+# ============== PIPELINE MODEL ==============
+
+class PipelineFailed(Exception):
+    pass
+
+class Report:
+    def __init__(self, index: int, tier: int, arrived: float, limiter: WorkerLimiter):
+        self.index = index
+        self.tier = tier
+        self.arrived = arrived
+        self.limiter = limiter
+        self.finished: Optional[float] = None
+        self.failed = False
+        self.queue_wait = 0.0
+        self.calls = 0
+
+class PipelineModel:
+    def __init__(self, sim: Simulation, args, profiles: Dict[str, StageProfile], rates: Dict[str, Any], rng: random.Random):
+        self.sim = sim
+        self.args = args
+        self.profiles = profiles
+        self.rng = rng
+        # Arrivals draw from their own stream so every curve point sees the same reports
+        self.arrival_rng = random.Random(args.seed)
+        self.reject_rate = {stage: args.reject_rate for stage in DEFAULT_PROFILES}
+        self.reject_rate.update(rates.get("reject_rate") or {})
+        self.reject_rate.update(args.stage_reject_rate)
+        self.local_reject_share = args.local_reject_share
+        if self.local_reject_share is None:
+            self.local_reject_share = rates.get("local_reject_share")
+        if self.local_reject_share is None:
+            self.local_reject_share = 0.3
+        self.llm_validation_rate = args.llm_validation_rate
+        if self.llm_validation_rate is None:
+            self.llm_validation_rate = rates.get("llm_validation_rate") or 0.1
+        self.account = Account(sim, args.account_rpm or args.rpm * (1 if args.shared_limiter else args.workers),
+                               args.account_tpm or args.tpm * (1 if args.shared_limiter else args.workers))
+        shared = (Bucket(sim, args.rpm), Bucket(sim, args.tpm)) if args.shared_limiter else None
+        self.limiters = [
+            WorkerLimiter(sim, args.concurrency, *(shared or (Bucket(sim, args.rpm), Bucket(sim, args.tpm))))
+            for _ in range(args.workers)
+        ]
+        self.reports: List[Report] = []
+        self.stats: Dict[str, int] = defaultdict(int)
+
+    # ---- LLM calls ----
+
+    def send(self, report: Report, stage: str, estimated: int, latency: float, tokens: int, acquired: Optional[Event] = None):
+        """One request: limiter slot, then the account admits it or answers 429"""
+        key = (report.arrived if self.args.queue_order == "oldest-report" else 0, next(self.sim.sequence))
+        for attempt in range(self.args.max_throttle_retries + 1):
+            queued_at = self.sim.now
+            ticket = report.limiter.request(key, estimated)
+            throttled, used = False, 0
+            try:
+                yield ticket
+                if acquired is not None:
+                    acquired.succeed()
+                report.queue_wait += self.sim.now - queued_at
+                retry_after = self.account.admit(tokens)
+                if retry_after is None:
+                    yield self.sim.timeout(latency)
+                    used = tokens
+                else:
+                    throttled = True
+                    yield self.sim.timeout(self.args.throttle_latency)
+            finally:
+                if ticket.triggered:
+                    report.limiter.release(throttled, used - estimated)
+                else:
+                    report.limiter.cancel(ticket)
+            if not throttled:
+                return
+            self.stats["throttled_429"] += 1
+            report.limiter.throttle(retry_after)
+        raise PipelineFailed(f"{stage}: rate limited {self.args.max_throttle_retries + 1} times")
+
+    def call(self, report: Report, stage: str):
+        """create_chat_completion: hedged past the stage p95 when hedging is on"""
+        profile = self.profiles[stage]
+        latency, prompt_tokens, completion_tokens = profile.draw(self.rng)
+        estimated = prompt_tokens + min(self.args.estimated_output_tokens, completion_tokens or self.args.estimated_output_tokens)
+        tokens = prompt_tokens + completion_tokens
+        report.calls += 1
+        self.stats[f"calls.{stage}"] += 1
+        delay = max(profile.p95, self.args.hedge_min_delay) if self.args.hedging else None
+        if delay is None or latency <= delay:
+            yield from self.send(report, stage, estimated, latency, tokens)
+            return
+
+        # The hedge clock starts once the primary holds a limiter slot, like hedged_chat_completion
+        acquired = Event(self.sim)
+        primary = self.sim.spawn(self.send(report, stage, estimated, latency, tokens, acquired))
+        yield self.sim.any_of([primary, acquired])
+        if not primary.triggered:
+            yield self.sim.any_of([primary, self.sim.timeout(delay)])
+        if primary.triggered:
+            if primary.error:
+                raise primary.error
+            return
+        if report.limiter.congested():
+            self.stats["hedges_skipped"] += 1
+            yield primary
+            return
+        # The primary outlives the hedge delay: race a duplicate with a fresh latency
+        self.stats["hedges"] += 1
+        report.calls += 1
+        hedge_latency, _, _ = profile.draw(self.rng)
+        hedge = self.sim.spawn(self.send(report, stage, estimated, hedge_latency, tokens))
+        try:
+            winner = yield self.sim.any_of([primary, hedge])
+            if winner.error:
+                # Like asyncio.wait: a failed call leaves the other one running
+                other = hedge if winner is primary else primary
+                yield other
+        finally:
+            primary.cancel()
+            hedge.cancel()
+
+    # ---- sections ----
+
+    def audit(self, report: Report, stage: str, on_llm_audit: Optional[Callable[[], None]] = None):
+        """Local checks first; only drafts that pass them reach the LLM auditor"""
+        rejected = self.rng.random() < self.reject_rate.get(stage, 0.0)
+        if rejected and self.rng.random() < self.local_reject_share:
+            return False
+        if on_llm_audit:
+            on_llm_audit()
+        yield from self.call(report, "quality_auditor")
+        return not rejected
+
+    def section(self, report: Report, stages: List[str], index: int):
+        """generate_section_with_retry; returns the speculated next section's process, if any"""
+        stage = stages[index]
+        speculative = self.args.policy == "speculative" and index + 1 < len(stages)
+        if self.args.policy == "best_of_n":
+            yield from self.best_of_n(report, stage)
+            return None
+
+        yield from self.call(report, stage)
+        next_section: List[Optional[Process]] = [None]
+
+        def speculate():
+            self.stats["speculation.started"] += 1
+            next_section[0] = self.sim.spawn(self.section(report, stages, index + 1))
+
+        def discard():
+            if next_section[0] is not None:
+                self.stats["speculation.misses"] += 1
+                next_section[0].cancel()
+                next_section[0] = None
+
+        handed_over = False
+        try:
+            for attempt in range(self.args.max_retries + 1):
+                approved = yield from self.audit(report, stage, speculate if speculative else None)
+                if approved or attempt == self.args.max_retries:
+                    handed_over = True
+                    if next_section[0] is not None:
+                        self.stats["speculation.hits"] += 1
+                    return next_section[0]
+                discard()
+                self.stats[f"retries.{stage}"] += 1
+                yield from self.call(report, "section_repair" if self.args.retry_mode == "repair" else stage)
+        finally:
+            if not handed_over:
+                discard()
+
+    def best_of_n(self, report: Report, stage: str):
+        """generate_section_candidates: N drafts audited concurrently, first approval wins"""
+        def candidate():
+            yield from self.call(report, stage)
+            approved = yield from self.audit(report, stage)
+            return approved
+
+        candidates = [self.sim.spawn(candidate()) for _ in range(self.args.candidates)]
+        pending, last_error = list(candidates), None
+        try:
+            while pending:
+                finished = yield self.sim.any_of(pending)
+                pending.remove(finished)
+                if finished.error:
+                    last_error = finished.error
+                elif finished.value:
+                    self.stats["best_of_n.approved"] += 1
+                    return
+            if all(process.error for process in candidates):
+                raise last_error
+            self.stats["best_of_n.fallback"] += 1
+        finally:
+            for process in candidates:
+                process.cancel()
+
+    def pipeline(self, report: Report):
+        try:
+            if self.rng.random() < self.llm_validation_rate:
+                yield from self.call(report, "input_validation")
+            yield from self.call(report, "signal_extraction")
+            stages = TIER_STAGES[report.tier]
+            speculated: Optional[Process] = None
+            for index in range(len(stages)):
+                if speculated is not None:
+                    yield speculated
+                    speculated = speculated.value
+                else:
+                    speculated = yield from self.section(report, stages, index)
+        except PipelineFailed:
+            report.failed = True
+        report.finished = self.sim.now
+
+    def arrivals(self, stop_at: float):
+        tiers, weights = zip(*self.args.tier_mix.items())
+        index = 0
+        while True:
+            yield self.sim.timeout(self.arrival_rng.expovariate(self.args.rate / 60.0))
+            if self.sim.now >= stop_at:
+                return
+            tier = self.arrival_rng.choices(tiers, weights)[0]
+            report = Report(index, tier, self.sim.now, self.limiters[index % len(self.limiters)])
+            index += 1
+            self.reports.append(report)
+            self.sim.spawn(self.pipeline(report))
+
+# ============== RUNS ==============
+
+def simulate(args, profiles: Dict[str, StageProfile], rates: Dict[str, Any]) -> Dict[str, Any]:
+    rng = random.Random(args.seed + 1)
+    sim = Simulation()
+    model = PipelineModel(sim, args, profiles, rates, rng)
+    measure_from, measure_to = args.warmup * 60, (args.warmup + args.duration) * 60
+    sim.spawn(model.arrivals(measure_to))
+    sim.run(measure_to + args.drain * 60)
+
+    measured = [report for report in model.reports if measure_from <= report.arrived < measure_to]
+    done = [report for report in measured if report.finished is not None and not report.failed]
+    completed_in_window = [report for report in model.reports
+                           if report.finished is not None and not report.failed and measure_from <= report.finished < measure_to]
+    durations = [report.finished - report.arrived for report in done]
+    waits = [report.queue_wait for report in done]
+    busy = sum(limiter.busy_time + limiter.in_flight * (sim.now - limiter.busy_since) for limiter in model.limiters)
+
+    return {
+        "config": {
+            "rate_per_minute": args.rate,
+            "concurrency": args.concurrency,
+            "workers": args.workers,
+            "policy": args.policy,
+            "queue_order": args.queue_order,
+            "rpm": args.rpm,
+            "tpm": args.tpm,
+            "shared_limiter": args.shared_limiter,
+            "tier_mix": args.tier_mix
+        },
+        "reports_arrived": len(measured),
+        "reports_completed": len(done),
+        "reports_failed": sum(1 for report in measured if report.failed),
+        "reports_unfinished": sum(1 for report in measured if report.finished is None),
+        "throughput_per_minute": round(len(completed_in_window) / args.duration, 2),
+        "report_seconds": summarize_seconds(durations),
+        "report_seconds_by_tier": {
+            str(tier): summarize_seconds([report.finished - report.arrived for report in done if report.tier == tier])
+            for tier in args.tier_mix
+        },
+        "queue_wait_seconds": summarize_seconds(waits),
+        "llm_calls_per_report": round(sum(report.calls for report in done) / len(done), 2) if done else None,
+        "mean_llm_in_flight": round(busy / sim.now, 2) if sim.now else 0,
+        "events": dict(sorted(model.stats.items())),
+        "inputs": {
+            "reject_rate": {stage: model.reject_rate[stage] for stage in ["diagnosis", "risk", "execution_guardrails", "decision_intelligence"]},
+            "local_reject_share": model.local_reject_share,
+            "llm_validation_rate": model.llm_validation_rate,
+            "stage_p95_seconds": {name: round(profile.p95, 1) for name, profile in profiles.items()},
+            "profile_sources": rates["sources"]
+        }
+    }
+
+def summarize_seconds(values: List[float]) -> Dict[str, Optional[float]]:
+    def rounded(value):
+        return None if value is None else round(value, 1)
+    return {
+        "p50": rounded(percentile(values, 0.5)),
+        "p95": rounded(percentile(values, 0.95)),
+        "p99": rounded(percentile(values, 0.99)),
+        "max": rounded(max(values) if values else None)
+    }
+
+def print_run(result: Dict[str, Any]):
+    config = result["config"]
+    print("=" * 78)
+    print(f"{config['rate_per_minute']} reports/min, {config['workers']} worker(s) x {config['concurrency']} concurrent calls, "
+          f"policy {config['policy']}, queue {config['queue_order']}")
+    print(f"Arrived {result['reports_arrived']}   Completed {result['reports_completed']}   "
+          f"Failed {result['reports_failed']}   Unfinished {result['reports_unfinished']}")
+    print(f"Throughput: {result['throughput_per_minute']} reports/min   LLM calls/report: {result['llm_calls_per_report']}   "
+          f"Mean in-flight calls: {result['mean_llm_in_flight']}")
+    report, wait = result["report_seconds"], result["queue_wait_seconds"]
+    print(f"Report time s: p50 {report['p50']}  p95 {report['p95']}  p99 {report['p99']}")
+    print(f"Limiter queue wait per report (summed over its calls) s: p50 {wait['p50']}  p95 {wait['p95']}  p99 {wait['p99']}")
+    for tier, row in result["report_seconds_by_tier"].items():
+        print(f"  ₹{tier}: p50 {row['p50']}  p95 {row['p95']}")
+    if result["events"]:
+        print("Events: " + ", ".join(f"{name}={value}" for name, value in result["events"].items() if not name.startswith("calls.")))
+    print("=" * 78)
+
+def run_curve(args, profiles: Dict[str, StageProfile], rates: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Sweep arrival rate for every concurrency/policy pair"""
+    rows = []
+    for policy in args.policies:
+        for concurrency in args.concurrency_levels:
+            for rate in args.rates:
+                point = argparse.Namespace(**{**vars(args), "policy": policy, "concurrency": concurrency, "rate": rate})
+                result = simulate(point, profiles, rates)
+                rows.append({
+                    "policy": policy,
+                    "concurrency": concurrency,
+                    "rate_per_minute": rate,
+                    "throughput_per_minute": result["throughput_per_minute"],
+                    "p50_report_seconds": result["report_seconds"]["p50"],
+                    "p95_report_seconds": result["report_seconds"]["p95"],
+                    "p95_queue_wait_seconds": result["queue_wait_seconds"]["p95"],
+                    "throttled_429": result["events"].get("throttled_429", 0),
+                    "failed": result["reports_failed"],
+                    "unfinished": result["reports_unfinished"]
+                })
+                print(f"  {policy:<12} concurrency {concurrency:>3}  rate {rate:>6}/min  "
+                      f"→ {rows[-1]['throughput_per_minute']:>6}/min  p95 {rows[-1]['p95_report_seconds']} s", file=sys.stderr)
+    return rows
+
+def print_curve(rows: List[Dict[str, Any]], slo_seconds: float):
+    print("=" * 96)
+    print(f"{'policy':<13}{'conc':>5}{'rate/min':>10}{'done/min':>10}{'p50 s':>9}{'p95 s':>9}{'p95 wait s':>12}{'429s':>7}{'failed':>8}{'open':>6}")
+    for row in rows:
+        print(f"{row['policy']:<13}{row['concurrency']:>5}{row['rate_per_minute']:>10}{row['throughput_per_minute']:>10}"
+              f"{str(row['p50_report_seconds']):>9}{str(row['p95_report_seconds']):>9}{str(row['p95_queue_wait_seconds']):>12}"
+              f"{row['throttled_429']:>7}{row['failed']:>8}{row['unfinished']:>6}")
+    print("-" * 96)
+    print(f"Highest rate meeting p95 <= {slo_seconds:g} s with every report finished:")
+    groups: Dict[Tuple[str, int], List[Dict[str, Any]]] = defaultdict(list)
+    for row in rows:
+        groups[(row["policy"], row["concurrency"])].append(row)
+    for (policy, concurrency), group in groups.items():
+        passing = [row["rate_per_minute"] for row in group
+                   if row["p95_report_seconds"] is not None and row["p95_report_seconds"] <= slo_seconds
+                   and not row["failed"] and not row["unfinished"]]
+        print(f"  {policy:<12} concurrency {concurrency:>3}: {max(passing) if passing else 'none'} reports/min")
+    print("=" * 96)
+
+# ============== CLI ==============
+
+def key_values(pairs: List[str], key_type: Callable, value_type: Callable) -> Dict[Any, Any]:
+    parsed = {}
+    for pair in pairs:
+        key, _, value = pair.partition("=")
+        parsed[key_type(key)] = value_type(value)
+    return parsed
+
+def add_model_arguments(parser: argparse.ArgumentParser):
+    source = parser.add_argument_group("stage profiles")
+    source.add_argument("--from-logs", metavar="MONGO_URL", help="sample latencies, tokens and rejection rates from llm_logs")
+    source.add_argument("--db-name", default="careeriq")
+    source.add_argument("--hours", type=float, default=168, help="llm_logs look-back window")
+    source.add_argument("--from-cassettes", metavar="DIR", help="sample latencies and tokens from cassette recordings")
+    source.add_argument("--min-samples", type=int, default=20, help="fewer observed samples than this fall back to the placeholder")
+    source.add_argument("--latency-scale", type=float, default=1.0, help="scale placeholder latencies")
+
+    workload = parser.add_argument_group("workload")
+    workload.add_argument("--tier-mix", nargs="+", default=["499=0.6", "2999=0.3", "4498=0.1"], metavar="TIER=WEIGHT")
+    workload.add_argument("--reject-rate", type=float, default=0.2, help="audit rejection rate per draft")
+    workload.add_argument("--stage-reject-rate", nargs="*", default=[], metavar="STAGE=RATE", help="per-stage override")
+    workload.add_argument("--local-reject-share", type=float,
+                          help="share of rejections caught by the schema check / local pre-audit (no auditor call)")
+    workload.add_argument("--llm-validation-rate", type=float, help="share of reports whose input goes to the LLM validator")
+    workload.add_argument("--warmup", type=float, default=10, help="simulated minutes before measuring")
+    workload.add_argument("--duration", type=float, default=60, help="simulated minutes measured")
+    workload.add_argument("--drain", type=float, default=30, help="simulated minutes allowed to finish measured reports")
+    workload.add_argument("--seed", type=int, default=1)
+
+    limits = parser.add_argument_group("limits and scheduling")
+    limits.add_argument("--workers", type=int, default=1, help="uvicorn workers, each with its own limiter")
+    limits.add_argument("--rpm", type=int, default=500, help="OPENAI_RPM_LIMIT per limiter")
+    limits.add_argument("--tpm", type=int, default=450000, help="OPENAI_TPM_LIMIT per limiter")
+    limits.add_argument("--account-rpm", type=int, help="the account's real RPM (default: what the limiters allow in total)")
+    limits.add_argument("--account-tpm", type=int, help="the account's real TPM")
+    limits.add_argument("--shared-limiter", action="store_true", help="OPENAI_SHARED_RATE_LIMIT: one RPM/TPM budget for all workers")
+    limits.add_argument("--estimated-output-tokens", type=int, default=2000, help="OPENAI_ESTIMATED_OUTPUT_TOKENS")
+    limits.add_argument("--max-throttle-retries", type=int, default=6, help="OPENAI_MAX_THROTTLE_RETRIES")
+    limits.add_argument("--throttle-latency", type=float, default=0.3, help="seconds for a 429 to come back")
+    limits.add_argument("--no-hedging", dest="hedging", action="store_false", help="LLM_HEDGING=false")
+    limits.add_argument("--hedge-min-delay", type=float, default=2.0, help="LLM_HEDGE_MIN_DELAY_SECONDS")
+    limits.add_argument("--max-retries", type=int, default=2, help="section regenerations after a rejection")
+    limits.add_argument("--retry-mode", choices=["regenerate", "repair"], default="regenerate", help="SECTION_RETRY_MODE")
+    limits.add_argument("--candidates", type=int, default=3, help="SECTION_CANDIDATES for best_of_n")
+    limits.add_argument("--queue-order", choices=["fifo", "oldest-report"], default="fifo",
+                        help="limiter queue order (fifo is what LLMRateLimiter does)")
+
+def main():
+    parser = argparse.ArgumentParser(description="CareerIQ pipeline capacity simulator")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="simulate one configuration")
+    add_model_arguments(run)
+    run.add_argument("--rate", type=float, default=4, help="reports arriving per minute")
+    run.add_argument("--concurrency", type=int, default=16, help="OPENAI_MAX_CONCURRENCY per worker")
+    run.add_argument("--policy", choices=POLICIES, default="sequential",
+                     help="sequential, speculative (SPECULATIVE_SECTIONS) or best_of_n (SECTION_GENERATION_MODE=parallel)")
+    run.add_argument("--json-out", help="write the result as JSON to this path")
+
+    curve = commands.add_parser("curve", help="sweep arrival rate, concurrency and policy into capacity curves")
+    add_model_arguments(curve)
+    curve.add_argument("--rates", type=float, nargs="+", default=[1, 2, 4, 8, 12, 16])
+    curve.add_argument("--concurrency", dest="concurrency_levels", type=int, nargs="+", default=[8, 16, 32])
+    curve.add_argument("--policies", nargs="+", choices=POLICIES, default=["sequential"])
+    curve.add_argument("--slo-seconds", type=float, default=300, help="p95 report time target for the summary")
+    curve.add_argument("--csv-out", help="write the curve points as CSV to this path")
+    curve.add_argument("--json-out", help="write the curve points as JSON to this path")
+
+    args = parser.parse_args()
+    args.tier_mix = key_values(args.tier_mix, int, float)
+    args.stage_reject_rate = key_values(args.stage_reject_rate, str, float)
+    unknown = set(args.tier_mix) - set(TIER_STAGES)
+    if unknown:
+        parser.error(f"unknown tier(s) {sorted(unknown)}; expected {sorted(TIER_STAGES)}")
+    if min(args.rates if args.command == "curve" else [args.rate]) <= 0:
+        parser.error("arrival rates must be positive")
+
+    # Profiles are sampled once so every point of a curve sees the same latencies
+    profiles, rates = build_profiles(args, random.Random(args.seed))
+    if args.command == "run":
+        result = simulate(args, profiles, rates)
+        print_run(result)
+        output = result
+    else:
+        output = run_curve(args, profiles, rates)
+        print_curve(output, args.slo_seconds)
+        if args.csv_out:
+            with open(args.csv_out, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=list(output[0]))
+                writer.writeheader()
+                writer.writerows(output)
+            print(f"Curve written to {args.csv_out}")
+    if args.json_out:
+        Path(args.json_out).write_text(json.dumps(output, indent=2))
+        print(f"Results written to {args.json_out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,652 @@
+"""CareerIQ local load harness.
+
+Runs the backend against local stand-ins for OpenAI, Razorpay and SendGrid
+(plus a throwaway mongod) and drives scripted user journeys through it:
+upload → create-order → verify-payment → analyze → poll → report → send-report.
+
+    python load_harness.py run --users 20 --journeys 100 --llm-latency 2.0
+    python load_harness.py run --mongo-url mongodb://localhost:27017 --llm-429-rate 0.05
+    python load_harness.py stubs --port 9100      # stand-ins only, for manual runs
+
+The backend is pointed at the stubs through OPENAI_BASE_URL, RAZORPAY_API_BASE
+and SENDGRID_API_HOST; nothing leaves the machine.
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import io
+import json
+import os
+import random
+import re
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from itertools import count
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import uvicorn
+from docx import Document
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+BACKEND_DIR = Path(__file__).parent
+
+# Credentials shared between the harness, the stubs and the backend under test
+STUB_RAZORPAY_KEY_ID = "rzp_test_loadharness"
+STUB_RAZORPAY_KEY_SECRET = "loadharness_secret"
+STUB_ADMIN_KEY = "loadharness_admin"
+
+# Every synthesized string names all five signal classes and avoids advice words,
+# so stub sections pass the local pre-audit like a good model answer would
+STUB_SENTENCE = "Title, ownership, seniority, identity and market fit signals point to a scope gap at the target role level"
+
+RESUME_PARAGRAPHS = [
+    "Priya Sharma - Senior Product Manager",
+    "Experience",
+    "Senior Product Manager, Acme Payments (Jan 2020 - Present): Led a team of 8 engineers and 2 designers. "
+    "Owned the merchant onboarding roadmap and delivered a 35% increase in activation. Managed a budget of 2 Cr.",
+    "Product Manager, Zeta Retail (Jun 2016 - Dec 2019): Responsible for checkout and loyalty. "
+    "Launched subscriptions, growing repeat revenue by 18%. Reported to the VP of Product.",
+    "Associate Product Manager, Orbit Labs (Jul 2014 - May 2016): Built analytics dashboards and ran pricing experiments.",
+    "Education: MBA, IIM Bangalore (2014). B.Tech Computer Science, NIT Trichy (2012).",
+    "Skills: Roadmapping, stakeholder management, SQL, experimentation, go-to-market strategy."
+]
+
+def sample_latency(mean: float, jitter: float) -> float:
+    """Log-normal latency around mean seconds; jitter is the sigma (0 = constant)"""
+    if mean <= 0:
+        return 0.0
+    if jitter <= 0:
+        return mean
+    return mean * random.lognormvariate(-jitter ** 2 / 2, jitter)
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+# ============== STUB SERVERS ==============
+
+def synthesize(schema: Dict[str, Any], defs: Dict[str, Any], counter, list_items: int) -> Any:
+    """Build an instance of a (strict) JSON schema with distinct, pre-audit-safe strings"""
+    if "$ref" in schema:
+        return synthesize(defs[schema["$ref"].split("/")[-1]], defs, counter, list_items)
+    if "anyOf" in schema:
+        options = [option for option in schema["anyOf"] if option.get("type") != "null"]
+        return synthesize(options[0] if options else {"type": "null"}, defs, counter, list_items)
+    if "enum" in schema:
+        return schema["enum"][0]
+    kind = schema.get("type")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "null")
+    if kind == "object":
+        return {key: synthesize(value, defs, counter, list_items) for key, value in schema.get("properties", {}).items()}
+    if kind == "array":
+        size = max(schema.get("minItems", 0), list_items)
+        return [synthesize(schema.get("items", {}), defs, counter, list_items) for _ in range(size)]
+    if kind == "integer":
+        return 3
+    if kind == "number":
+        return 0.8
+    if kind == "boolean":
+        return True
+    if kind == "null":
+        return None
+    return f"{STUB_SENTENCE} [{next(counter)}]"
+
+def stub_completion(prompt_name: str, body: Dict[str, Any], args) -> Dict[str, Any]:
+    response_format = body.get("response_format") or {}
+    if response_format.get("type") == "json_schema":
+        schema = response_format["json_schema"]["schema"]
+        return synthesize(schema, schema.get("$defs", {}), count(1), args.list_items)
+    if prompt_name == "input_validation":
+        return {"is_valid": True, "linkedin_provided": False, "linkedin_confidence_penalty": True, "reason": None}
+    if prompt_name == "quality_auditor":
+        if random.random() < args.audit_reject_rate:
+            return {
+                "approved": False,
+                "quality_scores": {"single_signal_dominance_check": "FAIL - title", "advice_contamination_check": "PASS"},
+                "rejection_reasons": ["Injected rejection"],
+                "specific_violations": ["Injected rejection from the load stub"],
+                "rewrite_instructions": "Rewrite the section."
+            }
+        return {
+            "approved": True,
+            "quality_scores": {"signal_class_coverage": "5/5 signal classes addressed", "single_signal_dominance_check": "PASS"},
+            "rejection_reasons": None,
+            "specific_violations": None,
+            "rewrite_instructions": None
+        }
+    # section_repair and unknown prompts: an empty answer makes the backend fall back
+    return {}
+
+def create_stub_app(args) -> FastAPI:
+    app = FastAPI(title="CareerIQ load stubs")
+    stats: Dict[str, int] = defaultdict(int)
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        prompt_name = (body.get("prompt_cache_key") or "unknown").split(":")[0]
+        stats[f"openai.{prompt_name}"] += 1
+        if random.random() < args.llm_429_rate:
+            stats["openai.429"] += 1
+            return JSONResponse(
+                status_code=429,
+                headers={"retry-after-ms": str(int(args.llm_retry_after * 1000))},
+                content={"error": {"message": "Rate limit reached (stub)", "type": "requests", "code": "rate_limit_exceeded"}}
+            )
+        latency = sample_latency(args.llm_latency, args.jitter)
+        if random.random() < args.llm_error_rate:
+            stats["openai.500"] += 1
+            await asyncio.sleep(latency)
+            return JSONResponse(status_code=500, content={"error": {"message": "Injected failure (stub)", "type": "server_error"}})
+
+        content = json.dumps(stub_completion(prompt_name, body, args))
+        prompt_tokens = sum(len(m.get("content") or "") for m in body.get("messages", [])) // 4
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(content) // 4,
+            "total_tokens": prompt_tokens + len(content) // 4,
+            "prompt_tokens_details": {"cached_tokens": 0}
+        }
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        model = body.get("model", "gpt-4o")
+
+        if body.get("stream"):
+            async def events():
+                chunks = 16
+                size = max(1, -(-len(content) // chunks))
+                for start in range(0, len(content), size):
+                    await asyncio.sleep(latency / chunks)
+                    chunk = {
+                        "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                        "choices": [{"index": 0, "delta": {"content": content[start:start + size]}, "finish_reason": None}]
+                    }
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                final = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model, "choices": [], "usage": usage}
+                yield f"data: {json.dumps(final)}\n\n"
+                yield "data: [DONE]\n\n"
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        await asyncio.sleep(latency)
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage
+        }
+
+    @app.post("/razorpay/v1/orders")
+    async def razorpay_orders(request: Request):
+        body = await request.json()
+        stats["razorpay.orders"] += 1
+        await asyncio.sleep(sample_latency(args.razorpay_latency, args.jitter))
+        if random.random() < args.razorpay_error_rate:
+            stats["razorpay.errors"] += 1
+            return JSONResponse(status_code=502, content={"error": {"code": "SERVER_ERROR", "description": "Injected failure (stub)"}})
+        return {
+            "id": f"order_{uuid.uuid4().hex[:14]}",
+            "entity": "order",
+            "amount": body["amount"],
+            "amount_paid": 0,
+            "currency": body.get("currency", "INR"),
+            "status": "created",
+            "notes": body.get("notes", {}),
+            "created_at": int(time.time())
+        }
+
+    @app.post("/sendgrid/v3/mail/send")
+    async def sendgrid_send():
+        stats["sendgrid.sends"] += 1
+        await asyncio.sleep(sample_latency(args.sendgrid_latency, args.jitter))
+        if random.random() < args.sendgrid_error_rate:
+            stats["sendgrid.errors"] += 1
+            return JSONResponse(status_code=500, content={"errors": [{"message": "Injected failure (stub)"}]})
+        return Response(status_code=202)
+
+    @app.get("/stats")
+    async def get_stats():
+        return dict(stats)
+
+    return app
+
+# ============== PROCESSES ==============
+
+def wait_for_port(port: int, timeout: float, proc: subprocess.Popen, name: str):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            sys.exit(f"{name} exited during startup (code {proc.returncode})")
+        with socket.socket() as sock:
+            if sock.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.1)
+    sys.exit(f"{name} did not start listening on port {port} within {timeout:.0f}s")
+
+def start_mongod(workdir: Path, log) -> Tuple[subprocess.Popen, str]:
+    binary = shutil.which("mongod")
+    if not binary:
+        sys.exit("mongod not found on PATH; install MongoDB or pass --mongo-url")
+    port = free_port()
+    dbpath = workdir / "mongo"
+    dbpath.mkdir()
+    proc = subprocess.Popen(
+        [binary, "--dbpath", str(dbpath), "--port", str(port), "--bind_ip", "127.0.0.1", "--quiet"],
+        stdout=log, stderr=subprocess.STDOUT
+    )
+    wait_for_port(port, 30, proc, "mongod")
+    return proc, f"mongodb://127.0.0.1:{port}"
+
+def stub_cli_args(args) -> List[str]:
+    return [
+        "--llm-latency", str(args.llm_latency),
+        "--llm-error-rate", str(args.llm_error_rate),
+        "--llm-429-rate", str(args.llm_429_rate),
+        "--llm-retry-after", str(args.llm_retry_after),
+        "--audit-reject-rate", str(args.audit_reject_rate),
+        "--razorpay-latency", str(args.razorpay_latency),
+        "--razorpay-error-rate", str(args.razorpay_error_rate),
+        "--sendgrid-latency", str(args.sendgrid_latency),
+        "--sendgrid-error-rate", str(args.sendgrid_error_rate),
+        "--jitter", str(args.jitter),
+        "--list-items", str(args.list_items)
+    ]
+
+def backend_env(args, mongo_url: str, stub_url: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "MONGO_URL": mongo_url,
+        "DB_NAME": args.db_name,
+        "OPENAI_API_KEY": "sk-loadharness",
+        "OPENAI_BASE_URL": f"{stub_url}/openai/v1",
+        "RAZORPAY_KEY_ID": STUB_RAZORPAY_KEY_ID,
+        "RAZORPAY_KEY_SECRET": STUB_RAZORPAY_KEY_SECRET,
+        "RAZORPAY_API_BASE": f"{stub_url}/razorpay/v1",
+        "SENDGRID_API_KEY": "SG.loadharness",
+        "SENDGRID_API_HOST": f"{stub_url}/sendgrid",
+        "ADMIN_API_KEY": STUB_ADMIN_KEY,
+        "LLM_STRICT_SCHEMAS": "true",
+        "LLM_CASSETTE_MODE": "off"
+    })
+    for assignment in args.backend_env:
+        key, _, value = assignment.partition("=")
+        env[key] = value
+    return env
+
+# ============== JOURNEYS ==============
+
+class LoadRecorder:
+    """Latency samples per endpoint plus journey and pipeline outcomes"""
+
+    def __init__(self):
+        self.requests: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.journeys: List[float] = []
+        self.pipelines: List[float] = []
+        self.failures: Dict[str, int] = defaultdict(int)
+
+    async def call(self, client: httpx.AsyncClient, label: str, method: str, url: str, **kwargs) -> httpx.Response:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.requests[label].append(time.perf_counter() - started)
+            self.errors[label] += 1
+            raise
+        self.requests[label].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors[label] += 1
+        return response
+
+class JourneyFailed(Exception):
+    pass
+
+def build_resume_docx() -> bytes:
+    document = Document()
+    for paragraph in RESUME_PARAGRAPHS:
+        document.add_paragraph(paragraph)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+def expect(response: httpx.Response, step: str) -> Dict[str, Any]:
+    if response.status_code >= 400:
+        raise JourneyFailed(f"{step}: HTTP {response.status_code}")
+    return response.json()
+
+async def run_journey(client: httpx.AsyncClient, recorder: LoadRecorder, resume: bytes, args):
+    started = time.perf_counter()
+    tier = random.choice(args.tiers)
+
+    upload = expect(await recorder.call(
+        client, "POST /api/upload", "POST", "/api/upload",
+        files={"resume": ("resume.docx", resume, "application/vnd.openxmlformats-officedocument.wordprocessingml.document")},
+        data={"target_role": "Director of Product", "mobile_number": "9999999999", "utm_source": "load_harness"}
+    ), "upload")
+    session_id = upload["session_id"]
+
+    order = expect(await recorder.call(
+        client, "POST /api/create-order", "POST", "/api/create-order",
+        json={"tier": tier, "session_id": session_id}
+    ), "create-order")
+
+    payment_id = f"pay_{uuid.uuid4().hex[:14]}"
+    signature = hmac.new(
+        STUB_RAZORPAY_KEY_SECRET.encode(),
+        f"{order['order_id']}|{payment_id}".encode(),
+        hashlib.sha256
+    ).hexdigest()
+    expect(await recorder.call(
+        client, "POST /api/verify-payment", "POST", "/api/verify-payment",
+        json={"razorpay_order_id": order["order_id"], "razorpay_payment_id": payment_id, "razorpay_signature": signature, "session_id": session_id}
+    ), "verify-payment")
+
+    pipeline_started = time.perf_counter()
+    expect(await recorder.call(
+        client, "POST /api/analyze", "POST", "/api/analyze",
+        json={"session_id": session_id}
+    ), "analyze")
+
+    deadline = time.monotonic() + args.pipeline_timeout
+    while True:
+        await asyncio.sleep(args.poll_interval)
+        progress = expect(await recorder.call(
+            client, "GET /api/report/{id}/progress", "GET", f"/api/report/{session_id}/progress"
+        ), "progress")
+        if progress["status"] == "completed":
+            break
+        if progress["status"] == "failed":
+            raise JourneyFailed(f"pipeline failed: {progress.get('error')}")
+        if time.monotonic() > deadline:
+            raise JourneyFailed("pipeline timed out")
+    recorder.pipelines.append(time.perf_counter() - pipeline_started)
+
+    expect(await recorder.call(client, "GET /api/report/{id}", "GET", f"/api/report/{session_id}"), "report")
+    expect(await recorder.call(
+        client, "POST /api/send-report", "POST", "/api/send-report",
+        json={"session_id": session_id, "email": "loadtest@example.com"}
+    ), "send-report")
+    recorder.journeys.append(time.perf_counter() - started)
+
+# ============== SERVER METRICS ==============
+
+METRIC_LINE = re.compile(r'^([a-zA-Z_:][\w:]*)(?:\{(.*)\})?\s+(\S+)$')
+LABEL_PAIR = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+def parse_metrics(text: str) -> Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float]:
+    """Prometheus text exposition → {(name, sorted labels): value}"""
+    samples = {}
+    for line in text.splitlines():
+        match = METRIC_LINE.match(line)
+        if not match or line.startswith("#"):
+            continue
+        name, labels, value = match.groups()
+        samples[(name, tuple(sorted(LABEL_PAIR.findall(labels or ""))))] = float(value)
+    return samples
+
+async def scrape_metrics(client: httpx.AsyncClient) -> Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float]:
+    try:
+        response = await client.get("/metrics")
+        if response.status_code == 200:
+            return parse_metrics(response.text)
+    except httpx.HTTPError:
+        pass
+    return {}
+
+def histogram_quantile(buckets: List[Tuple[float, float]], q: float) -> Optional[float]:
+    """Quantile from cumulative (upper bound, count) buckets, interpolated like PromQL"""
+    total = buckets[-1][1] if buckets else 0
+    if not total:
+        return None
+    rank = q * total
+    lower, below = 0.0, 0.0
+    for upper, cumulative in buckets:
+        if cumulative >= rank:
+            if upper == float("inf"):
+                return lower
+            return lower + (upper - lower) * (rank - below) / ((cumulative - below) or 1)
+        lower, below = upper, cumulative
+    return lower
+
+def event_loop_report(before: Dict, after: Dict) -> Dict[str, Any]:
+    """Event-loop lag and stalls the backend recorded during the run (careeriq_event_loop_* deltas)"""
+    def delta(key):
+        return after.get(key, 0.0) - before.get(key, 0.0)
+
+    buckets = sorted(
+        (float(dict(labels)["le"]), delta((name, labels)))
+        for name, labels in after
+        if name == "careeriq_event_loop_lag_seconds_bucket"
+    )
+    max_bucket = next((upper for upper, cumulative in buckets if buckets and cumulative >= buckets[-1][1]), None)
+    stalls = defaultdict(lambda: {"stalls": 0, "blocked_seconds": 0.0})
+    for name, labels in after:
+        if name in ("careeriq_event_loop_stalls_total", "careeriq_event_loop_blocked_seconds_total"):
+            field = "stalls" if name == "careeriq_event_loop_stalls_total" else "blocked_seconds"
+            stalls[dict(labels)["site"]][field] += delta((name, labels))
+    blocking_sites = {
+        site: {"stalls": int(row["stalls"]), "blocked_seconds": round(row["blocked_seconds"], 3)}
+        for site, row in sorted(stalls.items(), key=lambda item: -item[1]["blocked_seconds"])
+        if row["stalls"]
+    }
+    return {
+        "lag_ms": {
+            "source": "careeriq_event_loop_lag_seconds from /metrics",
+            "samples": int(delta(("careeriq_event_loop_lag_seconds_count", ()))),
+            "p50": ms(histogram_quantile(buckets, 0.5)),
+            "p99": ms(histogram_quantile(buckets, 0.99)),
+            "max_bucket": ms(max_bucket) if max_bucket != float("inf") else "+Inf"
+        },
+        "blocking_sites": blocking_sites
+    }
+
+async def drive_load(base_url: str, args) -> Dict[str, Any]:
+    recorder = LoadRecorder()
+    resume = build_resume_docx()
+    journeys = count()
+    limits = httpx.Limits(max_connections=args.users * 2 + 4)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.request_timeout, limits=limits) as client:
+        async def worker():
+            while True:
+                if next(journeys) >= args.journeys or (args.duration and time.monotonic() - started > args.duration):
+                    return
+                try:
+                    await run_journey(client, recorder, resume, args)
+                except (JourneyFailed, httpx.HTTPError, KeyError) as e:
+                    recorder.failures[str(e).split(":")[0] or type(e).__name__] += 1
+
+        async def ramp(index: int):
+            await asyncio.sleep(args.ramp * index / max(1, args.users))
+            await worker()
+
+        metrics_before = await scrape_metrics(client)
+        started = time.monotonic()
+        await asyncio.gather(*(ramp(index) for index in range(args.users)))
+        elapsed = time.monotonic() - started
+        metrics_after = await scrape_metrics(client)
+
+        admin_headers = {"X-Admin-Key": STUB_ADMIN_KEY}
+        server_stats = {}
+        for name, path in (("pipeline_counters", "/api/admin/pipeline-counters"), ("llm_limiter", "/api/admin/llm-limiter")):
+            try:
+                response = await client.get(path, headers=admin_headers)
+                if response.status_code == 200:
+                    server_stats[name] = response.json()
+            except httpx.HTTPError:
+                pass
+
+    return summarize(recorder, elapsed, server_stats, event_loop_report(metrics_before, metrics_after))
+
+# ============== REPORT ==============
+
+def ms(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value * 1000, 1)
+
+def summarize(recorder: LoadRecorder, elapsed: float, server_stats: Dict[str, Any], event_loop: Dict[str, Any]) -> Dict[str, Any]:
+    total_requests = sum(len(samples) for samples in recorder.requests.values())
+    return {
+        "elapsed_seconds": round(elapsed, 1),
+        "requests": total_requests,
+        "requests_per_second": round(total_requests / elapsed, 2) if elapsed else 0,
+        "journeys_completed": len(recorder.journeys),
+        "journeys_failed": dict(recorder.failures),
+        "pipeline_completions_per_minute": round(len(recorder.pipelines) / elapsed * 60, 2) if elapsed else 0,
+        "journey_ms": {"p50": ms(percentile(recorder.journeys, 0.5)), "p99": ms(percentile(recorder.journeys, 0.99))},
+        "pipeline_ms": {"p50": ms(percentile(recorder.pipelines, 0.5)), "p99": ms(percentile(recorder.pipelines, 0.99))},
+        "event_loop_lag_ms": event_loop["lag_ms"],
+        "event_loop_blocking_sites": event_loop["blocking_sites"],
+        "endpoints": {
+            label: {
+                "count": len(samples),
+                "errors": recorder.errors.get(label, 0),
+                "p50_ms": ms(percentile(samples, 0.5)),
+                "p95_ms": ms(percentile(samples, 0.95)),
+                "p99_ms": ms(percentile(samples, 0.99)),
+                "max_ms": ms(max(samples))
+            }
+            for label, samples in sorted(recorder.requests.items())
+        },
+        "server": server_stats
+    }
+
+def print_report(summary: Dict[str, Any]):
+    print("=" * 78)
+    print(f"Elapsed: {summary['elapsed_seconds']}s   Requests: {summary['requests']}   "
+          f"Throughput: {summary['requests_per_second']} req/s")
+    print(f"Journeys completed: {summary['journeys_completed']}   Failed: {summary['journeys_failed'] or 0}")
+    print(f"Pipeline completions/min: {summary['pipeline_completions_per_minute']}   "
+          f"Pipeline p50/p99: {summary['pipeline_ms']['p50']} / {summary['pipeline_ms']['p99']} ms")
+    lag = summary["event_loop_lag_ms"]
+    print(f"Event-loop lag ({lag['source']}, {lag['samples']} samples): "
+          f"p50 {lag['p50']} ms, p99 {lag['p99']} ms, max <= {lag['max_bucket']} ms")
+    for site, row in list(summary["event_loop_blocking_sites"].items())[:5]:
+        print(f"  blocked {row['blocked_seconds']}s over {row['stalls']} stalls: {site}")
+    print("-" * 78)
+    print(f"{'Endpoint':<34}{'count':>7}{'err':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for label, row in summary["endpoints"].items():
+        print(f"{label:<34}{row['count']:>7}{row['errors']:>6}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}")
+    print("=" * 78)
+
+# ============== COMMANDS ==============
+
+def run_stubs(args):
+    uvicorn.run(create_stub_app(args), host="127.0.0.1", port=args.port, log_level="warning")
+
+def run_load(args):
+    workdir = Path(tempfile.mkdtemp(prefix="careeriq-load-"))
+    log = open(workdir / "processes.log", "w")
+    processes: List[subprocess.Popen] = []
+    try:
+        if args.mongo_url:
+            mongo_url = args.mongo_url
+        else:
+            mongod, mongo_url = start_mongod(workdir, log)
+            processes.append(mongod)
+
+        stub_port = free_port()
+        stubs = subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), "stubs", "--port", str(stub_port), *stub_cli_args(args)],
+            stdout=log, stderr=subprocess.STDOUT
+        )
+        processes.append(stubs)
+        wait_for_port(stub_port, 30, stubs, "stub server")
+        stub_url = f"http://127.0.0.1:{stub_port}"
+
+        backend_port = free_port()
+        backend = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1",
+             "--port", str(backend_port), "--workers", str(args.workers), "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=backend_env(args, mongo_url, stub_url), stdout=log, stderr=subprocess.STDOUT
+        )
+        processes.append(backend)
+        wait_for_port(backend_port, 60, backend, "backend")
+
+        print(f"Driving {args.users} concurrent users ({args.journeys} journeys max) - process logs: {workdir / 'processes.log'}")
+        summary = asyncio.run(drive_load(f"http://127.0.0.1:{backend_port}", args))
+        try:
+            summary["stubs"] = httpx.get(f"{stub_url}/stats", timeout=5).json()
+        except httpx.HTTPError:
+            pass
+        print_report(summary)
+        if args.json_out:
+            Path(args.json_out).write_text(json.dumps(summary, indent=2))
+            print(f"Results written to {args.json_out}")
+    finally:
+        for proc in reversed(processes):
+            if proc.poll() is None:
+                proc.send_signal(signal.SIGTERM)
+                try:
+                    proc.wait(timeout=15)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+        log.close()
+        if not args.keep_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+def add_stub_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--llm-latency", type=float, default=2.0, help="mean seconds per OpenAI completion")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="fraction of completions answered with a 500")
+    parser.add_argument("--llm-429-rate", type=float, default=0.0, help="fraction of completions answered with a 429")
+    parser.add_argument("--llm-retry-after", type=float, default=1.0, help="retry-after seconds sent with 429s")
+    parser.add_argument("--audit-reject-rate", type=float, default=0.0, help="fraction of quality audits that reject")
+    parser.add_argument("--razorpay-latency", type=float, default=0.3)
+    parser.add_argument("--razorpay-error-rate", type=float, default=0.0)
+    parser.add_argument("--sendgrid-latency", type=float, default=0.4)
+    parser.add_argument("--sendgrid-error-rate", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.3, help="log-normal sigma applied to every stub latency")
+    parser.add_argument("--list-items", type=int, default=4, help="items per array in synthesized LLM outputs")
+
+def main():
+    parser = argparse.ArgumentParser(description="CareerIQ local load harness")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    stubs = commands.add_parser("stubs", help="serve the OpenAI/Razorpay/SendGrid stand-ins only")
+    stubs.add_argument("--port", type=int, default=9100)
+    add_stub_arguments(stubs)
+
+    run = commands.add_parser("run", help="start mongod, the stubs and the backend, then drive journeys")
+    add_stub_arguments(run)
+    run.add_argument("--users", type=int, default=10, help="concurrent simulated users")
+    run.add_argument("--journeys", type=int, default=50, help="total journeys to run")
+    run.add_argument("--duration", type=float, default=0, help="stop starting journeys after N seconds (0 = no limit)")
+    run.add_argument("--ramp", type=float, default=5.0, help="seconds over which users start")
+    run.add_argument("--tiers", type=int, nargs="+", default=[499, 2999, 4498])
+    run.add_argument("--poll-interval", type=float, default=2.0, help="progress polling interval, like the frontend")
+    run.add_argument("--pipeline-timeout", type=float, default=600)
+    run.add_argument("--request-timeout", type=float, default=120)
+    run.add_argument("--workers", type=int, default=1, help="uvicorn workers for the backend (event-loop metrics come from one of them)")
+    run.add_argument("--mongo-url", help="use this MongoDB instead of starting a throwaway mongod")
+    run.add_argument("--db-name", default="careeriq_load")
+    run.add_argument("--backend-env", action="append", default=[], metavar="KEY=VALUE",
+                     help="extra backend settings, e.g. --backend-env SPECULATIVE_SECTIONS=true")
+    run.add_argument("--json-out", help="write the summary as JSON to this path")
+    run.add_argument("--keep-workdir", action="store_true", help="keep the mongod data and process logs")
+
+    args = parser.parse_args()
+    if args.command == "stubs":
+        run_stubs(args)
+    else:
+        run_load(args)
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,37 @@
-from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Form, BackgroundTasks
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Form, BackgroundTasks, Request, Header, Depends
+from fastapi.responses import FileResponse, PlainTextResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, WriteConcern, monitoring
+from pymongo.errors import DuplicateKeyError
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, EmailStr, ValidationError
+from typing import List, Optional, Dict, Any, Tuple, Callable, Awaitable
 import uuid
 from datetime import datetime, timezone, timedelta
 import json
+import copy
 import hashlib
+import re
+from collections import defaultdict, deque, OrderedDict
+import hmac
+import time
+import bisect
+import threading
+import queue
+import sys
+import traceback
+import signal
+import tracemalloc
+import functools
+import importlib
+import inspect
+from contextlib import contextmanager
 import razorpay
-from openai import OpenAI
+from openai import AsyncOpenAI, RateLimitError, APITimeoutError, APIConnectionError, InternalServerError
 from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail, Attachment, FileContent, FileName, FileType, Disposition
 import base64
@@ -27,25 +45,510 @@ import PyPDF2
 from docx import Document
 import aiofiles
 import tempfile
+import asyncio
+import httpx
+from contextvars import ContextVar
+from types import SimpleNamespace
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# ============== METRICS ==============
+# Prometheus text exposition served at /metrics (per worker process). Hot paths
+# only bump in-memory values; gauges that mirror existing state are read at
+# scrape time. Updates take a lock because Mongo events arrive on driver threads.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LLM_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 45.0, 60.0, 90.0, 120.0, 300.0)
+STAGE_BUCKETS = (1.0, 5.0, 10.0, 20.0, 30.0, 60.0, 90.0, 120.0, 180.0, 300.0, 600.0)
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _label_text(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class Metric:
+    """Counters and gauges either hold values or compute them at scrape time
+    with `read` ({label values: value}) from state the app already keeps"""
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (), read: Optional[Callable[[], Dict[Tuple, float]]] = None):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.read = read
+        self.values: Dict[Tuple[str, ...], Any] = {}
+        self.lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def samples(self) -> List[str]:
+        if self.read is not None:
+            items = [(tuple(str(value) for value in key), value) for key, value in self.read().items()]
+        else:
+            with self.lock:
+                items = list(self.values.items())
+        return [f"{self.name}{_label_text(self.labels, key)} {_number(value)}" for key, value in items]
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}", *self.samples()]
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.values.get(key)
+            if series is None:
+                # Per-bucket counts (last slot is +Inf), then sum
+                series = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def samples(self) -> List[str]:
+        with self.lock:
+            items = [(key, list(series)) for key, series in self.values.items()]
+        lines = []
+        for key, series in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), series):
+                cumulative += bucket_count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(self.labels, key)} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{_label_text(self.labels, key)} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                logger.error(f"Metric {metric.name} failed to render: {e}")
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+
+http_request_seconds = metrics.register(Histogram(
+    "careeriq_http_request_seconds", "HTTP request latency by route template", ("method", "route", "status")))
+pipeline_stage_seconds = metrics.register(Histogram(
+    "careeriq_pipeline_stage_seconds", "Wall time of each pipeline step, including audits and retries",
+    ("pipeline", "stage"), STAGE_BUCKETS))
+pipelines_in_flight = metrics.register(Gauge(
+    "careeriq_pipelines_in_flight", "Pipelines running in this worker", ("pipeline",)))
+llm_request_seconds = metrics.register(Histogram(
+    "careeriq_llm_request_seconds", "LLM call latency per prompt, including limiter queueing", ("prompt",), LLM_BUCKETS))
+llm_tokens_total = metrics.register(Counter(
+    "careeriq_llm_tokens_total", "LLM tokens per prompt", ("prompt", "type")))
+llm_errors_total = metrics.register(Counter(
+    "careeriq_llm_errors_total", "Failed OpenAI requests per prompt and error type", ("prompt", "error")))
+llm_throttled_total = metrics.register(Counter(
+    "careeriq_llm_throttled_total", "OpenAI 429 responses per prompt", ("prompt",)))
+section_audits_total = metrics.register(Counter(
+    "careeriq_section_audits_total", "Section audit outcomes by the check that decided them", ("section", "outcome", "source")))
+section_retries_total = metrics.register(Counter(
+    "careeriq_section_retries_total", "Section retries after a rejected audit", ("section", "mode")))
+mongo_command_seconds = metrics.register(Histogram(
+    "careeriq_mongo_command_seconds", "MongoDB command latency", ("command", "collection")))
+mongo_command_failures_total = metrics.register(Counter(
+    "careeriq_mongo_command_failures_total", "Failed MongoDB commands", ("command", "collection")))
+
+def observe_stage(pipeline: str, stage: str, started: float) -> float:
+    """Record a pipeline step's wall time; returns the start time of the next step"""
+    now = time.monotonic()
+    pipeline_stage_seconds.observe(now - started, pipeline=pipeline, stage=stage)
+    return now
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Times driver commands from pymongo's command events (called on driver threads)"""
+
+    def __init__(self):
+        self.collections: Dict[Tuple[Any, int], str] = {}
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        self.collections[(event.connection_id, event.request_id)] = collection if isinstance(collection, str) else ""
+
+    def _finish(self, event) -> Tuple[str, str]:
+        return event.command_name, self.collections.pop((event.connection_id, event.request_id), "")
+
+    def succeeded(self, event):
+        command, collection = self._finish(event)
+        mongo_command_seconds.observe(event.duration_micros / 1e6, command=command, collection=collection)
+
+    def failed(self, event):
+        command, collection = self._finish(event)
+        mongo_command_seconds.observe(event.duration_micros / 1e6, command=command, collection=collection)
+        mongo_command_failures_total.inc(command=command, collection=collection)
+
+class RequestMetricsMiddleware:
+    """ASGI middleware timing each HTTP request under its route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        started = time.monotonic()
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            http_request_seconds.observe(
+                time.monotonic() - started,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status[0]
+            )
+
+# ============== TRACING ==============
+# Spans for the upload → pipeline → report journey. All spans of a session share
+# a trace id derived from its session id, so the upload request, the background
+# pipeline and /send-report land in one trace. Export runs on a daemon thread.
+# TRACE_EXPORTER is off, console, file (JSON lines at TRACE_FILE) or
+# "module:Class" for any exporter with export(spans) and shutdown().
+TRACE_EXPORTER = os.environ.get('TRACE_EXPORTER', 'off')
+TRACE_FILE = Path(os.environ.get('TRACE_FILE', str(ROOT_DIR / 'traces.jsonl')))
+TRACE_QUEUE_SIZE = int(os.environ.get('TRACE_QUEUE_SIZE', '10000'))
+TRACE_BATCH_SIZE = int(os.environ.get('TRACE_BATCH_SIZE', '512'))
+TRACE_FLUSH_SECONDS = float(os.environ.get('TRACE_FLUSH_SECONDS', '2.0'))
+TRACING_ENABLED = TRACE_EXPORTER.lower() != 'off'
+
+def session_trace_id(session_id: str) -> str:
+    return hashlib.sha256(f"trace:{session_id}".encode()).hexdigest()[:32]
+
+class Span:
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes: Dict[str, Any] = {}
+        self.set(**attributes)
+        self.start_time = time.time()
+        self.started = time.monotonic()
+        self.duration: Optional[float] = None
+        self.status = "ok"
+        self.error: Optional[str] = None
+
+    def set(self, **attributes):
+        self.attributes.update({key: value for key, value in attributes.items() if value is not None})
+
+    def end(self):
+        if self.duration is None:
+            self.duration = time.monotonic() - self.started
+            span_processor.submit(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "start_time": datetime.fromtimestamp(self.start_time, timezone.utc).isoformat(),
+            "duration_ms": round(self.duration * 1000, 2),
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes
+        }
+
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+def begin_span(name: str, session_id: Optional[str] = None, **attributes) -> Span:
+    """A span under the current one; a session id pins it to that session's trace"""
+    parent = current_span.get()
+    if session_id:
+        trace_id = session_trace_id(session_id)
+        attributes["session_id"] = session_id
+    else:
+        trace_id = parent.trace_id if parent else uuid.uuid4().hex
+    parent_id = parent.span_id if parent and parent.trace_id == trace_id else None
+    return Span(name, trace_id, parent_id, attributes)
+
+@contextmanager
+def start_span(name: str, session_id: Optional[str] = None, **attributes):
+    if not TRACING_ENABLED:
+        yield None
+        return
+    span = begin_span(name, session_id, **attributes)
+    token = current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.status = "cancelled" if isinstance(e, asyncio.CancelledError) else "error"
+        span.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current_span.reset(token)
+        span.end()
+
+def set_span_attributes(**attributes):
+    span = current_span.get()
+    if span is not None:
+        span.set(**attributes)
+
+def bind_trace_session(session_id: str):
+    """Move the current span (and the spans it will start) into a new session's trace"""
+    span = current_span.get()
+    if span is not None:
+        span.trace_id = session_trace_id(session_id)
+        span.parent_id = None
+        span.set(session_id=session_id)
+
+def _argument_path(arguments: Dict[str, Any], path: str) -> Any:
+    head, *rest = path.split(".")
+    value = arguments.get(head)
+    for part in rest:
+        value = value.get(part) if isinstance(value, dict) else getattr(value, part, None)
+    return value
+
+def traced(name: str, attributes: Tuple[str, ...] = (), session: Optional[str] = None):
+    """Run the function in a span carrying the named arguments as attributes.
+
+    session is an argument path ("session_id", "request.session_id") whose value
+    puts the span in that session's trace.
+    """
+    def decorate(fn):
+        signature = inspect.signature(fn)
+
+        def span_for(args, kwargs):
+            arguments = signature.bind_partial(*args, **kwargs).arguments
+            return start_span(
+                name,
+                session_id=_argument_path(arguments, session) if session else None,
+                **{key: arguments.get(key) for key in attributes}
+            )
+
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if not TRACING_ENABLED:
+                    return await fn(*args, **kwargs)
+                with span_for(args, kwargs):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not TRACING_ENABLED:
+                return fn(*args, **kwargs)
+            with span_for(args, kwargs):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+class ConsoleSpanExporter:
+    def __init__(self):
+        self.logger = logging.getLogger("careeriq.trace")
+
+    def export(self, spans: List[Dict[str, Any]]):
+        for span in spans:
+            self.logger.info(
+                f"trace={span['trace_id']} span={span['span_id']} parent={span['parent_span_id']} "
+                f"{span['name']} {span['duration_ms']}ms {span['status']} {json.dumps(span['attributes'], default=str)}"
+            )
+
+    def shutdown(self):
+        pass
+
+class FileSpanExporter:
+    """One JSON span per line; grep a session's trace id to rebuild its timeline"""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def export(self, spans: List[Dict[str, Any]]):
+        with open(self.path, "a") as f:
+            f.write("".join(json.dumps(span, default=str) + "\n" for span in spans))
+
+    def shutdown(self):
+        pass
+
+def load_span_exporter(name: str):
+    if name == "console":
+        return ConsoleSpanExporter()
+    if name == "file":
+        return FileSpanExporter(TRACE_FILE)
+    module_name, _, class_name = name.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+class SpanProcessor:
+    """Bounded queue of finished spans exported in batches from a daemon thread;
+    a full queue drops spans (counted) instead of blocking the caller"""
+
+    def __init__(self, exporter, queue_size: int = TRACE_QUEUE_SIZE, batch_size: int = TRACE_BATCH_SIZE, flush_seconds: float = TRACE_FLUSH_SECONDS):
+        self.exporter = exporter
+        self.spans: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.thread: Optional[threading.Thread] = None
+        self.lock = threading.Lock()
+        self.dropped = 0
+
+    def submit(self, span: Span):
+        if self.thread is None:
+            self.start()
+        try:
+            self.spans.put_nowait(span.to_dict())
+        except queue.Full:
+            self.dropped += 1
+
+    def start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = []
+            item = self.spans.get()
+            deadline = time.monotonic() + self.flush_seconds
+            while True:
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+                remaining = deadline - time.monotonic()
+                if len(batch) >= self.batch_size or remaining <= 0:
+                    break
+                try:
+                    item = self.spans.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self.exporter.export(batch)
+                except Exception as e:
+                    logger.error(f"Span export failed ({len(batch)} spans): {e}")
+
+    def shutdown(self, timeout: float = 5.0):
+        """Export what is queued, then stop the exporter thread"""
+        if self.thread is not None:
+            self.spans.put(None)
+            self.thread.join(timeout)
+            self.thread = None
+        if self.exporter is not None:
+            self.exporter.shutdown()
+
+span_processor = SpanProcessor(load_span_exporter(TRACE_EXPORTER) if TRACING_ENABLED else None)
+
+# Only writes get spans; reads are covered by careeriq_mongo_command_seconds
+MONGO_TRACED_COMMANDS = {"insert", "update", "delete", "findAndModify"}
+
+class MongoCommandSpans(monitoring.CommandListener):
+    """Spans for Mongo writes issued inside a traced context (motor copies the
+    caller's context to its executor threads, so the current span is visible)"""
+
+    def __init__(self):
+        self.spans: Dict[Tuple[Any, int], Span] = {}
+
+    def started(self, event):
+        if event.command_name not in MONGO_TRACED_COMMANDS or current_span.get() is None:
+            return
+        collection = event.command.get(event.command_name)
+        self.spans[(event.connection_id, event.request_id)] = begin_span(
+            f"mongo.{event.command_name}",
+            db_collection=collection if isinstance(collection, str) else None
+        )
+
+    def succeeded(self, event):
+        span = self.spans.pop((event.connection_id, event.request_id), None)
+        if span is not None:
+            span.end()
+
+    def failed(self, event):
+        span = self.spans.pop((event.connection_id, event.request_id), None)
+        if span is not None:
+            span.status, span.error = "error", str(event.failure)
+            span.end()
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(
+    mongo_url,
+    event_listeners=[MongoCommandMetrics()] + ([MongoCommandSpans()] if TRACING_ENABLED else [])
+)
 db = client[os.environ['DB_NAME']]
 
-# Initialize OpenAI
-openai_client = OpenAI(api_key=os.environ.get('OPENAI_API_KEY'))
+# Initialize OpenAI (SDK retries disabled - 429s are handled by the rate limiter)
+openai_client = AsyncOpenAI(api_key=os.environ.get('OPENAI_API_KEY'), max_retries=0)
+
+# OpenAI rate limits (set to the account's tier limits for gpt-4o)
+OPENAI_RPM_LIMIT = int(os.environ.get('OPENAI_RPM_LIMIT', '500'))
+OPENAI_TPM_LIMIT = int(os.environ.get('OPENAI_TPM_LIMIT', '450000'))
+OPENAI_MAX_CONCURRENCY = int(os.environ.get('OPENAI_MAX_CONCURRENCY', '16'))
+OPENAI_MAX_THROTTLE_RETRIES = int(os.environ.get('OPENAI_MAX_THROTTLE_RETRIES', '6'))
+OPENAI_ESTIMATED_OUTPUT_TOKENS = int(os.environ.get('OPENAI_ESTIMATED_OUTPUT_TOKENS', '2000'))
+# Coordinate per-minute budgets across workers through MongoDB
+OPENAI_SHARED_RATE_LIMIT = os.environ.get('OPENAI_SHARED_RATE_LIMIT', 'false').lower() == 'true'
+
+# Admin endpoints are disabled unless a key is configured
+ADMIN_API_KEY = os.environ.get('ADMIN_API_KEY')
 
 # Initialize Razorpay
-razorpay_client = razorpay.Client(
-    auth=(os.environ.get('RAZORPAY_KEY_ID'), os.environ.get('RAZORPAY_KEY_SECRET'))
-)
+RAZORPAY_KEY_ID = os.environ.get('RAZORPAY_KEY_ID')
+RAZORPAY_KEY_SECRET = os.environ.get('RAZORPAY_KEY_SECRET')
+RAZORPAY_API_BASE = os.environ.get('RAZORPAY_API_BASE', 'https://api.razorpay.com/v1')
+RAZORPAY_TIMEOUT_SECONDS = float(os.environ.get('RAZORPAY_TIMEOUT_SECONDS', '10'))
+RAZORPAY_MAX_CONNECTIONS = int(os.environ.get('RAZORPAY_MAX_CONNECTIONS', '20'))
+RAZORPAY_WEBHOOK_SECRET = os.environ.get('RAZORPAY_WEBHOOK_SECRET')
+razorpay_client = razorpay.Client(auth=(RAZORPAY_KEY_ID, RAZORPAY_KEY_SECRET))
 
 # SendGrid config
 SENDGRID_API_KEY = os.environ.get('SENDGRID_API_KEY')
+SENDGRID_API_HOST = os.environ.get('SENDGRID_API_HOST', 'https://api.sendgrid.com')
 SENDER_EMAIL = os.environ.get('SENDER_EMAIL', 'support.career-iq@aykaa.me')
 SENDER_NAME = os.environ.get('SENDER_NAME', 'CareerIQ')
 
@@ -121,7 +624,8 @@ PROMPT_VERSIONS = {
     "risk": "v3.1",
     "execution_guardrails": "v3.1",
     "decision_intelligence": "v3.1",
-    "quality_auditor": "v3.1"
+    "quality_auditor": "v3.1",
+    "section_repair": "v1.0"
 }
 
 SCHEMA_VERSIONS = {
@@ -133,6 +637,339 @@ SCHEMA_VERSIONS = {
     "decision_output": "v3.1"
 }
 
+# ============== OUTPUT SCHEMAS ==============
+# Pydantic mirrors of each stage's OUTPUT JSON, registered under their
+# SCHEMA_VERSIONS key. Bump the version there when a model changes shape.
+
+class IdentityBlockExtraction(BaseModel):
+    name: str
+    current_role: str
+    target_role: str
+    linkedin_provided: bool
+    confidence_modifier: str
+
+class TitleIdentitySignals(BaseModel):
+    titles_chronological: List[str]
+    progression_pattern: str
+    functional_domains: List[str]
+    domain_consistency: str
+    title_responsibility_alignment: str
+    raw_title_signals: List[str]
+
+class OwnershipExecutionSignals(BaseModel):
+    ownership_indicators: List[str]
+    execution_indicators: List[str]
+    ownership_strength: str
+    execution_strength: str
+    dominant_signal: str
+    pnl_budget_evidence: bool
+    team_accountability_evidence: bool
+    cross_functional_scope: str
+
+class SeniorityAuthoritySignals(BaseModel):
+    highest_reporting_level: str
+    direct_reports_evidence: bool
+    scope_of_impact: str
+    decision_authority_level: str
+    leadership_vs_ic_signal: str
+    seniority_trajectory: str
+
+class ProfessionalIdentitySignals(BaseModel):
+    primary_identity: str
+    secondary_identities: List[str]
+    identity_clarity: str
+    linkedin_headline_type: str
+    linkedin_positioning: str
+    resume_linkedin_alignment: str
+
+class TargetRoleFitSignals(BaseModel):
+    target_role: str
+    direct_match_signals: List[str]
+    adjacent_match_signals: List[str]
+    gap_signals: List[str]
+    seniority_fit: str
+    perception_risks: List[str]
+
+class MultiSignalConflict(BaseModel):
+    conflict: str
+    classes_involved: List[str]
+    market_interpretation: str
+
+class RecruiterTenSecondScan(BaseModel):
+    first_3_seconds: str
+    next_5_seconds: str
+    final_7_seconds: str
+    instant_perception: str
+    hesitation_triggers: List[str]
+    ignored_elements: List[str]
+
+class HeuristicTriggered(BaseModel):
+    heuristic: str
+    evidence: str
+    market_consequence: str
+
+class ExtractionOutput(BaseModel):
+    identity_block: IdentityBlockExtraction
+    signal_class_1_title_identity: TitleIdentitySignals
+    signal_class_2_ownership_execution: OwnershipExecutionSignals
+    signal_class_3_seniority_authority: SeniorityAuthoritySignals
+    signal_class_4_professional_identity: ProfessionalIdentitySignals
+    signal_class_5_target_role_fit: TargetRoleFitSignals
+    multi_signal_conflicts: List[MultiSignalConflict]
+    recruiter_ten_second_scan: RecruiterTenSecondScan
+    heuristics_triggered: List[HeuristicTriggered]
+
+class IdentityBlockDiagnosis(BaseModel):
+    name: str
+    current_role: str
+    target_role: str
+    linkedin_provided: bool
+    confidence_level: str
+
+class RecruiterScanSummary(BaseModel):
+    ten_second_verdict: str
+    instant_categorization: str
+    primary_hesitation: str
+
+class InterpretationAnchors(BaseModel):
+    primary_anchor: str
+    scanning_behavior: str
+    signal_conflict_summary: str
+
+class HeuristicApplied(BaseModel):
+    heuristic: str
+    how_it_affects_this_profile: str
+
+class MarketReading(BaseModel):
+    title_role_interpretation: str
+    ownership_execution_interpretation: str
+    seniority_authority_interpretation: str
+    identity_interpretation: str
+    signal_interaction: str
+
+class AuthorityBreakpoint(BaseModel):
+    breakpoint: str
+    signal_class: str
+    market_consequence: str
+
+class MismatchCauses(BaseModel):
+    structural_cause_1: str
+    structural_cause_2: str
+    structural_cause_3: str
+    how_they_compound: str
+
+class CareerRisk(BaseModel):
+    risk_type: str
+    risk_description: str
+    probability_trigger: str
+
+class DiagnosisOutput(BaseModel):
+    identity_block: IdentityBlockDiagnosis
+    recruiter_scan_summary: RecruiterScanSummary
+    context_intro: str
+    career_verdict: str
+    interpretation_anchors: InterpretationAnchors
+    heuristics_applied: List[HeuristicApplied]
+    market_reading: MarketReading
+    authority_breakpoints: List[AuthorityBreakpoint]
+    mismatch_causes: MismatchCauses
+    career_risks: List[CareerRisk]
+    diagnostic_summary: str
+
+class IndependentRisk(BaseModel):
+    risk_id: int
+    risk_category: str
+    signal_class_source: str
+    risk_name: str
+    evidence_from_profile: str
+    market_perception: str
+    consequence: str
+    compounding_factor: str
+
+class SignalConflict(BaseModel):
+    conflict_id: int
+    signal_a: str
+    signal_b: str
+    classes_involved: List[str]
+    market_interpretation: str
+    resolution_required: str
+
+class RiskOutput(BaseModel):
+    independent_risks: List[IndependentRisk]
+    signal_conflicts: List[SignalConflict]
+    risk_compounding_analysis: str
+    most_damaging_risk_combination: str
+
+class Guardrail(BaseModel):
+    protect: str
+    violation_trigger: str
+    consequence_of_violation: str
+
+class Trap(BaseModel):
+    trap_type: str
+    trap_description: str
+    why_this_profile_is_vulnerable: str
+    recognition_signal: str
+
+class AbortCondition(BaseModel):
+    condition: str
+    signal_to_watch: str
+    why_abort: str
+
+class ExecutionOutput(BaseModel):
+    identity_guardrails: List[Guardrail]
+    seniority_guardrails: List[Guardrail]
+    ownership_guardrails: List[Guardrail]
+    traps_to_avoid: List[Trap]
+    abort_conditions: List[AbortCondition]
+    guardrails_summary: str
+
+class IdentityBlockDecision(BaseModel):
+    name: str
+    current_role: str
+    target_role: str
+
+class CommitmentOption(BaseModel):
+    choice: str
+    trade_off: str
+    short_term_consequence: str
+    long_term_consequence: str
+
+class MarketDefault(BaseModel):
+    description: str
+    why_its_worse: str
+    market_perception: str
+
+class Commitment(BaseModel):
+    commitment_id: int
+    commitment_type: str
+    commitment_title: str
+    signal_conflict_source: str
+    option_a: CommitmentOption
+    option_b: CommitmentOption
+    market_default: MarketDefault
+    commitment_is_irreversible_because: str
+
+class CommitmentInteractions(BaseModel):
+    if_all_option_a: str
+    if_all_option_b: str
+    optimal_combination: str
+    worst_combination: str
+
+class StateShiftSummary(BaseModel):
+    current_state: str
+    state_if_option_a_path: str
+    state_if_option_b_path: str
+    state_if_no_commitment: str
+
+class DecisionOutput(BaseModel):
+    identity_block: IdentityBlockDecision
+    context_intro: str
+    commitments: List[Commitment]
+    commitment_interactions: CommitmentInteractions
+    state_shift_summary: StateShiftSummary
+    final_intelligence_summary: str
+
+SCHEMA_MODELS = {
+    "extraction_json": ExtractionOutput,
+    "diagnosis_output": DiagnosisOutput,
+    "risk_output": RiskOutput,
+    "execution_output": ExecutionOutput,
+    "decision_output": DecisionOutput
+}
+
+# Which schema each prompt's output must satisfy
+PROMPT_OUTPUT_SCHEMAS = {
+    "signal_extraction": "extraction_json",
+    "diagnosis": "diagnosis_output",
+    "risk": "risk_output",
+    "execution_guardrails": "execution_output",
+    "decision_intelligence": "decision_output"
+}
+
+# Send schemas as strict response formats (set false to fall back to json_object)
+LLM_STRICT_SCHEMAS = os.environ.get('LLM_STRICT_SCHEMAS', 'true').lower() == 'true'
+
+def _strict_json_schema(node: Any) -> Any:
+    """Adapt a Pydantic JSON schema to OpenAI strict mode: closed objects, every key required, no defaults"""
+    if isinstance(node, dict):
+        node = {key: _strict_json_schema(value) for key, value in node.items() if key != "default"}
+        if node.get("type") == "object" and "properties" in node:
+            node["additionalProperties"] = False
+            node["required"] = list(node["properties"].keys())
+        return node
+    if isinstance(node, list):
+        return [_strict_json_schema(item) for item in node]
+    return node
+
+def _build_response_formats() -> Dict[str, Dict[str, Any]]:
+    formats = {}
+    for prompt_name, schema_name in PROMPT_OUTPUT_SCHEMAS.items():
+        version = SCHEMA_VERSIONS[schema_name].replace(".", "_")
+        formats[prompt_name] = {
+            "type": "json_schema",
+            "json_schema": {
+                "name": f"{schema_name}_{version}",
+                "strict": True,
+                "schema": _strict_json_schema(SCHEMA_MODELS[schema_name].model_json_schema())
+            }
+        }
+    return formats
+
+RESPONSE_FORMATS = _build_response_formats()
+
+def get_response_format(prompt_name: str) -> Dict[str, Any]:
+    if LLM_STRICT_SCHEMAS and prompt_name in RESPONSE_FORMATS:
+        return RESPONSE_FORMATS[prompt_name]
+    return {"type": "json_object"}
+
+def validate_llm_output(prompt_name: str, result: Dict[str, Any]) -> Optional[List[str]]:
+    """Check a stage output against its schema; None when the prompt has no schema, else the error list"""
+    schema_name = PROMPT_OUTPUT_SCHEMAS.get(prompt_name)
+    if not schema_name:
+        return None
+    try:
+        SCHEMA_MODELS[schema_name].model_validate(result)
+        return []
+    except ValidationError as e:
+        return [f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors()]
+
+# ============== MODEL ROUTING ==============
+# Per-prompt model settings, keyed like PROMPT_VERSIONS. High-frequency gate
+# calls (input validation, quality audit) run on a faster model.
+# Override any field with LLM_<PROMPT_NAME>_<FIELD>, e.g. LLM_QUALITY_AUDITOR_MODEL=gpt-4o
+
+DEFAULT_LLM_ROUTE = {"model": "gpt-4o", "temperature": 0.4, "max_tokens": 4096, "timeout": 120.0}
+
+LLM_ROUTE_DEFAULTS = {
+    "input_validation": {"model": "gpt-4o-mini", "temperature": 0.0, "max_tokens": 300, "timeout": 30.0},
+    "signal_extraction": {"model": "gpt-4o", "temperature": 0.4, "max_tokens": 4096, "timeout": 120.0},
+    "recruiter_heuristics": {"model": "gpt-4o", "temperature": 0.4, "max_tokens": 2048, "timeout": 90.0},
+    "diagnosis": {"model": "gpt-4o", "temperature": 0.4, "max_tokens": 4096, "timeout": 120.0},
+    "risk": {"model": "gpt-4o", "temperature": 0.4, "max_tokens": 4096, "timeout": 120.0},
+    "execution_guardrails": {"model": "gpt-4o", "temperature": 0.4, "max_tokens": 4096, "timeout": 120.0},
+    "decision_intelligence": {"model": "gpt-4o", "temperature": 0.4, "max_tokens": 4096, "timeout": 120.0},
+    "quality_auditor": {"model": "gpt-4o-mini", "temperature": 0.0, "max_tokens": 1200, "timeout": 60.0},
+    "section_repair": {"model": "gpt-4o", "temperature": 0.4, "max_tokens": 2048, "timeout": 90.0}
+}
+
+def _load_llm_routes() -> Dict[str, Dict[str, Any]]:
+    field_types = {"model": str, "temperature": float, "max_tokens": int, "timeout": float}
+    routes = {}
+    for prompt_name, defaults in LLM_ROUTE_DEFAULTS.items():
+        route = dict(defaults)
+        for field, cast in field_types.items():
+            override = os.environ.get(f"LLM_{prompt_name.upper()}_{field.upper()}")
+            if override:
+                route[field] = cast(override)
+        routes[prompt_name] = route
+    return routes
+
+LLM_ROUTES = _load_llm_routes()
+
+def get_llm_route(prompt_name: str) -> Dict[str, Any]:
+    return LLM_ROUTES.get(prompt_name, DEFAULT_LLM_ROUTE)
+
 # v3.1 Static Disclaimer - Added to all reports
 REPORT_DISCLAIMER = """
 DISCLAIMER: This report is a diagnostic intelligence output, not career advice. 
@@ -739,8 +1576,1093 @@ OUTPUT JSON:
   "rewrite_instructions": "What specifically must change" or null if approved
 }"""
 
+# ============== STAGE INSTRUCTIONS ==============
+# Static per-stage task text. It is sent right after the master prompt so every
+# call for a prompt version shares a byte-identical prefix (cacheable by the
+# provider); only candidate data goes into the user message.
+
+JSON_RESPONSE_RULE = "You must respond with valid JSON format only."
+
+SIGNAL_EXTRACTION_INSTRUCTIONS = """EXTRACT ALL 5 SIGNAL CLASSES. Do not collapse signals. Each class must be analyzed independently.
+IMPORTANT: Extract the candidate's full name and current/most recent job title from the resume for the identity_block.
+If LinkedIn not provided, mark relevant fields as 'not_available' and set confidence_modifier to 'reduced'."""
+
+DIAGNOSIS_INSTRUCTIONS = """Generate diagnosis using MULTI-SIGNAL SYNTHESIS with:
+1. Identity Block at the top
+2. Context Intro explaining this is market perception analysis
+3. Interpretation Anchors framing findings
+4. Reference AT LEAST 3 different signal classes in each section.
+DO NOT collapse into single-signal analysis."""
+
+RISK_INSTRUCTIONS = """Generate MINIMUM 4 independent risks from DIFFERENT signal classes. Each risk must have different evidence. Identify signal conflicts."""
+
+EXECUTION_GUARDRAILS_INSTRUCTIONS = """Generate guardrails for EACH signal class (identity, seniority, ownership, market positioning)."""
+
+DECISION_INTELLIGENCE_INSTRUCTIONS = """Generate 3-5 COMMITMENTS (not decisions) with:
+1. Identity Block
+2. Context Intro
+3. Each commitment must have A/B options with MARKET DEFAULT
+4. Include STATE SHIFT SUMMARY showing before/after states
+5. No advice. Real trade-offs only."""
+
+SECTION_REPAIR_INSTRUCTIONS = """REPAIR a rejected section. Rewrite ONLY the JSON paths listed under PATHS TO REWRITE so they resolve the violations.
+Every section rule above still applies. Keep each rewritten value in the same shape as the original.
+Return {"repairs": {"<path>": <new value>}} with exactly one entry per listed path."""
+
+def build_llm_messages(system_prompt: str, user_content: str, instructions: str = "") -> List[Dict[str, str]]:
+    """Static prefix (prompt, JSON rule, stage instructions) first; volatile data last"""
+    system_content = f"{system_prompt}\n\n{JSON_RESPONSE_RULE}"
+    if instructions:
+        system_content += f"\n\n=== TASK ===\n{instructions}"
+    return [
+        {"role": "system", "content": system_content},
+        {"role": "user", "content": user_content}
+    ]
+
+# ============== PIPELINE COUNTERS ==============
+# In-process counters for pipeline efficiency (auditor calls saved, etc.)
+
+pipeline_counters: Dict[str, int] = defaultdict(int)
+
+def count_event(name: str, amount: int = 1):
+    pipeline_counters[name] += amount
+
+metrics.register(Counter(
+    "careeriq_pipeline_events_total", "Pipeline efficiency counters (see /api/admin/pipeline-counters)", ("event",),
+    read=lambda: {(name,): value for name, value in list(pipeline_counters.items())}))
+
+# ============== LOCAL PRE-AUDIT ==============
+# Mechanical subset of QUALITY_AUDITOR_PROMPT's hard rules. Sections that fail
+# here go straight back for a rewrite; only passing sections reach the LLM auditor.
+
+LOCAL_PRE_AUDIT = os.environ.get('LOCAL_PRE_AUDIT', 'true').lower() == 'true'
+
+ADVICE_PATTERN = re.compile(r"\b(should|could|consider|recommend|try to|might want)\b", re.IGNORECASE)
+
+SIGNAL_CLASS_KEYWORDS = {
+    "title": re.compile(r"\b(title|titles|role|roles)\b", re.IGNORECASE),
+    "ownership": re.compile(r"\b(ownership|owner|owned|execution|executor|p&l|accountability|decision-making)\b", re.IGNORECASE),
+    "seniority": re.compile(r"\b(seniority|senior|authority|scope|level|leadership)\b", re.IGNORECASE),
+    "identity": re.compile(r"\b(identity|positioning|headline|brand|perceived as)\b", re.IGNORECASE),
+    "market fit": re.compile(r"\b(market|target role|fit|gap|gaps)\b", re.IGNORECASE)
+}
+
+# (json key, minimum items) per section, from the stage prompts' constraints
+SECTION_MINIMUM_COUNTS = {
+    "diagnosis": [("authority_breakpoints", 3), ("career_risks", 3)],
+    "risk": [("independent_risks", 4), ("signal_conflicts", 2)],
+    "decision_intelligence": [("commitments", 3)]
+}
+
+# Candidate names and job titles are quoted verbatim, not written by the model
+PRE_AUDIT_SKIP_KEYS = {"identity_block"}
+# Resume evidence may legitimately say "could" or "consider"; it still counts
+# toward signal-class coverage but is not scanned for advice words
+QUOTED_EVIDENCE_KEYS = {"evidence", "evidence_from_profile"}
+# Inline quotes of the profile or job description inside model-written prose
+QUOTED_SPAN_PATTERN = re.compile(r'"[^"]*"|“[^”]*”')
+
+def _iter_text_fields(node: Any, path: str = "", key: Optional[str] = None):
+    if isinstance(node, dict):
+        for child_key, value in node.items():
+            if child_key in PRE_AUDIT_SKIP_KEYS:
+                continue
+            yield from _iter_text_fields(value, f"{path}.{child_key}" if path else child_key, child_key)
+    elif isinstance(node, list):
+        for index, value in enumerate(node):
+            yield from _iter_text_fields(value, f"{path}[{index}]", key)
+    elif isinstance(node, str):
+        yield path, key, node
+
+def local_pre_audit(section_name: str, section_content: Dict) -> Dict[str, Any]:
+    """Run the mechanical hard rules; returns an auditor-shaped verdict"""
+    rejection_reasons = []
+    violations = []
+    violation_paths = []
+    
+    fields = list(_iter_text_fields(section_content))
+    
+    for path, key, text in fields:
+        if key in QUOTED_EVIDENCE_KEYS:
+            continue
+        # Blank quotes in place so match offsets still index the original text
+        match = ADVICE_PATTERN.search(QUOTED_SPAN_PATTERN.sub(lambda quote: " " * len(quote.group(0)), text))
+        if match:
+            start = max(0, match.start() - 60)
+            violations.append(f"{path}: \"...{text[start:match.end() + 60]}...\" uses '{match.group(0)}'")
+            violation_paths.append(path)
+    if violations:
+        rejection_reasons.append("ADVICE CONTAMINATION: banned advice words present")
+    
+    full_text = " ".join(text for _, _, text in fields)
+    missing_classes = [name for name, pattern in SIGNAL_CLASS_KEYWORDS.items() if not pattern.search(full_text)]
+    if missing_classes:
+        rejection_reasons.append(f"MISSING SIGNAL CLASSES: {', '.join(missing_classes)} not addressed")
+        violations.append(f"Signal classes not addressed: {', '.join(missing_classes)}")
+    
+    for key, minimum in SECTION_MINIMUM_COUNTS.get(section_name, []):
+        items = section_content.get(key)
+        found = len(items) if isinstance(items, list) else 0
+        if found < minimum:
+            rejection_reasons.append(f"MINIMUM COUNT: {key} has {found}, needs at least {minimum}")
+            violations.append(f"{key}: {found} items (minimum {minimum})")
+            violation_paths.append(key)
+    
+    if section_name == "risk":
+        categories = {r.get("risk_category") for r in section_content.get("independent_risks", []) if isinstance(r, dict)}
+        if len(categories) < 4:
+            rejection_reasons.append(f"SINGLE-SIGNAL DOMINANCE: risks span only {len(categories)} categories")
+            violations.append(f"independent_risks: only {len(categories)} distinct risk_category values (minimum 4)")
+            violation_paths.append("independent_risks")
+    
+    if not rejection_reasons:
+        return {"approved": True, "source": "local_pre_audit"}
+    
+    return {
+        "approved": False,
+        "source": "local_pre_audit",
+        "rejection_reasons": rejection_reasons,
+        "specific_violations": violations,
+        "violation_paths": violation_paths,
+        "rewrite_instructions": "Rewrite the listed fields without advice language, address all five signal classes (title, ownership, seniority, identity, market fit) and meet every minimum count."
+    }
+
+# ============== LOCAL INPUT VALIDATION ==============
+# Implements INPUT_VALIDATION_PROMPT's rules locally. Clear-cut documents are
+# decided here; only ambiguous ones go to the LLM validator.
+
+LOCAL_VALIDATION_MIN_CONFIDENCE = float(os.environ.get('LOCAL_VALIDATION_MIN_CONFIDENCE', '0.9'))
+
+PLACEHOLDER_PATTERN = re.compile(
+    r"\b(?:lorem ipsum|dolor sit amet|consectetur adipiscing|your name here|sample resume|placeholder text|asdf)\b|\[your name\]",
+    re.IGNORECASE
+)
+
+PROFESSIONAL_INDICATORS = {
+    "date_ranges": re.compile(
+        r"\b(?:(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?\s+)?(?:\d{1,2}/)?(?:19|20)\d{2}\s*(?:-|–|—|to)\s*"
+        r"(?:(?:(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?\s+)?(?:\d{1,2}/)?(?:19|20)\d{2}|present|current|now|till date)",
+        re.IGNORECASE
+    ),
+    "job_titles": re.compile(
+        r"\b(manager|engineer|director|analyst|lead|consultant|developer|head of|vice president|vp|president|officer|"
+        r"associate|specialist|executive|founder|intern|coordinator|designer|architect|administrator|scientist|partner)\b",
+        re.IGNORECASE
+    ),
+    "companies": re.compile(
+        r"\b(inc|ltd|llc|llp|pvt|limited|corp|corporation|technologies|solutions|group|bank|labs|consulting|services|company)\b\.?",
+        re.IGNORECASE
+    ),
+    "section_headings": re.compile(
+        r"\b(experience|employment|work history|education|skills|summary|projects|certifications|achievements)\b",
+        re.IGNORECASE
+    ),
+    "responsibilities": re.compile(
+        r"\b(led|managed|developed|delivered|implemented|built|designed|owned|launched|drove|responsible for|oversaw)\b",
+        re.IGNORECASE
+    )
+}
+
+LINKEDIN_INDICATORS = re.compile(
+    r"\b(experience|about|summary|headline|skills|education|linkedin|connections)\b",
+    re.IGNORECASE
+)
+
+def _looks_like_junk(text: str) -> bool:
+    letters = sum(ch.isalpha() for ch in text)
+    if letters < len(text) * 0.5:
+        return True
+    words = re.findall(r"[a-z]{2,}", text.lower())
+    return len(words) >= 50 and len(set(words)) < len(words) * 0.15
+
+def local_validate_input(resume_text: str, linkedin_text: str, linkedin_provided: bool) -> Dict[str, Any]:
+    """Heuristic version of the input validator; same output keys plus a confidence score"""
+    result = {
+        "is_valid": False,
+        "linkedin_provided": linkedin_provided,
+        "linkedin_confidence_penalty": not linkedin_provided,
+        "reason": None,
+        "confidence": 0.0,
+        "indicators": []
+    }
+    
+    # Deterministic rejections: the prompt's hard rules
+    if len(resume_text) < 300:
+        result.update(reason="Resume has less than 300 characters of extractable text", confidence=0.99)
+        return result
+    if PLACEHOLDER_PATTERN.search(resume_text):
+        # Real resumes can contain these strings ("sample resume review" as a duty,
+        # an "asdf" handle), so a hit is sent to the LLM rather than rejected here
+        result.update(reason="Resume contains placeholder or lorem ipsum text", confidence=0.6)
+        return result
+    if _looks_like_junk(resume_text):
+        # Could be a scan or an unusual layout - let the LLM make the call
+        result.update(reason="Resume text does not read as a professional document", confidence=0.6)
+        return result
+    
+    indicators = [name for name, pattern in PROFESSIONAL_INDICATORS.items() if pattern.search(resume_text)]
+    result["indicators"] = indicators
+    
+    if len(indicators) >= 4:
+        confidence = 0.95
+    elif len(indicators) == 3:
+        confidence = 0.75
+    else:
+        # Too few indicators to accept, but rejecting a paid session is left to the LLM
+        result.update(reason="Resume lacks professional indicators (titles, companies, dates, responsibilities)", confidence=0.5)
+        return result
+    
+    if linkedin_provided and not (LINKEDIN_INDICATORS.search(linkedin_text) or PROFESSIONAL_INDICATORS["job_titles"].search(linkedin_text)):
+        confidence = min(confidence, 0.5)
+    
+    result.update(is_valid=True, confidence=confidence)
+    return result
+
+# ============== STREAMING JSON ==============
+
+# Stream section generations so completed fields reach the processing screen early
+LLM_STREAMING = os.environ.get('LLM_STREAMING', 'true').lower() == 'true'
+
+class IncrementalJSONObjectParser:
+    """Parses a streamed JSON object and yields each top-level field as soon as its value closes"""
+
+    def __init__(self):
+        self.buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._key = None
+        self._key_start = None
+        self._value_start = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        self.buffer += chunk
+        completed = []
+        while self._pos < len(self.buffer):
+            ch = self.buffer[self._pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._key is None and self._key_start is not None:
+                        self._key = json.loads(self.buffer[self._key_start:self._pos + 1])
+                        self._key_start = None
+            elif ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._key is None:
+                    self._key_start = self._pos
+                elif self._depth == 1 and self._value_start is None:
+                    self._value_start = self._pos
+            elif ch in "{[":
+                if self._depth == 1 and self._key is not None and self._value_start is None:
+                    self._value_start = self._pos
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    completed.extend(self._close_value(self._pos))
+            elif ch == ",":
+                if self._depth == 1:
+                    completed.extend(self._close_value(self._pos))
+            elif ch == ":" or ch.isspace():
+                pass
+            elif self._depth == 1 and self._key is not None and self._value_start is None:
+                # Bare scalar: number, true, false, null
+                self._value_start = self._pos
+            self._pos += 1
+        return completed
+
+    def _close_value(self, end: int) -> List[Tuple[str, Any]]:
+        if self._key is None or self._value_start is None:
+            return []
+        key, raw = self._key, self.buffer[self._value_start:end].strip()
+        self._key = None
+        self._value_start = None
+        try:
+            return [(key, json.loads(raw))]
+        except ValueError:
+            return []
+
+async def consume_completion_stream(stream, on_field: Callable[[str, Any], Awaitable[None]], prompt_name: str) -> Tuple[str, Any, Optional[str]]:
+    """Drain a streamed completion, reporting each completed top-level field; returns (content, usage, model)"""
+    parser = IncrementalJSONObjectParser()
+    parts = []
+    usage = None
+    model = None
+    async for chunk in stream:
+        model = chunk.model or model
+        if chunk.usage:
+            usage = chunk.usage
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if not delta:
+            continue
+        parts.append(delta)
+        for key, value in parser.feed(delta):
+            try:
+                await on_field(key, value)
+            except Exception as e:
+                logger.warning(f"Partial field callback failed ({prompt_name}.{key}): {e}")
+    return "".join(parts), usage, model
+
+# ============== LLM RATE LIMITING ==============
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for budgeting (~4 characters per token for English prose and JSON)"""
+    return len(text) // 4 + 1
+
+class TokenBucket:
+    """Per-minute budget that refills continuously; waiters queue in FIFO order"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.available = float(per_minute)
+        self._rate = per_minute / 60.0
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self._updated) * self._rate)
+        self._updated = now
+
+    async def acquire(self, amount: float):
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.available >= amount:
+                    self.available -= amount
+                    return
+                await asyncio.sleep((amount - self.available) / self._rate)
+
+    def charge(self, amount: float):
+        """Settle usage beyond the estimate; the bucket may go negative (debt)"""
+        self._refill()
+        self.available -= amount
+
+class AdaptiveConcurrency:
+    """AIMD concurrency limit: grows by ~1 per window of successes, halves on a 429"""
+
+    def __init__(self, max_limit: int, min_limit: int = 1):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+        self._last_decrease = 0.0
+
+    async def acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < max(self.min_limit, int(self.limit)))
+            self.in_flight += 1
+
+    async def release(self, throttled: bool = False):
+        async with self._condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if throttled:
+                # One 429 burst should only halve the limit once
+                if now - self._last_decrease > 1.0:
+                    self.limit = max(float(self.min_limit), self.limit / 2)
+                    self._last_decrease = now
+            else:
+                self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+            self._condition.notify_all()
+
+class LLMRateLimiter:
+    """Process-wide gate for OpenAI calls.
+
+    Each call waits for a concurrency slot, a request from the RPM bucket and
+    its estimated tokens from the TPM bucket. A 429 pauses every caller for the
+    server's retry-after and halves concurrency; callers queue rather than fail.
+    """
+
+    def __init__(self, rpm: int, tpm: int, max_concurrency: int, shared: bool = False):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.concurrency = AdaptiveConcurrency(max_concurrency)
+        self.shared = shared
+        self.paused_until = 0.0
+        self.queued = 0
+        self.throttled_total = 0
+
+    async def _reserve_shared_window(self, tokens: int):
+        """Reserve budget in the current minute window shared by all workers"""
+        while True:
+            now = datetime.now(timezone.utc)
+            window = now.strftime("%Y-%m-%dT%H:%M")
+            usage = await db.llm_rate_windows.find_one_and_update(
+                {"_id": window},
+                {"$inc": {"requests": 1, "tokens": tokens},
+                 "$setOnInsert": {"expires_at": now + timedelta(minutes=5)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            if usage["requests"] <= self.rpm and usage["tokens"] <= self.tpm:
+                return
+            await db.llm_rate_windows.update_one({"_id": window}, {"$inc": {"requests": -1, "tokens": -tokens}})
+            await asyncio.sleep(60 - now.second - now.microsecond / 1e6 + 0.05)
+
+    async def acquire(self, estimated_tokens: int):
+        self.queued += 1
+        try:
+            while time.monotonic() < self.paused_until:
+                await asyncio.sleep(self.paused_until - time.monotonic())
+            await self.concurrency.acquire()
+            try:
+                await self.requests.acquire(1)
+                await self.tokens.acquire(estimated_tokens)
+                if self.shared:
+                    await self._reserve_shared_window(estimated_tokens)
+            except BaseException:
+                await self.concurrency.release()
+                raise
+        finally:
+            self.queued -= 1
+
+    async def release(self, estimated_tokens: int, actual_tokens: Optional[int] = None, throttled: bool = False):
+        if actual_tokens is not None and actual_tokens > estimated_tokens:
+            self.tokens.charge(actual_tokens - estimated_tokens)
+        await self.concurrency.release(throttled=throttled)
+
+    def congested(self) -> bool:
+        """True while callers are queued or paused after a 429"""
+        return self.queued > 0 or time.monotonic() < self.paused_until
+
+    def throttle(self, retry_after: Optional[float]):
+        """Pause all callers after a 429, honouring the server's retry-after when given"""
+        self.throttled_total += 1
+        pause = retry_after if retry_after is not None else 2.0
+        self.paused_until = max(self.paused_until, time.monotonic() + pause)
+
+    def snapshot(self) -> Dict[str, Any]:
+        self.requests._refill()
+        self.tokens._refill()
+        return {
+            "concurrency_limit": int(self.concurrency.limit),
+            "in_flight": self.concurrency.in_flight,
+            "queued": self.queued,
+            "rpm_limit": self.rpm,
+            "rpm_available": int(self.requests.available),
+            "tpm_limit": self.tpm,
+            "tpm_available": int(self.tokens.available),
+            "throttled_total": self.throttled_total,
+            "paused_for_seconds": round(max(0.0, self.paused_until - time.monotonic()), 2),
+            "shared": self.shared
+        }
+
+def retry_after_seconds(error: RateLimitError) -> Optional[float]:
+    headers = error.response.headers if error.response is not None else {}
+    if headers.get("retry-after-ms"):
+        return float(headers["retry-after-ms"]) / 1000
+    if headers.get("retry-after"):
+        try:
+            return float(headers["retry-after"])
+        except ValueError:
+            return None
+    return None
+
+llm_rate_limiter = LLMRateLimiter(
+    OPENAI_RPM_LIMIT,
+    OPENAI_TPM_LIMIT,
+    OPENAI_MAX_CONCURRENCY,
+    shared=OPENAI_SHARED_RATE_LIMIT
+)
+
+metrics.register(Gauge(
+    "careeriq_llm_queue_depth", "LLM calls waiting on the rate limiter",
+    read=lambda: {(): llm_rate_limiter.queued}))
+metrics.register(Gauge(
+    "careeriq_llm_in_flight", "LLM calls holding a concurrency slot",
+    read=lambda: {(): llm_rate_limiter.concurrency.in_flight}))
+metrics.register(Gauge(
+    "careeriq_llm_concurrency_limit", "Current adaptive LLM concurrency limit",
+    read=lambda: {(): int(llm_rate_limiter.concurrency.limit)}))
+
+# ============== LLM HEDGING & CIRCUIT BREAKING ==============
+
+# A call still running past its prompt's rolling p95 gets a duplicate; the first response wins
+LLM_HEDGING = os.environ.get('LLM_HEDGING', 'true').lower() == 'true'
+LLM_HEDGE_PERCENTILE = float(os.environ.get('LLM_HEDGE_PERCENTILE', '0.95'))
+LLM_HEDGE_MIN_SAMPLES = int(os.environ.get('LLM_HEDGE_MIN_SAMPLES', '20'))
+LLM_HEDGE_MIN_DELAY_SECONDS = float(os.environ.get('LLM_HEDGE_MIN_DELAY_SECONDS', '2'))
+LLM_LATENCY_WINDOW = int(os.environ.get('LLM_LATENCY_WINDOW', '200'))
+
+# Consecutive timeouts/5xx/connection errors that open a model's breaker, and how long it stays open
+LLM_BREAKER_FAILURES = int(os.environ.get('LLM_BREAKER_FAILURES', '5'))
+LLM_BREAKER_COOLDOWN_SECONDS = float(os.environ.get('LLM_BREAKER_COOLDOWN_SECONDS', '30'))
+
+LLM_TRANSIENT_ERRORS = (APITimeoutError, APIConnectionError, InternalServerError)
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (q in 0..1) of unsorted values"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+class LatencyTracker:
+    """Rolling per-prompt latency samples of successful LLM calls"""
+
+    def __init__(self, window: int = LLM_LATENCY_WINDOW):
+        self.samples: Dict[str, deque] = defaultdict(lambda: deque(maxlen=window))
+
+    def observe(self, prompt_name: str, seconds: float):
+        self.samples[prompt_name].append(seconds)
+
+    def percentile(self, prompt_name: str, q: float) -> Optional[float]:
+        samples = self.samples.get(prompt_name)
+        if not samples or len(samples) < LLM_HEDGE_MIN_SAMPLES:
+            return None
+        return percentile(samples, q)
+
+    def hedge_delay(self, prompt_name: str) -> Optional[float]:
+        """Seconds to wait before hedging, or None until enough samples exist"""
+        p95 = self.percentile(prompt_name, LLM_HEDGE_PERCENTILE)
+        return None if p95 is None else max(p95, LLM_HEDGE_MIN_DELAY_SECONDS)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            prompt_name: {
+                "samples": len(samples),
+                "p50_seconds": round(self.percentile(prompt_name, 0.5) or 0, 2),
+                "p95_seconds": round(self.percentile(prompt_name, LLM_HEDGE_PERCENTILE) or 0, 2)
+            }
+            for prompt_name, samples in self.samples.items()
+        }
+
+class CircuitOpenError(Exception):
+    def __init__(self, model: str, retry_in: float):
+        super().__init__(f"Circuit open for {model}, retry in {retry_in:.1f}s")
+        self.model = model
+        self.retry_in = retry_in
+
+class CircuitBreaker:
+    """Closed → open after consecutive failures → half-open single probe after the cooldown"""
+
+    def __init__(self, model: str, failures: int = LLM_BREAKER_FAILURES, cooldown: float = LLM_BREAKER_COOLDOWN_SECONDS):
+        self.model = model
+        self.failure_threshold = failures
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+
+    def before_call(self) -> bool:
+        """Raise CircuitOpenError unless a request may go out now; True when it is the half-open probe"""
+        if self.state == "closed":
+            return False
+        remaining = self.opened_at + self.cooldown - time.monotonic()
+        if self.state == "open" and remaining <= 0:
+            self.state = "half_open"
+            count_event(f"llm_breaker.half_open.{self.model}")
+        if self.state == "half_open" and not self.probing:
+            self.probing = True
+            return True
+        # While the half-open probe is in flight, others check back shortly
+        raise CircuitOpenError(self.model, remaining if remaining > 0 else 1.0)
+
+    def record(self, outcome: str, probe: bool = False):
+        """outcome is success, failure or abandoned (cancelled before an answer)"""
+        if probe:
+            self.probing = False
+        if outcome == "success":
+            if self.state != "closed":
+                count_event(f"llm_breaker.closed.{self.model}")
+            self.state, self.failures = "closed", 0
+        elif outcome == "failure":
+            self.failures += 1
+            if probe or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    count_event(f"llm_breaker.opened.{self.model}")
+                    logger.warning(f"Circuit opened for {self.model} after {self.failures} failures")
+                self.state, self.opened_at = "open", time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "open_for_seconds": round(max(0.0, self.opened_at + self.cooldown - time.monotonic()), 2) if self.state == "open" else 0
+        }
+
+llm_latency = LatencyTracker()
+llm_breakers: Dict[str, CircuitBreaker] = {}
+
+def get_llm_breaker(model: str) -> CircuitBreaker:
+    if model not in llm_breakers:
+        llm_breakers[model] = CircuitBreaker(model)
+    return llm_breakers[model]
+
+metrics.register(Gauge(
+    "careeriq_llm_breaker_open", "1 while a model's circuit breaker is open or half-open", ("model",),
+    read=lambda: {(model,): int(breaker.state != "closed") for model, breaker in list(llm_breakers.items())}))
+
+# ============== SPECULATIVE SECTIONS ==============
+
+# Start the next stage from a draft while that draft's quality audit is in flight
+SPECULATIVE_SECTIONS = os.environ.get('SPECULATIVE_SECTIONS', 'false').lower() == 'true'
+
+SectionStage = Callable[[Dict], Awaitable[Dict]]
+
+class SpeculativeRun:
+    """One speculative stage task, the draft it started from and the runs it started in turn"""
+
+    def __init__(self, draft: Dict):
+        self.draft = draft
+        self.task: Optional[asyncio.Task] = None
+        self.children: List[Tuple[str, "SpeculativeRun"]] = []
+
+# The speculative run whose task is executing, so nested speculation can be
+# attributed to it and its drafts kept off the processing screen
+current_speculative_run: ContextVar[Optional[SpeculativeRun]] = ContextVar("current_speculative_run", default=None)
+
+class SectionSpeculation:
+    """Next-stage generations running against drafts that are still under audit.
+
+    A speculative run is kept only if the draft it started from is the one the
+    audit commits; otherwise it is cancelled, along with any runs it started
+    itself, and the stage runs again. on_discard is called with the section key
+    of every run thrown away on a miss.
+    """
+
+    def __init__(self, enabled: bool = SPECULATIVE_SECTIONS, on_discard: Optional[Callable[[str], None]] = None):
+        self.enabled = enabled
+        self.on_discard = on_discard
+        self.runs: Dict[str, SpeculativeRun] = {}
+
+    def start(self, section_key: str, draft: Dict, stage: SectionStage):
+        if not self.enabled:
+            return
+        self.discard(section_key)
+        run = SpeculativeRun(draft)
+        
+        async def speculate() -> Dict:
+            current_speculative_run.set(run)
+            return await stage(draft)
+        
+        parent = current_speculative_run.get()
+        if parent is not None:
+            parent.children.append((section_key, run))
+        run.task = asyncio.create_task(speculate())
+        self.runs[section_key] = run
+        count_event(f"speculation.started.{section_key}")
+
+    def discard(self, section_key: str, draft: Optional[Dict] = None, outcome: str = "misses") -> bool:
+        """Cancel the speculative run for a section (only if it was started from draft, when given)"""
+        run = self.runs.get(section_key)
+        if not run or (draft is not None and run.draft is not draft):
+            return False
+        self._drop(section_key, run, outcome)
+        return True
+
+    def _drop(self, section_key: str, run: SpeculativeRun, outcome: str):
+        del self.runs[section_key]
+        if run.task.done():
+            if not run.task.cancelled():
+                run.task.exception()
+        else:
+            run.task.cancel()
+        count_event(f"speculation.{outcome}.{section_key}")
+        if outcome == "misses" and self.on_discard:
+            self.on_discard(section_key)
+        # Runs this one started were built on its now-discarded output
+        for child_key, child in run.children:
+            if self.runs.get(child_key) is child:
+                self._drop(child_key, child, outcome)
+
+    async def resolve(self, section_key: str, committed: Dict, stage: SectionStage) -> Dict:
+        """Result of the stage for the committed upstream section, reusing a matching speculative run"""
+        run = self.runs.get(section_key)
+        if run and run.draft is committed:
+            del self.runs[section_key]
+            count_event(f"speculation.hits.{section_key}")
+            return await run.task
+        self.discard(section_key)
+        return await stage(committed)
+
+    def cancel_all(self):
+        """Stop runs left over when the pipeline ends; counted apart from misses"""
+        for section_key in list(self.runs):
+            self.discard(section_key, outcome="cancelled")
+
+# ============== BEST-OF-N SECTIONS ==============
+
+# "sequential" regenerates after each rejection; "parallel" generates and audits
+# SECTION_CANDIDATES drafts at once and keeps the first approved or best-scoring one
+SECTION_GENERATION_MODE = os.environ.get('SECTION_GENERATION_MODE', 'sequential').lower()
+SECTION_CANDIDATES = max(1, int(os.environ.get('SECTION_CANDIDATES', '3')))
+
+def audit_score(audit: Dict[str, Any]) -> float:
+    """Rank a rejected draft by its auditor scores (higher is closer to approval)"""
+    scores = audit.get("quality_scores") or {}
+    score = 0.0
+    for value in scores.values():
+        text = str(value).strip().upper()
+        if text.startswith("PASS"):
+            score += 1
+        elif text.startswith("FAIL"):
+            score -= 1
+    coverage = re.match(r"\s*(\d+)\s*/\s*5", str(scores.get("signal_class_coverage", "")))
+    if coverage:
+        score += int(coverage.group(1)) / 5
+    # Schema and local pre-audit rejections carry no scores and rank by violation count
+    return score - 0.1 * len(audit.get("specific_violations") or [])
+
+# ============== DELTA REPAIR ==============
+
+# "repair" rewrites only the rejected JSON paths and merges them into the draft;
+# "regenerate" reruns the whole section. Either way, retries carry only the
+# latest audit feedback, capped at SECTION_RETRY_FEEDBACK_CHARS.
+SECTION_RETRY_MODE = os.environ.get('SECTION_RETRY_MODE', 'regenerate').lower()
+SECTION_REPAIR_MAX_PATHS = int(os.environ.get('SECTION_REPAIR_MAX_PATHS', '4'))
+SECTION_RETRY_FEEDBACK_CHARS = int(os.environ.get('SECTION_RETRY_FEEDBACK_CHARS', '2000'))
+
+JSON_PATH_TOKEN = re.compile(r"\[(\d+)\]|([^.\[\]]+)")
+QUOTE_CHARS = "\"'“”‘’ "
+
+def parse_json_path(path: str) -> List[Any]:
+    """'independent_risks[2].description' → ['independent_risks', 2, 'description']"""
+    return [int(index) if index else key for index, key in JSON_PATH_TOKEN.findall(path)]
+
+def repair_scope(path: str) -> str:
+    """Coarsen a violation path to its top-level field, or list item, so repairs stay coherent"""
+    parts = parse_json_path(path)
+    if len(parts) > 1 and isinstance(parts[1], int):
+        return f"{parts[0]}[{parts[1]}]"
+    return str(parts[0]) if parts else ""
+
+def set_json_path(node: Any, path: str, value: Any) -> bool:
+    parts = parse_json_path(path)
+    if not parts:
+        return False
+    for part in parts[:-1]:
+        try:
+            node = node[part]
+        except (KeyError, IndexError, TypeError):
+            return False
+    last = parts[-1]
+    if isinstance(node, dict) and isinstance(last, str):
+        node[last] = value
+        return True
+    if isinstance(node, list) and isinstance(last, int) and last < len(node):
+        node[last] = value
+        return True
+    return False
+
+def section_repair_paths(section_name: str, result: Dict, audit: Dict[str, Any]) -> List[str]:
+    """Paths to rewrite: pre-audit paths, schema error locations, or fields quoting the auditor's violations"""
+    paths = list(audit.get("violation_paths") or [])
+    violations = [str(v) for v in (audit.get("specific_violations") or [])]
+    if not paths:
+        for violation in violations:
+            location, _, _ = violation.partition(":")
+            if location and " " not in location.strip():
+                # Schema errors read "independent_risks.2.description: Field required"
+                paths.append(re.sub(r"\.(\d+)(?=\.|$)", r"[\1]", location.strip()))
+                continue
+            fragment = violation.strip(QUOTE_CHARS).lower()
+            if len(fragment) < 12:
+                continue
+            paths.extend(path for path, _, text in _iter_text_fields(result) if fragment in text.lower())
+    schema_name = PROMPT_OUTPUT_SCHEMAS.get(section_name)
+    known_fields = set(result) | (set(SCHEMA_MODELS[schema_name].model_fields) if schema_name else set())
+    scopes = []
+    for path in paths:
+        scope = repair_scope(path)
+        if scope and scope not in scopes and parse_json_path(scope)[0] in known_fields:
+            scopes.append(scope)
+    return scopes
+
+def retry_feedback(audit: Dict[str, Any]) -> str:
+    """Latest audit feedback for a retry prompt, capped so retries cannot grow the prompt"""
+    feedback = f"Violations: {audit.get('specific_violations')}\nRewrite Instructions: {audit.get('rewrite_instructions', '')}"
+    if len(feedback) > SECTION_RETRY_FEEDBACK_CHARS:
+        feedback = feedback[:SECTION_RETRY_FEEDBACK_CHARS] + " …"
+    return f"\n\nPREVIOUS ATTEMPT REJECTED.\n{feedback}\n\nYou MUST address multi-signal synthesis. DO NOT repeat single signals across sections."
+
+# ============== LLM LOG SINK ==============
+
+# llm_logs records are queued and bulk-inserted off the request path
+LLM_LOG_QUEUE_SIZE = int(os.environ.get('LLM_LOG_QUEUE_SIZE', '5000'))
+LLM_LOG_BATCH_SIZE = int(os.environ.get('LLM_LOG_BATCH_SIZE', '100'))
+LLM_LOG_FLUSH_SECONDS = float(os.environ.get('LLM_LOG_FLUSH_SECONDS', '1.0'))
+
+class LLMLogSink:
+    """Bounded queue of llm_logs records flushed with insert_many on an interval or batch size.
+
+    Log records are written unacknowledged (w=0): a lost analytics record costs
+    less than a round trip per batch, so inserts are only counted as sent. A full
+    queue drops records (counted) rather than slowing the pipeline.
+    """
+
+    def __init__(self, collection, queue_size: int = LLM_LOG_QUEUE_SIZE, batch_size: int = LLM_LOG_BATCH_SIZE, flush_seconds: float = LLM_LOG_FLUSH_SECONDS):
+        self.collection = collection.with_options(write_concern=WriteConcern(w=0))
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.task: Optional[asyncio.Task] = None
+        self.flushing: Optional[asyncio.Future] = None
+        self.batch: List[Dict[str, Any]] = []
+
+    def write(self, record: Dict[str, Any]):
+        if self.task is None:
+            self.start()
+        try:
+            self.queue.put_nowait(record)
+        except asyncio.QueueFull:
+            count_event("llm_logs.dropped")
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            self.batch.append(await self.queue.get())
+            deadline = time.monotonic() + self.flush_seconds
+            while len(self.batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    self.batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            batch, self.batch = self.batch, []
+            # Shielded so stopping the flusher never abandons a batch mid-insert
+            self.flushing = asyncio.ensure_future(self._flush(batch))
+            await asyncio.shield(self.flushing)
+
+    async def _flush(self, batch: List[Dict[str, Any]]):
+        try:
+            await self.collection.insert_many(batch, ordered=False)
+            count_event("llm_logs.sent", len(batch))
+        except Exception as e:
+            logger.error(f"llm_logs flush failed ({len(batch)} records): {e}")
+            count_event("llm_logs.dropped", len(batch))
+
+    async def close(self):
+        """Stop the flusher and write everything still queued"""
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        if self.flushing is not None:
+            await self.flushing
+        batch, self.batch = self.batch, []
+        while not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        for start in range(0, len(batch), self.batch_size):
+            await self._flush(batch[start:start + self.batch_size])
+
+llm_log_sink = LLMLogSink(db.llm_logs)
+
+metrics.register(Gauge(
+    "careeriq_llm_log_queue_depth", "llm_logs records waiting to be flushed",
+    read=lambda: {(): llm_log_sink.queue.qsize()}))
+
+# ============== LLM LEDGER ==============
+
+# USD per 1M tokens; models are matched by prefix so dated snapshots price like their alias
+MODEL_PRICING = {
+    "gpt-4o-mini": {"input": 0.15, "cached_input": 0.075, "output": 0.60},
+    "gpt-4o": {"input": 2.50, "cached_input": 1.25, "output": 10.00}
+}
+USD_INR_RATE = float(os.environ.get('USD_INR_RATE', '84'))
+
+# Per-session ceilings (0 disables); once reached, retries, repairs and extra candidates stop
+LLM_SESSION_TOKEN_BUDGET = int(os.environ.get('LLM_SESSION_TOKEN_BUDGET', '0'))
+LLM_SESSION_COST_BUDGET_USD = float(os.environ.get('LLM_SESSION_COST_BUDGET_USD', '0'))
+
+def llm_cost_usd(model: str, usage: Dict[str, int]) -> float:
+    pricing = next((MODEL_PRICING[name] for name in sorted(MODEL_PRICING, key=len, reverse=True) if model.startswith(name)), None)
+    if not pricing:
+        return 0.0
+    uncached = usage["prompt_tokens"] - usage["cached_tokens"]
+    cost = (
+        uncached * pricing["input"]
+        + usage["cached_tokens"] * pricing["cached_input"]
+        + usage["completion_tokens"] * pricing["output"]
+    ) / 1_000_000
+    return round(cost, 6)
+
+class SessionLedger:
+    """Token, cost and latency totals for one pipeline run, seeded with the session's earlier usage for budgets"""
+
+    FIELDS = ("calls", "prompt_tokens", "completion_tokens", "cached_tokens", "latency_ms", "cost_usd")
+
+    def __init__(self, session_id: str, run_id: Optional[str], report_id: Optional[str]):
+        self.session_id = session_id
+        self.run_id = run_id
+        self.report_id = report_id
+        self.prior = {field: 0 for field in self.FIELDS}
+        self.totals = {field: 0 for field in self.FIELDS}
+        self.stages: Dict[str, Dict[str, float]] = defaultdict(lambda: {field: 0 for field in self.FIELDS})
+        # The model that actually answered each prompt (env overrides and hedges included)
+        self.models: Dict[str, str] = {}
+        self.budget_logged = False
+
+    def seed(self, prior_usage: Optional[Dict[str, Any]]):
+        """Count usage from the session's earlier runs toward its budget"""
+        self.prior = {field: (prior_usage or {}).get(field, 0) for field in self.FIELDS}
+
+    def record(self, prompt_name: str, usage: Dict[str, int], cost_usd: float, latency_ms: int, model: Optional[str] = None):
+        if model:
+            self.models[prompt_name] = model
+        entry = {"calls": 1, **usage, "latency_ms": latency_ms, "cost_usd": cost_usd}
+        for field in self.FIELDS:
+            self.totals[field] += entry[field]
+            self.stages[prompt_name][field] += entry[field]
+
+    def exhausted(self) -> bool:
+        tokens = sum(self.prior[f] + self.totals[f] for f in ("prompt_tokens", "completion_tokens"))
+        cost = self.prior["cost_usd"] + self.totals["cost_usd"]
+        over = (LLM_SESSION_TOKEN_BUDGET and tokens >= LLM_SESSION_TOKEN_BUDGET) or (LLM_SESSION_COST_BUDGET_USD and cost >= LLM_SESSION_COST_BUDGET_USD)
+        if over and not self.budget_logged:
+            self.budget_logged = True
+            count_event("llm_budget_exhausted")
+            logger.warning(f"LLM budget reached for session {self.session_id}: {tokens} tokens, ${cost:.4f}")
+        return bool(over)
+
+    def inc_fields(self) -> Dict[str, float]:
+        """$inc document adding this run's usage to the session's llm_usage"""
+        fields = {f"llm_usage.{field}": value for field, value in self.totals.items()}
+        for prompt_name, stage in self.stages.items():
+            fields.update({f"llm_usage.stages.{prompt_name}.{field}": value for field, value in stage.items()})
+        return fields
+
+# The active run's ledger and the attempt number of the section being generated,
+# so call_llm can attribute each call without threading ids through every helper
+current_ledger: ContextVar[Optional[SessionLedger]] = ContextVar("current_ledger", default=None)
+llm_attempt: ContextVar[int] = ContextVar("llm_attempt", default=1)
+
+def llm_budget_exhausted() -> bool:
+    ledger = current_ledger.get()
+    return ledger is not None and ledger.exhausted()
+
+# ============== LLM CASSETTES ==============
+
+# "record" saves every completion under LLM_CASSETTE_DIR; "replay" serves them back
+# without touching OpenAI, so the pipeline can run offline. Replay latency is the
+# recorded one (LLM_CASSETTE_LATENCY=recorded, scaled) or a fixed number of seconds.
+LLM_CASSETTE_MODE = os.environ.get('LLM_CASSETTE_MODE', 'off').lower()
+LLM_CASSETTE_DIR = Path(os.environ.get('LLM_CASSETTE_DIR', str(ROOT_DIR / 'cassettes')))
+LLM_CASSETTE_LATENCY = os.environ.get('LLM_CASSETTE_LATENCY', 'recorded').lower()
+LLM_CASSETTE_LATENCY_SCALE = float(os.environ.get('LLM_CASSETTE_LATENCY_SCALE', '1.0'))
+LLM_CASSETTE_STREAM_CHUNKS = 20
+
+class CassetteMissError(Exception):
+    pass
+
+class LLMCassettes:
+    """Completions stored per prompt as <dir>/<prompt_name>/<request hash>.json.
+
+    A cassette holds every response recorded for the same request (best-of-N
+    drafts share one); replay cycles through them.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self.replays: Dict[str, int] = defaultdict(int)
+
+    @staticmethod
+    def request_hash(request: Dict[str, Any]) -> str:
+        # The timeout does not change the answer, so it stays out of the key
+        keyed = {key: value for key, value in request.items() if key != "timeout"}
+        return hash_content(json.dumps(keyed, sort_keys=True, default=str))
+
+    def path(self, prompt_name: str, request: Dict[str, Any]) -> Path:
+        return self.directory / prompt_name / f"{self.request_hash(request)[:32]}.json"
+
+    async def _load(self, path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            async with aiofiles.open(path, "r") as f:
+                return json.loads(await f.read())
+        except FileNotFoundError:
+            return None
+
+    async def record(self, prompt_name: str, request: Dict[str, Any], response: Tuple[str, Any, Optional[str]], latency_ms: int):
+        content, usage, model = response
+        path = self.path(prompt_name, request)
+        async with self.locks[str(path)]:
+            cassette = await self._load(path) or {
+                "prompt_name": prompt_name,
+                "prompt_version": PROMPT_VERSIONS.get(prompt_name, "unknown"),
+                "request": {key: value for key, value in request.items() if key != "timeout"},
+                "responses": []
+            }
+            cassette["responses"].append({
+                "content": content,
+                "usage": usage_to_dict(usage),
+                "model": model,
+                "latency_ms": latency_ms,
+                "recorded_at": datetime.now(timezone.utc).isoformat()
+            })
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = path.with_suffix(".tmp")
+            async with aiofiles.open(temp_path, "w") as f:
+                await f.write(json.dumps(cassette, indent=2))
+            os.replace(temp_path, path)
+        count_event("llm_cassette.recorded")
+
+    async def replay(
+        self,
+        prompt_name: str,
+        request: Dict[str, Any],
+        on_field: Optional[Callable[[str, Any], Awaitable[None]]] = None
+    ) -> Tuple[str, Any, Optional[str]]:
+        path = self.path(prompt_name, request)
+        cassette = await self._load(path)
+        if not cassette or not cassette["responses"]:
+            count_event("llm_cassette.misses")
+            raise CassetteMissError(f"No cassette for {prompt_name} at {path}")
+        responses = cassette["responses"]
+        response = responses[self.replays[str(path)] % len(responses)]
+        self.replays[str(path)] += 1
+        count_event("llm_cassette.replayed")
+        
+        if LLM_CASSETTE_LATENCY == "recorded":
+            delay = response.get("latency_ms", 0) / 1000 * LLM_CASSETTE_LATENCY_SCALE
+        else:
+            delay = float(LLM_CASSETTE_LATENCY)
+        content = response["content"]
+        if on_field:
+            # Emit fields at the pace a stream of the recorded latency would
+            parser = IncrementalJSONObjectParser()
+            size = max(1, -(-len(content) // LLM_CASSETTE_STREAM_CHUNKS))
+            for start in range(0, len(content), size):
+                await asyncio.sleep(delay / LLM_CASSETTE_STREAM_CHUNKS)
+                for key, value in parser.feed(content[start:start + size]):
+                    await on_field(key, value)
+        else:
+            await asyncio.sleep(delay)
+        
+        usage = response["usage"]
+        return content, SimpleNamespace(
+            prompt_tokens=usage["prompt_tokens"],
+            completion_tokens=usage["completion_tokens"],
+            total_tokens=usage["prompt_tokens"] + usage["completion_tokens"],
+            prompt_tokens_details=SimpleNamespace(cached_tokens=usage["cached_tokens"])
+        ), response.get("model")
+
+llm_cassettes = LLMCassettes(LLM_CASSETTE_DIR)
+
 # ============== HELPER FUNCTIONS ==============
 
+@traced("extract_text_from_pdf")
 def extract_text_from_pdf(file_content: bytes) -> str:
     """Extract text from PDF file"""
     try:
@@ -753,6 +2675,7 @@ def extract_text_from_pdf(file_content: bytes) -> str:
         logger.error(f"PDF extraction error: {e}")
         return ""
 
+@traced("extract_text_from_docx")
 def extract_text_from_docx(file_content: bytes) -> str:
     """Extract text from DOCX file"""
     try:
@@ -767,31 +2690,213 @@ def hash_content(content: str) -> str:
     """Generate hash of content for duplicate detection"""
     return hashlib.sha256(content.encode()).hexdigest()
 
-async def call_llm(system_prompt: str, user_content: str, prompt_name: str) -> Dict[str, Any]:
-    """Make independent LLM call with logging"""
+async def send_chat_completion(
+    prompt_name: str,
+    estimated: int,
+    on_field: Optional[Callable[[str, Any], Awaitable[None]]],
+    request: Dict[str, Any],
+    acquired: Optional[asyncio.Event] = None
+) -> Tuple[str, Any, Optional[str]]:
+    """One OpenAI request through the model's circuit breaker and the rate limiter; sets acquired once it holds a slot"""
+    breaker = get_llm_breaker(request["model"])
+    probe = breaker.before_call()
+    outcome = "abandoned"
     try:
-        # OpenAI requires 'json' word in messages when using response_format: json_object
-        enhanced_user_content = f"{user_content}\n\nRespond with valid JSON only."
+        await llm_rate_limiter.acquire(estimated)
+        if acquired is not None:
+            acquired.set()
+        started = time.monotonic()
+        try:
+            if on_field:
+                stream = await openai_client.chat.completions.create(
+                    stream=True,
+                    stream_options={"include_usage": True},
+                    **request
+                )
+                content, usage, model = await consume_completion_stream(stream, on_field, prompt_name)
+            else:
+                response = await openai_client.chat.completions.create(**request)
+                content, usage, model = response.choices[0].message.content, response.usage, response.model
+        except RateLimitError:
+            llm_throttled_total.inc(prompt=prompt_name)
+            await llm_rate_limiter.release(estimated, throttled=True)
+            raise
+        except LLM_TRANSIENT_ERRORS as e:
+            outcome = "failure"
+            llm_errors_total.inc(prompt=prompt_name, error=type(e).__name__)
+            await llm_rate_limiter.release(estimated)
+            raise
+        except BaseException as e:
+            # Cancellation (a lost hedge race) is not an error
+            if isinstance(e, Exception):
+                llm_errors_total.inc(prompt=prompt_name, error=type(e).__name__)
+            await llm_rate_limiter.release(estimated)
+            raise
+        outcome = "success"
+        llm_latency.observe(prompt_name, time.monotonic() - started)
+        await llm_rate_limiter.release(estimated, usage.total_tokens if usage else None)
+        return content, usage, model
+    finally:
+        breaker.record(outcome, probe)
+
+async def hedged_chat_completion(
+    prompt_name: str,
+    estimated: int,
+    on_field: Optional[Callable[[str, Any], Awaitable[None]]],
+    request: Dict[str, Any]
+) -> Tuple[str, Any, Optional[str]]:
+    """Send a request and, if it outlives the prompt's p95 once sent, race a duplicate against it"""
+    delay = llm_latency.hedge_delay(prompt_name) if LLM_HEDGING else None
+    if delay is None:
+        return await send_chat_completion(prompt_name, estimated, on_field, request)
+    
+    acquired = asyncio.Event()
+    primary = asyncio.create_task(send_chat_completion(prompt_name, estimated, on_field, request, acquired))
+    slot = asyncio.create_task(acquired.wait())
+    tasks = [primary, slot]
+    try:
+        # The p95 is measured from the limiter slot, so the hedge clock starts there too
+        await asyncio.wait({primary, slot}, return_when=asyncio.FIRST_COMPLETED)
+        if not primary.done():
+            await asyncio.wait({primary}, timeout=delay)
+        if primary.done():
+            return primary.result()
+        
+        if llm_rate_limiter.congested():
+            # A duplicate would queue behind the backlog and double the RPM/TPM charged while throttled
+            count_event(f"llm_hedge.skipped.{prompt_name}")
+            return await primary
         
-        response = openai_client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt + "\n\nYou must respond with valid JSON format only."},
-                {"role": "user", "content": enhanced_user_content}
-            ],
-            temperature=0.4,  # Slightly higher for more varied analysis
-            response_format={"type": "json_object"}
+        # The duplicate does not stream; partial fields keep coming from the primary
+        count_event(f"llm_hedge.issued.{prompt_name}")
+        hedge = asyncio.create_task(send_chat_completion(prompt_name, estimated, None, request))
+        tasks.append(hedge)
+        pending = {primary, hedge}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge:
+                        count_event(f"llm_hedge.won.{prompt_name}")
+                    return task.result()
+        raise primary.exception()
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                task.exception()
+
+async def create_chat_completion(prompt_name: str, on_field: Optional[Callable[[str, Any], Awaitable[None]]] = None, **request) -> Tuple[str, Any, Optional[str]]:
+    """Send a chat completion through the rate limiter, queueing through 429s.
+
+    With on_field the completion is streamed and each top-level JSON field is
+    reported as it closes. Slow calls are hedged, and callers of a model whose
+    circuit is open wait for its half-open probe. Cassette modes record or
+    replay completions at this layer. Returns (content, usage, model).
+    """
+    if LLM_CASSETTE_MODE == "replay":
+        return await llm_cassettes.replay(prompt_name, request, on_field)
+    
+    messages_text = "".join(m["content"] for m in request["messages"])
+    output_estimate = min(OPENAI_ESTIMATED_OUTPUT_TOKENS, request.get("max_completion_tokens") or OPENAI_ESTIMATED_OUTPUT_TOKENS)
+    estimated = estimate_tokens(messages_text) + output_estimate
+    
+    for attempt in range(OPENAI_MAX_THROTTLE_RETRIES + 1):
+        started = time.monotonic()
+        try:
+            response = await hedged_chat_completion(prompt_name, estimated, on_field, request)
+            if LLM_CASSETTE_MODE == "record":
+                await llm_cassettes.record(prompt_name, request, response, int((time.monotonic() - started) * 1000))
+            return response
+        except RateLimitError as e:
+            if getattr(e, "code", None) == "insufficient_quota" or attempt == OPENAI_MAX_THROTTLE_RETRIES:
+                raise
+            llm_rate_limiter.throttle(retry_after_seconds(e))
+            logger.warning(f"OpenAI rate limited ({prompt_name}), queued for retry {attempt + 1}")
+        except CircuitOpenError as e:
+            if attempt == OPENAI_MAX_THROTTLE_RETRIES:
+                raise
+            count_event(f"llm_breaker.rejected.{e.model}")
+            await asyncio.sleep(e.retry_in)
+
+def usage_to_dict(usage) -> Dict[str, int]:
+    """Token counts from an OpenAI usage payload, including prompt-cache hits"""
+    if usage is None:
+        return {"prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": usage.prompt_tokens or 0,
+        "completion_tokens": usage.completion_tokens or 0,
+        "cached_tokens": (getattr(details, "cached_tokens", 0) or 0) if details else 0
+    }
+
+@traced("call_llm", attributes=("prompt_name",))
+async def call_llm(
+    system_prompt: str,
+    user_content: str,
+    prompt_name: str,
+    instructions: str = "",
+    on_field: Optional[Callable[[str, Any], Awaitable[None]]] = None
+) -> Dict[str, Any]:
+    """Make independent LLM call with logging (streamed when on_field is given and LLM_STREAMING is on)"""
+    try:
+        route = get_llm_route(prompt_name)
+        started = time.monotonic()
+        content, response_usage, response_model = await create_chat_completion(
+            prompt_name,
+            on_field=on_field if LLM_STREAMING else None,
+            model=route["model"],
+            # The system message carries 'json', which response_format json_object requires
+            messages=build_llm_messages(system_prompt, user_content, instructions),
+            temperature=route["temperature"],
+            max_completion_tokens=route["max_tokens"],
+            timeout=route["timeout"],
+            response_format=get_response_format(prompt_name),
+            prompt_cache_key=f"{prompt_name}:{PROMPT_VERSIONS.get(prompt_name, 'unknown')}"
         )
         
-        result = json.loads(response.choices[0].message.content)
+        latency_ms = int((time.monotonic() - started) * 1000)
+        result = json.loads(content)
+        usage = usage_to_dict(response_usage)
+        cost_usd = llm_cost_usd(route["model"], usage)
+        schema_errors = validate_llm_output(prompt_name, result)
+        ledger = current_ledger.get()
+        if ledger:
+            ledger.record(prompt_name, usage, cost_usd, latency_ms, response_model or route["model"])
+        llm_request_seconds.observe(latency_ms / 1000, prompt=prompt_name)
+        set_span_attributes(
+            model=route["model"],
+            attempt=llm_attempt.get(),
+            prompt_tokens=usage["prompt_tokens"],
+            completion_tokens=usage["completion_tokens"],
+            cached_tokens=usage["cached_tokens"],
+            cost_usd=cost_usd,
+            schema_valid=None if schema_errors is None else not schema_errors
+        )
+        for token_type in ("prompt_tokens", "completion_tokens", "cached_tokens"):
+            llm_tokens_total.inc(usage[token_type], prompt=prompt_name, type=token_type.replace("_tokens", ""))
         
         # Log the call
-        await db.llm_logs.insert_one({
+        llm_log_sink.write({
             "prompt_name": prompt_name,
             "prompt_version": PROMPT_VERSIONS.get(prompt_name, "unknown"),
-            "model": "gpt-4o",
+            "model": route["model"],
+            "model_version": response_model,
             "timestamp": datetime.now(timezone.utc).isoformat(),
             "input_length": len(user_content),
+            "prompt_tokens": usage["prompt_tokens"],
+            "completion_tokens": usage["completion_tokens"],
+            "cached_tokens": usage["cached_tokens"],
+            "cost_usd": cost_usd,
+            "latency_ms": latency_ms,
+            "attempt": llm_attempt.get(),
+            "session_id": ledger.session_id if ledger else None,
+            "run_id": ledger.run_id if ledger else None,
+            "report_id": ledger.report_id if ledger else None,
+            "schema_version": SCHEMA_VERSIONS.get(PROMPT_OUTPUT_SCHEMAS.get(prompt_name, ""), None),
+            "schema_valid": None if schema_errors is None else not schema_errors,
+            "schema_errors": schema_errors or None,
             "output": result
         })
         
@@ -800,32 +2905,225 @@ async def call_llm(system_prompt: str, user_content: str, prompt_name: str) -> D
         logger.error(f"LLM call error ({prompt_name}): {e}")
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
+@traced("run_quality_audit", attributes=("section_name",))
 async def run_quality_audit(section_name: str, section_content: Dict, extraction_data: Dict = None) -> Dict:
     """Run quality auditor on a section with extraction context"""
-    audit_context = f"Section: {section_name}\nContent: {json.dumps(section_content, indent=2)}"
+    # Extraction data is identical for every audit in a session, so it goes before
+    # the section under review to extend the cacheable prefix
+    audit_context = ""
     if extraction_data:
-        audit_context += f"\n\nExtraction Data Available: {json.dumps(extraction_data, indent=2)}"
-    return await call_llm(QUALITY_AUDITOR_PROMPT, audit_context, "quality_auditor")
+        audit_context += f"Extraction Data Available: {json.dumps(extraction_data, indent=2)}\n\n"
+    audit_context += f"Section: {section_name}\nContent: {json.dumps(section_content, indent=2)}"
+    audit = await call_llm(QUALITY_AUDITOR_PROMPT, audit_context, "quality_auditor")
+    set_span_attributes(approved=bool(audit.get("approved", False)))
+    return audit
+
+def record_audit_outcome(section_name: str, approved: bool, source: str):
+    """Count an audit verdict and log it to llm_logs, one record per audited draft"""
+    section_audits_total.inc(section=section_name, outcome="approved" if approved else "rejected", source=source)
+    ledger = current_ledger.get()
+    llm_log_sink.write({
+        "prompt_name": "section_audit",
+        "section": section_name,
+        "audit_outcome": "approved" if approved else "rejected",
+        "audit_source": source,
+        "attempt": llm_attempt.get(),
+        # Drafts built on an unaudited upstream section may be thrown away with it
+        "speculative": current_speculative_run.get() is not None,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "session_id": ledger.session_id if ledger else None,
+        "run_id": ledger.run_id if ledger else None,
+        "report_id": ledger.report_id if ledger else None
+    })
+
+async def audit_section(
+    section_name: str,
+    result: Dict,
+    extraction_data: Dict = None,
+    on_llm_audit: Optional[Callable[[], None]] = None
+) -> Dict:
+    """Schema check and local pre-audit, then the LLM auditor for drafts that pass both"""
+    # Schema misses are rejected locally without spending an auditor call
+    schema_errors = validate_llm_output(section_name, result)
+    if schema_errors:
+        record_audit_outcome(section_name, False, "schema")
+        return {
+            "approved": False,
+            "rejection_reasons": ["Output does not match the required JSON schema"],
+            "specific_violations": schema_errors[:20],
+            "rewrite_instructions": "Return every field of the OUTPUT JSON structure exactly as specified."
+        }
+    
+    audit = local_pre_audit(section_name, result) if LOCAL_PRE_AUDIT else {"approved": True}
+    if not audit.get("approved", False):
+        count_event("auditor_calls_saved")
+        count_event(f"local_pre_audit_rejections.{section_name}")
+        record_audit_outcome(section_name, False, "local")
+        return audit
+    
+    if on_llm_audit:
+        on_llm_audit()
+    audit = await run_quality_audit(section_name, result, extraction_data)
+    record_audit_outcome(section_name, bool(audit.get("approved", False)), "llm")
+    return audit
+
+@traced("repair_section", attributes=("section_name",))
+async def repair_section(
+    prompt: str,
+    user_content: str,
+    section_name: str,
+    result: Dict,
+    audit: Dict[str, Any]
+) -> Optional[Dict]:
+    """Rewrite only the rejected paths of a draft; None when a full regeneration is needed"""
+    paths = section_repair_paths(section_name, result, audit)
+    if not paths or len(paths) > SECTION_REPAIR_MAX_PATHS:
+        return None
+    
+    repair_input = f"""{user_content}
+
+=== PREVIOUS OUTPUT ===
+{json.dumps(result, indent=2)}
 
-async def generate_section_with_retry(prompt: str, user_content: str, section_name: str, extraction_data: Dict = None, max_retries: int = 2) -> Dict:
-    """Generate a section with quality audit and retry logic"""
+=== PATHS TO REWRITE ===
+{chr(10).join(paths)}{retry_feedback(audit)}"""
+
+    try:
+        response = await call_llm(prompt, repair_input, "section_repair", SECTION_REPAIR_INSTRUCTIONS)
+    except HTTPException:
+        return None
+    
+    repairs = response.get("repairs")
+    if not isinstance(repairs, dict) or any(path not in repairs for path in paths):
+        return None
+    repaired = copy.deepcopy(result)
+    for path in paths:
+        if not set_json_path(repaired, path, repairs[path]):
+            return None
+    count_event(f"section_repairs.{section_name}")
+    return repaired
+
+async def generate_section_candidates(
+    prompt: str,
+    user_content: str,
+    section_name: str,
+    extraction_data: Dict = None,
+    candidates: int = SECTION_CANDIDATES,
+    instructions: str = "",
+    on_field: Optional[Callable[[str, Any], Awaitable[None]]] = None
+) -> Dict:
+    """Generate and audit several drafts concurrently; keep the first approved or the best-scoring one"""
+    async def candidate(index: int) -> Tuple[Dict, Dict]:
+        llm_attempt.set(index + 1)
+        # Only one draft streams its fields to the processing screen
+        result = await call_llm(prompt, user_content, section_name, instructions, on_field=on_field if index == 0 else None)
+        return result, await audit_section(section_name, result, extraction_data)
+    
+    if llm_budget_exhausted():
+        candidates = 1
+    tasks = [asyncio.create_task(candidate(index)) for index in range(candidates)]
+    best, last_error = None, None
+    try:
+        for finished in asyncio.as_completed(tasks):
+            try:
+                result, audit = await finished
+            except Exception as e:
+                last_error = e
+                continue
+            if audit.get("approved", False):
+                count_event(f"best_of_n.approved.{section_name}")
+                return result
+            score = audit_score(audit)
+            if best is None or score > best[0]:
+                best = (score, result)
+    finally:
+        for task in tasks:
+            task.cancel()
+    
+    if best is None:
+        raise last_error
+    logger.warning(f"Section {section_name}: no candidate approved out of {candidates}, keeping the best-scoring draft")
+    count_event(f"best_of_n.fallback.{section_name}")
+    return best[1]
+
+@traced("generate_section", attributes=("section_name",))
+async def generate_section_with_retry(
+    prompt: str,
+    user_content: str,
+    section_name: str,
+    extraction_data: Dict = None,
+    max_retries: int = 2,
+    instructions: str = "",
+    on_field: Optional[Callable[[str, Any], Awaitable[None]]] = None,
+    speculation: Optional[SectionSpeculation] = None,
+    next_stage: Optional[Tuple[str, SectionStage]] = None
+) -> Dict:
+    """Generate a section with quality audit and retry logic.
+
+    With speculation and next_stage, the next stage starts from each draft that
+    reaches the LLM auditor and is discarded if that draft is rejected.
+    In parallel mode the drafts are generated at once instead (no speculation).
+    In repair mode a rejected draft has only its offending paths rewritten when
+    they can be located.
+    """
+    if SECTION_GENERATION_MODE == "parallel":
+        return await generate_section_candidates(
+            prompt,
+            user_content,
+            section_name,
+            extraction_data=extraction_data,
+            candidates=SECTION_CANDIDATES,
+            instructions=instructions,
+            on_field=on_field
+        )
+    
+    if current_speculative_run.get() is not None:
+        # A draft built on an unaudited upstream section stays off the processing screen
+        on_field = None
+    llm_attempt.set(1)
+    result = await call_llm(prompt, user_content, section_name, instructions, on_field=on_field)
     for attempt in range(max_retries + 1):
-        result = await call_llm(prompt, user_content, section_name)
-        audit = await run_quality_audit(section_name, result, extraction_data)
+        speculate = None
+        if speculation and next_stage:
+            speculate = lambda: speculation.start(next_stage[0], result, next_stage[1])
+        try:
+            audit = await audit_section(section_name, result, extraction_data, on_llm_audit=speculate)
+        except BaseException:
+            if speculation and next_stage:
+                speculation.discard(next_stage[0], result)
+            raise
         
         if audit.get("approved", False):
             return result
         
+        if attempt < max_retries and llm_budget_exhausted():
+            logger.warning(f"Section {section_name} rejected but the session's LLM budget is spent, keeping the draft")
+            count_event(f"llm_budget_stops.{section_name}")
+            return result
+        
         if attempt < max_retries:
+            if speculation and next_stage:
+                speculation.discard(next_stage[0], result)
             logger.info(f"Section {section_name} rejected, retrying... Reasons: {audit.get('rejection_reasons')}")
-            rewrite_instructions = audit.get("rewrite_instructions", "")
-            user_content += f"\n\nPREVIOUS ATTEMPT REJECTED.\nViolations: {audit.get('specific_violations')}\nRewrite Instructions: {rewrite_instructions}\n\nYou MUST address multi-signal synthesis. DO NOT repeat single signals across sections."
+            section_retries_total.inc(section=section_name, mode=SECTION_RETRY_MODE)
+            if isinstance(on_field, PartialSectionWriter):
+                on_field.reset()
+            llm_attempt.set(attempt + 2)
+            repaired = None
+            if SECTION_RETRY_MODE == "repair":
+                repaired = await repair_section(prompt, user_content, section_name, result, audit)
+            if repaired is not None:
+                result = repaired
+            else:
+                # Only the latest feedback is carried, so the prompt does not grow per attempt
+                result = await call_llm(prompt, user_content + retry_feedback(audit), section_name, instructions, on_field=on_field)
         else:
             logger.warning(f"Section {section_name} failed quality audit after {max_retries} retries")
             return result
     
     return result
 
+@traced("generate_pdf_report")
 def generate_pdf_report(report_data: Dict, session_data: Dict) -> bytes:
     """Generate PDF report using ReportLab (v3.0)"""
     buffer = io.BytesIO()
@@ -981,6 +3279,7 @@ def generate_pdf_report(report_data: Dict, session_data: Dict) -> bytes:
     buffer.seek(0)
     return buffer.getvalue()
 
+@traced("send_email_with_pdf")
 async def send_email_with_pdf(email: str, pdf_content: bytes, session_data: Dict):
     """Send email with PDF attachment via SendGrid"""
     try:
@@ -1013,7 +3312,7 @@ async def send_email_with_pdf(email: str, pdf_content: bytes, session_data: Dict
         )
         message.attachment = attachment
         
-        sg = SendGridAPIClient(SENDGRID_API_KEY)
+        sg = SendGridAPIClient(SENDGRID_API_KEY, host=SENDGRID_API_HOST)
         response = sg.send(message)
         logger.info(f"Email sent to {email}, status: {response.status_code}")
         return response.status_code == 202
@@ -1021,6 +3320,511 @@ async def send_email_with_pdf(email: str, pdf_content: bytes, session_data: Dict
         logger.error(f"Email send error: {e}")
         return False
 
+# ============== PAYMENT GATEWAY ==============
+
+class PaymentGatewayError(Exception):
+    """Raised when Razorpay is unreachable or rejects a request"""
+
+class RazorpayGateway:
+    """Async Razorpay adapter over a pooled HTTP client.
+
+    Order calls go straight to the Razorpay REST API so they never block the
+    event loop; signature checks reuse the SDK utility in a worker thread.
+    """
+
+    def __init__(self, key_id: str, key_secret: str, base_url: str, timeout: float, max_connections: int):
+        self._auth = (key_id or "", key_secret or "")
+        self._base_url = base_url
+        self._timeout = httpx.Timeout(timeout, connect=min(timeout, 5.0))
+        self._limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self._base_url,
+                auth=self._auth,
+                timeout=self._timeout,
+                limits=self._limits
+            )
+        return self._client
+
+    async def _request(self, method: str, path: str, **kwargs) -> Dict[str, Any]:
+        try:
+            response = await self._get_client().request(method, path, **kwargs)
+        except httpx.HTTPError as e:
+            raise PaymentGatewayError(f"Razorpay request failed: {e}") from e
+        if response.status_code >= 400:
+            raise PaymentGatewayError(f"Razorpay returned {response.status_code}: {response.text[:200]}")
+        return response.json()
+
+    async def create_order(self, amount: int, notes: Dict[str, Any], currency: str = "INR") -> Dict[str, Any]:
+        return await self._request("POST", "/orders", json={
+            "amount": amount,
+            "currency": currency,
+            "payment_capture": 1,
+            "notes": notes
+        })
+
+    async def verify_payment_signature(self, order_id: str, payment_id: str, signature: str) -> None:
+        """Raises razorpay.errors.SignatureVerificationError on mismatch"""
+        await asyncio.to_thread(razorpay_client.utility.verify_payment_signature, {
+            'razorpay_order_id': order_id,
+            'razorpay_payment_id': payment_id,
+            'razorpay_signature': signature
+        })
+
+    async def verify_webhook_signature(self, body: str, signature: str, secret: str) -> None:
+        """Raises razorpay.errors.SignatureVerificationError on mismatch"""
+        await asyncio.to_thread(razorpay_client.utility.verify_webhook_signature, body, signature, secret)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+payment_gateway = RazorpayGateway(
+    RAZORPAY_KEY_ID,
+    RAZORPAY_KEY_SECRET,
+    RAZORPAY_API_BASE,
+    RAZORPAY_TIMEOUT_SECONDS,
+    RAZORPAY_MAX_CONNECTIONS
+)
+
+# ============== ADMIN AUTH ==============
+
+async def require_admin(x_admin_key: Optional[str] = Header(None)):
+    """Guard for operational endpoints; disabled entirely when ADMIN_API_KEY is unset"""
+    # Header values arrive latin-1 decoded; bytes keep a non-ASCII key a 403, not a TypeError
+    if not ADMIN_API_KEY or not x_admin_key or not hmac.compare_digest(x_admin_key.encode("latin-1"), ADMIN_API_KEY.encode()):
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+# ============== PIPELINE RUN CLAIMS ==============
+# Every pipeline run holds a run_id token on the session. Claims are single
+# conditional updates, so concurrent triggers (double clicks, retries, the
+# payment webhook racing the browser) start at most one pipeline.
+
+async def claim_analysis_run(session_id: str) -> Optional[str]:
+    """Move a paid session into processing; returns the run token, or None if a run already owns it"""
+    run_id = str(uuid.uuid4())
+    claimed = await db.sessions.find_one_and_update(
+        {
+            "session_id": session_id,
+            "payment_status": "completed",
+            "status": {"$nin": ["processing", "completed"]}
+        },
+        {"$set": {
+            "status": "processing",
+            "run_id": run_id,
+            "analysis_started_at": datetime.now(timezone.utc).isoformat()
+        }},
+        projection={"_id": 0, "run_id": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    return run_id if claimed else None
+
+async def claim_upgrade_run(session_id: str, order_id: str, payment_id: str) -> Optional[Tuple[str, int]]:
+    """Apply a paid upgrade order once; returns (run token, new tier), or None if already applied"""
+    run_id = str(uuid.uuid4())
+    previous = await db.sessions.find_one_and_update(
+        {
+            "session_id": session_id,
+            "upgrade_order_id": order_id,
+            "pending_upgrade_tier": {"$exists": True},
+            "status": {"$ne": "processing"}
+        },
+        [
+            {"$set": {
+                "tier": "$pending_upgrade_tier",
+                "status": "processing",
+                "run_id": run_id,
+                "upgrade_payment_id": payment_id,
+                "upgrade_started_at": datetime.now(timezone.utc).isoformat()
+            }},
+            {"$unset": "pending_upgrade_tier"}
+        ],
+        projection={"_id": 0, "pending_upgrade_tier": 1},
+        return_document=ReturnDocument.BEFORE
+    )
+    if not previous:
+        return None
+    return run_id, previous["pending_upgrade_tier"]
+
+# ============== EVENT LOOP WATCHDOG ==============
+
+# A heartbeat coroutine measures how late the loop wakes it (scheduling lag). A
+# watchdog thread notices when the heartbeat is overdue and grabs the loop
+# thread's stack while the blocking call is still running.
+EVENT_LOOP_WATCHDOG = os.environ.get('EVENT_LOOP_WATCHDOG', 'true').lower() == 'true'
+EVENT_LOOP_HEARTBEAT_SECONDS = float(os.environ.get('EVENT_LOOP_HEARTBEAT_SECONDS', '0.1'))
+EVENT_LOOP_STALL_SECONDS = float(os.environ.get('EVENT_LOOP_STALL_SECONDS', '0.25'))
+EVENT_LOOP_RECENT_STALLS = int(os.environ.get('EVENT_LOOP_RECENT_STALLS', '50'))
+
+event_loop_lag_seconds = metrics.register(Histogram(
+    "careeriq_event_loop_lag_seconds", "How late the event loop ran the heartbeat",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)))
+event_loop_stalls_total = metrics.register(Counter(
+    "careeriq_event_loop_stalls_total", "Event loop stalls over the threshold by blocking call site", ("site",)))
+event_loop_blocked_seconds_total = metrics.register(Counter(
+    "careeriq_event_loop_blocked_seconds_total", "Seconds the event loop was blocked by call site", ("site",)))
+
+def blocking_site(frame) -> Tuple[str, str]:
+    """(innermost app frame, innermost frame) of a stack, as "function (file:line)" """
+    innermost = f"{frame.f_code.co_name} ({Path(frame.f_code.co_filename).name}:{frame.f_lineno})"
+    while frame is not None:
+        if Path(frame.f_code.co_filename).parent == ROOT_DIR:
+            return f"{frame.f_code.co_name} ({Path(frame.f_code.co_filename).name}:{frame.f_lineno})", innermost
+        frame = frame.f_back
+    return innermost, innermost
+
+class EventLoopWatchdog:
+    def __init__(self, interval: float = EVENT_LOOP_HEARTBEAT_SECONDS, threshold: float = EVENT_LOOP_STALL_SECONDS):
+        self.interval = interval
+        self.threshold = threshold
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.loop_thread_id: Optional[int] = None
+        self.task: Optional[asyncio.Task] = None
+        self.thread: Optional[threading.Thread] = None
+        self.stopping = threading.Event()
+        self.lock = threading.Lock()
+        self.last_beat = time.monotonic()
+        self.captured_beat: Optional[float] = None
+        self.open_stall: Optional[Dict[str, Any]] = None
+        self.lags: deque = deque(maxlen=600)
+        self.stalls: deque = deque(maxlen=EVENT_LOOP_RECENT_STALLS)
+        self.sites: Dict[str, Dict[str, Any]] = {}
+
+    def start(self):
+        if self.task is not None:
+            return
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self.stopping.clear()
+        self.task = asyncio.create_task(self._heartbeat())
+        self.thread = threading.Thread(target=self._watch, name="event-loop-watchdog", daemon=True)
+        self.thread.start()
+
+    async def stop(self):
+        self.stopping.set()
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self.last_beat = now
+            self.lags.append(lag)
+            event_loop_lag_seconds.observe(lag)
+            with self.lock:
+                stall, self.open_stall = self.open_stall, None
+            if stall is not None:
+                self._close_stall(stall, lag)
+
+    def _watch(self):
+        """Runs on its own thread; the loop thread may be stuck in blocking code"""
+        while not self.stopping.wait(self.interval / 2):
+            beat = self.last_beat
+            overdue = time.monotonic() - beat - self.interval
+            if overdue < self.threshold or self.captured_beat == beat:
+                continue
+            self.captured_beat = beat
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is None:
+                continue
+            site, blocked_in = blocking_site(frame)
+            task = asyncio.current_task(self.loop)
+            with self.lock:
+                self.open_stall = {
+                    "site": site,
+                    "blocked_in": blocked_in,
+                    "task": task.get_name() if task else None,
+                    "coroutine": getattr(task.get_coro(), "__qualname__", None) if task else None,
+                    "detected_at": datetime.now(timezone.utc).isoformat(),
+                    "stack": traceback.format_stack(frame)[-25:]
+                }
+
+    def _close_stall(self, stall: Dict[str, Any], blocked_seconds: float):
+        stall["blocked_seconds"] = round(blocked_seconds, 3)
+        site = stall["site"]
+        event_loop_stalls_total.inc(site=site)
+        event_loop_blocked_seconds_total.inc(blocked_seconds, site=site)
+        known = self.sites.get(site)
+        if known is None:
+            known = self.sites[site] = {"stalls": 0, "blocked_seconds": 0.0, "max_seconds": 0.0, "stack": stall["stack"]}
+            logger.warning(f"Event loop blocked {blocked_seconds:.2f}s in {stall['blocked_in']} from {site}:\n{''.join(stall['stack'])}")
+        else:
+            logger.warning(f"Event loop blocked {blocked_seconds:.2f}s in {stall['blocked_in']} from {site}")
+        known["stalls"] += 1
+        known["blocked_seconds"] += blocked_seconds
+        known["max_seconds"] = max(known["max_seconds"], blocked_seconds)
+        known["last_seen"] = stall["detected_at"]
+        known["blocked_in"] = stall["blocked_in"]
+        self.stalls.append({key: value for key, value in stall.items() if key != "stack"})
+
+    def snapshot(self) -> Dict[str, Any]:
+        lags = list(self.lags)
+        return {
+            "enabled": self.task is not None,
+            "heartbeat_seconds": self.interval,
+            "stall_threshold_seconds": self.threshold,
+            "lag_ms": {
+                "samples": len(lags),
+                "p50": round((percentile(lags, 0.5) or 0) * 1000, 2),
+                "p99": round((percentile(lags, 0.99) or 0) * 1000, 2),
+                "max": round(max(lags, default=0) * 1000, 2)
+            },
+            "blocking_sites": dict(sorted(
+                ((site, {**stats, "blocked_seconds": round(stats["blocked_seconds"], 3), "max_seconds": round(stats["max_seconds"], 3)})
+                 for site, stats in self.sites.items()),
+                key=lambda item: item[1]["blocked_seconds"],
+                reverse=True
+            )),
+            "recent_stalls": list(self.stalls)
+        }
+
+event_loop_watchdog = EventLoopWatchdog()
+
+# ============== PROFILING ==============
+# On-demand sampling profiler. A daemon thread reads sys._current_frames() at
+# PROFILE_INTERVAL_MS and counts collapsed stacks ("root;...;leaf count", the
+# input format of flamegraph.pl and speedscope). tracemalloc runs alongside
+# when memory is requested. Three triggers: POST /api/admin/profile, SIGUSR2
+# (writes to PROFILE_DIR), and an admin "X-Profile" header on a single
+# /upload or /send-report call. Only one profile runs at a time. Memory is
+# opt-in: tracing every allocation slows the worker down several times over,
+# and the snapshot is summarized on a worker thread, off the event loop.
+PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', '10'))
+PROFILE_MAX_SECONDS = float(os.environ.get('PROFILE_MAX_SECONDS', '60'))
+PROFILE_SIGNAL_SECONDS = float(os.environ.get('PROFILE_SIGNAL_SECONDS', '30'))
+PROFILE_DIR = Path(os.environ.get('PROFILE_DIR', str(ROOT_DIR / 'profiles')))
+PROFILE_TOP = int(os.environ.get('PROFILE_TOP', '25'))
+PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', '20'))
+PROFILE_TRACEMALLOC_FRAMES = int(os.environ.get('PROFILE_TRACEMALLOC_FRAMES', '10'))
+PROFILE_SIGNAL_MEMORY = os.environ.get('PROFILE_SIGNAL_MEMORY', 'false').lower() == 'true'
+PROFILE_REQUEST_PATHS = {"/api/upload", "/api/send-report"}
+
+profile_lock = threading.Lock()
+recent_profiles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+def frame_label(code) -> str:
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+class StackSampler:
+    """Counts collapsed stacks of the selected threads until stopped.
+
+    With an anchor frame only stacks passing through it are kept, trimmed to
+    start there, which isolates one request's task on the shared loop thread.
+    """
+
+    def __init__(self, interval: float, thread_ids: Optional[set] = None, anchor=None):
+        self.interval = interval
+        self.thread_ids = thread_ids
+        self.anchor = anchor
+        self.stacks: Dict[str, int] = defaultdict(int)
+        self.samples = 0
+        self.ticks = 0
+        self.busy_seconds = 0.0
+        self.labels: Dict[Any, str] = {}
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopping.set()
+        self.thread.join()
+
+    def _run(self):
+        while not self.stopping.wait(self.interval):
+            started = time.perf_counter()
+            self.sample()
+            self.busy_seconds += time.perf_counter() - started
+
+    def sample(self):
+        self.ticks += 1
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own or (self.thread_ids is not None and thread_id not in self.thread_ids):
+                continue
+            stack = []
+            while frame is not None:
+                label = self.labels.get(frame.f_code)
+                if label is None:
+                    label = self.labels[frame.f_code] = frame_label(frame.f_code)
+                stack.append(label)
+                if frame is self.anchor:
+                    break
+                frame = frame.f_back
+            if self.anchor is not None and frame is None:
+                continue
+            if self.anchor is None:
+                stack.append(names.get(thread_id, str(thread_id)))
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+def allocation_report(snapshot, top: int) -> List[Dict[str, Any]]:
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")
+    ))
+    return [
+        {
+            "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "size_kb": round(stat.size / 1024, 1),
+            "blocks": stat.count
+        }
+        for stat in snapshot.statistics("lineno")[:top]
+    ]
+
+def hot_frames(stacks: Dict[str, int], top: int) -> List[Dict[str, Any]]:
+    """Per-frame self and total sample counts, hottest self time first"""
+    self_counts: Dict[str, int] = defaultdict(int)
+    total_counts: Dict[str, int] = defaultdict(int)
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        self_counts[frames[-1]] += count
+        for frame in set(frames):
+            total_counts[frame] += count
+    ranked = sorted(total_counts, key=lambda frame: (self_counts.get(frame, 0), total_counts[frame]), reverse=True)
+    return [{"frame": frame, "self": self_counts.get(frame, 0), "total": total_counts[frame]} for frame in ranked[:top]]
+
+class ProfileSession:
+    def __init__(self, kind: str, interval: float, memory: bool, thread_ids: Optional[set] = None, anchor=None, context: Optional[Dict[str, Any]] = None):
+        self.profile_id = str(uuid.uuid4())
+        self.kind = kind
+        self.memory = memory
+        self.context = context or {}
+        self.sampler = StackSampler(interval, thread_ids, anchor)
+        self.started_tracemalloc = False
+        self.started_at = None
+        self.started = 0.0
+
+    def start(self) -> bool:
+        """False when another profile is already running"""
+        if not profile_lock.acquire(blocking=False):
+            return False
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start(PROFILE_TRACEMALLOC_FRAMES)
+            self.started_tracemalloc = True
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.started = time.monotonic()
+        self.sampler.start()
+        return True
+
+    async def finish(self, top: int = PROFILE_TOP) -> Dict[str, Any]:
+        """Stop and summarize on a worker thread; shielded so a cancelled caller cannot leave the lock held"""
+        profile = await asyncio.shield(asyncio.to_thread(self.collect, top))
+        recent_profiles[self.profile_id] = profile
+        while len(recent_profiles) > PROFILE_KEEP:
+            recent_profiles.popitem(last=False)
+        count_event(f"profiles.{self.kind}")
+        return profile
+
+    def collect(self, top: int) -> Dict[str, Any]:
+        """Blocking: joins the sampler and filters the tracemalloc snapshot"""
+        try:
+            self.sampler.stop()
+            duration = time.monotonic() - self.started
+            allocations = None
+            if self.memory and tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                allocations = {
+                    "traced_kb": round(current / 1024, 1),
+                    "peak_kb": round(peak / 1024, 1),
+                    "top": allocation_report(tracemalloc.take_snapshot(), top)
+                }
+        finally:
+            if self.started_tracemalloc:
+                tracemalloc.stop()
+            profile_lock.release()
+        stacks = self.sampler.stacks
+        return {
+            "profile_id": self.profile_id,
+            "kind": self.kind,
+            **self.context,
+            "started_at": self.started_at,
+            "duration_seconds": round(duration, 3),
+            "interval_ms": round(self.sampler.interval * 1000, 2),
+            "samples": self.sampler.samples,
+            "sampler_overhead_pct": round(100 * self.sampler.busy_seconds / duration, 2) if duration else 0.0,
+            "hot_frames": hot_frames(stacks, top),
+            "allocations": allocations,
+            "collapsed": "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items(), key=lambda item: -item[1]))
+        }
+
+def profile_summary(profile: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in profile.items() if key not in ("collapsed", "hot_frames", "allocations")}
+
+async def profile_to_disk(seconds: float = PROFILE_SIGNAL_SECONDS):
+    """SIGUSR2 handler body: profile every thread and write .collapsed and .json files"""
+    session = ProfileSession("signal", PROFILE_INTERVAL_MS / 1000, memory=PROFILE_SIGNAL_MEMORY)
+    if not session.start():
+        logger.warning("Profile signal ignored: a profile is already running")
+        return
+    logger.info(f"Profiling all threads for {seconds:.0f}s (profile {session.profile_id})")
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profile = await session.finish()
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    stem = PROFILE_DIR / f"profile-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}-{profile['profile_id'][:8]}"
+    async with aiofiles.open(stem.with_suffix(".collapsed"), "w") as f:
+        await f.write(profile["collapsed"])
+    async with aiofiles.open(stem.with_suffix(".json"), "w") as f:
+        await f.write(json.dumps(profile, indent=2))
+    logger.info(f"Profile written to {stem}.collapsed ({profile['samples']} samples)")
+
+class RequestProfileMiddleware:
+    """Profiles a single /upload or /send-report call sent with an admin key and "X-Profile: cpu|memory".
+
+    Only the loop thread is sampled, and only while it runs this request's
+    task; the profile id comes back in the X-Profile-Id response header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in PROFILE_REQUEST_PATHS:
+            return await self.app(scope, receive, send)
+        headers = dict(scope["headers"])
+        mode = headers.get(b"x-profile", b"").decode("latin-1").lower()
+        # Compared as bytes: compare_digest rejects str with non-ASCII characters
+        admin_key = headers.get(b"x-admin-key", b"")
+        if not mode or not ADMIN_API_KEY or not hmac.compare_digest(admin_key, ADMIN_API_KEY.encode()):
+            return await self.app(scope, receive, send)
+        session = ProfileSession(
+            "request",
+            PROFILE_INTERVAL_MS / 1000,
+            memory=mode == "memory",
+            thread_ids={threading.get_ident()},
+            anchor=sys._getframe(),
+            context={"method": scope["method"], "path": scope["path"]}
+        )
+        if not session.start():
+            return await self.app(scope, receive, send)
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", session.profile_id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            await session.finish()
+
 # ============== API ENDPOINTS ==============
 
 @api_router.get("/")
@@ -1031,7 +3835,177 @@ async def root():
 async def health_check():
     return {"status": "healthy", "service": "careeriq-backend", "version": "3.1"}
 
+@api_router.get("/admin/llm-limiter", dependencies=[Depends(require_admin)])
+async def get_llm_limiter_status():
+    """Current OpenAI budget use: concurrency, queue depth and RPM/TPM headroom,
+    plus per-prompt latency percentiles and per-model circuit breaker state"""
+    return {
+        **llm_rate_limiter.snapshot(),
+        "latency": llm_latency.snapshot(),
+        "breakers": {model: breaker.snapshot() for model, breaker in llm_breakers.items()}
+    }
+
+@api_router.get("/admin/event-loop", dependencies=[Depends(require_admin)])
+async def get_event_loop_status():
+    """Event loop lag percentiles and the call sites that blocked it, worst first"""
+    return event_loop_watchdog.snapshot()
+
+@api_router.post("/admin/profile", dependencies=[Depends(require_admin)])
+async def profile_workers(
+    seconds: float = 10,
+    interval_ms: float = PROFILE_INTERVAL_MS,
+    memory: bool = False,
+    top: int = PROFILE_TOP,
+    format: str = "json"
+):
+    """Sample every thread of this worker for N seconds; format=collapsed returns flamegraph input"""
+    if not 0 < seconds <= PROFILE_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be between 0 and {PROFILE_MAX_SECONDS:g}")
+    if interval_ms < 1:
+        raise HTTPException(status_code=400, detail="interval_ms must be at least 1")
+    session = ProfileSession("window", interval_ms / 1000, memory)
+    if not session.start():
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profile = await session.finish(top)
+    if format == "collapsed":
+        return PlainTextResponse(profile["collapsed"])
+    return profile
+
+@api_router.get("/admin/profiles", dependencies=[Depends(require_admin)])
+async def list_profiles():
+    """Recent profiles from any trigger, newest first"""
+    return [profile_summary(profile) for profile in reversed(recent_profiles.values())]
+
+@api_router.get("/admin/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+async def get_profile(profile_id: str, format: str = "json"):
+    profile = recent_profiles.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "collapsed":
+        return PlainTextResponse(profile["collapsed"])
+    return profile
+
+@api_router.get("/admin/prompt-cache", dependencies=[Depends(require_admin)])
+async def get_prompt_cache_stats(hours: int = 24):
+    """Provider prefix-cache hit rate per prompt over the last N hours"""
+    since = (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()
+    rows = await db.llm_logs.aggregate([
+        {"$match": {"timestamp": {"$gte": since}, "prompt_tokens": {"$exists": True}}},
+        {"$group": {
+            "_id": "$prompt_name",
+            "calls": {"$sum": 1},
+            "calls_with_cache_hit": {"$sum": {"$cond": [{"$gt": ["$cached_tokens", 0]}, 1, 0]}},
+            "prompt_tokens": {"$sum": "$prompt_tokens"},
+            "cached_tokens": {"$sum": "$cached_tokens"}
+        }},
+        {"$sort": {"_id": 1}}
+    ]).to_list(length=None)
+    
+    return {
+        "window_hours": hours,
+        "prompts": [{
+            "prompt_name": row["_id"],
+            "prompt_version": PROMPT_VERSIONS.get(row["_id"], "unknown"),
+            "calls": row["calls"],
+            "calls_with_cache_hit": row["calls_with_cache_hit"],
+            "prompt_tokens": row["prompt_tokens"],
+            "cached_tokens": row["cached_tokens"],
+            "token_hit_rate": round(row["cached_tokens"] / row["prompt_tokens"], 4) if row["prompt_tokens"] else 0.0
+        } for row in rows]
+    }
+
+@api_router.get("/admin/schema-validation", dependencies=[Depends(require_admin)])
+async def get_schema_validation_stats(hours: int = 24):
+    """Local schema validation failure rate per prompt over the last N hours"""
+    since = (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()
+    rows = await db.llm_logs.aggregate([
+        {"$match": {"timestamp": {"$gte": since}, "schema_valid": {"$in": [True, False]}}},
+        {"$group": {
+            "_id": {"prompt_name": "$prompt_name", "schema_version": "$schema_version"},
+            "calls": {"$sum": 1},
+            "failures": {"$sum": {"$cond": ["$schema_valid", 0, 1]}}
+        }},
+        {"$sort": {"_id.prompt_name": 1}}
+    ]).to_list(length=None)
+    
+    return {
+        "window_hours": hours,
+        "strict_schemas": LLM_STRICT_SCHEMAS,
+        "prompts": [{
+            "prompt_name": row["_id"]["prompt_name"],
+            "schema_version": row["_id"]["schema_version"],
+            "calls": row["calls"],
+            "failures": row["failures"],
+            "failure_rate": round(row["failures"] / row["calls"], 4)
+        } for row in rows]
+    }
+
+@api_router.get("/admin/llm-ledger", dependencies=[Depends(require_admin)])
+async def get_llm_ledger(hours: int = 24):
+    """Per-stage LLM latency percentiles and cost over the last N hours, plus cost per tier"""
+    since = (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()
+    stage_rows = await db.llm_logs.aggregate([
+        {"$match": {"timestamp": {"$gte": since}, "latency_ms": {"$exists": True}}},
+        {"$group": {
+            "_id": "$prompt_name",
+            "calls": {"$sum": 1},
+            "latencies": {"$push": "$latency_ms"},
+            "retries": {"$sum": {"$cond": [{"$gt": ["$attempt", 1]}, 1, 0]}},
+            "cost_usd": {"$sum": "$cost_usd"}
+        }},
+        {"$sort": {"_id": 1}}
+    ]).to_list(length=None)
+    tier_rows = await db.sessions.aggregate([
+        {"$match": {"completed_at": {"$gte": since}, "llm_usage": {"$exists": True}}},
+        {"$group": {
+            "_id": "$tier",
+            "sessions": {"$sum": 1},
+            "costs": {"$push": "$llm_usage.cost_usd"},
+            "avg_tokens": {"$avg": {"$add": ["$llm_usage.prompt_tokens", "$llm_usage.completion_tokens"]}},
+            "avg_llm_latency_ms": {"$avg": "$llm_usage.latency_ms"}
+        }},
+        {"$sort": {"_id": 1}}
+    ]).to_list(length=None)
+    
+    return {
+        "window_hours": hours,
+        "usd_inr_rate": USD_INR_RATE,
+        "stages": [{
+            "prompt_name": row["_id"],
+            "calls": row["calls"],
+            "retry_calls": row["retries"],
+            "p50_latency_ms": percentile(row["latencies"], 0.5),
+            "p95_latency_ms": percentile(row["latencies"], 0.95),
+            "cost_usd": round(row["cost_usd"], 4)
+        } for row in stage_rows],
+        "tiers": [{
+            "tier": row["_id"],
+            "sessions": row["sessions"],
+            "avg_cost_usd": round(sum(row["costs"]) / row["sessions"], 4),
+            "p95_cost_usd": round(percentile(row["costs"], 0.95) or 0, 4),
+            "avg_cost_inr": round(sum(row["costs"]) / row["sessions"] * USD_INR_RATE, 2),
+            "avg_tokens": int(row["avg_tokens"] or 0),
+            "avg_llm_latency_ms": int(row["avg_llm_latency_ms"] or 0)
+        } for row in tier_rows]
+    }
+
+@api_router.get("/admin/pipeline-counters", dependencies=[Depends(require_admin)])
+async def get_pipeline_counters():
+    """Process-local pipeline efficiency counters since worker start"""
+    speculation = {}
+    for section_key in ("risk", "execution", "decisions"):
+        hits = pipeline_counters.get(f"speculation.hits.{section_key}", 0)
+        misses = pipeline_counters.get(f"speculation.misses.{section_key}", 0)
+        cancelled = pipeline_counters.get(f"speculation.cancelled.{section_key}", 0)
+        if hits + misses:
+            speculation[section_key] = {"hits": hits, "misses": misses, "cancelled": cancelled, "hit_rate": round(hits / (hits + misses), 3)}
+    return {**pipeline_counters, "speculation": speculation}
+
 @api_router.post("/upload")
+@traced("upload_files")
 async def upload_files(
     resume: UploadFile = File(...),
     target_role: str = Form(...),
@@ -1046,6 +4020,7 @@ async def upload_files(
 ):
     """Upload resume and optional LinkedIn PDF files - Simplified flow"""
     session_id = str(uuid.uuid4())
+    bind_trace_session(session_id)
     
     # Read resume file
     resume_content = await resume.read()
@@ -1119,6 +4094,7 @@ async def upload_files(
     }
 
 @api_router.post("/create-order", response_model=OrderResponse)
+@traced("create_order", session="order.session_id")
 async def create_order(order: OrderCreate):
     """Create Razorpay order for payment"""
     if order.tier not in [499, 2999, 4498]:
@@ -1128,15 +4104,24 @@ async def create_order(order: OrderCreate):
     if not session:
         raise HTTPException(status_code=404, detail="Session not found. Please upload files first.")
     
-    razorpay_order = razorpay_client.order.create({
-        "amount": order.tier * 100,
-        "currency": "INR",
-        "payment_capture": 1,
-        "notes": {
+    # Reuse the unpaid order from a previous attempt instead of creating a new one
+    existing_order_id = session.get("razorpay_order_id")
+    if existing_order_id and session.get("tier") == order.tier and session.get("payment_status") != "completed":
+        return OrderResponse(
+            order_id=existing_order_id,
+            amount=order.tier * 100,
+            currency="INR",
+            session_id=order.session_id
+        )
+    
+    try:
+        razorpay_order = await payment_gateway.create_order(order.tier * 100, {
             "session_id": order.session_id,
             "tier": order.tier
-        }
-    })
+        })
+    except PaymentGatewayError as e:
+        logger.error(f"Order creation failed: {e}")
+        raise HTTPException(status_code=502, detail="Payment gateway unavailable. Please try again.")
     
     await db.sessions.update_one(
         {"session_id": order.session_id},
@@ -1155,14 +4140,15 @@ async def create_order(order: OrderCreate):
     )
 
 @api_router.post("/verify-payment")
+@traced("verify_payment", session="payment.session_id")
 async def verify_payment(payment: PaymentVerify):
     """Verify Razorpay payment"""
     try:
-        razorpay_client.utility.verify_payment_signature({
-            'razorpay_order_id': payment.razorpay_order_id,
-            'razorpay_payment_id': payment.razorpay_payment_id,
-            'razorpay_signature': payment.razorpay_signature
-        })
+        await payment_gateway.verify_payment_signature(
+            payment.razorpay_order_id,
+            payment.razorpay_payment_id,
+            payment.razorpay_signature
+        )
     except Exception as e:
         logger.error(f"Payment verification failed: {e}")
         raise HTTPException(status_code=400, detail="Payment verification failed")
@@ -1197,10 +4183,104 @@ async def verify_payment(payment: PaymentVerify):
     
     return {"status": "success", "message": "Payment verified. You can now start analysis."}
 
+@api_router.post("/razorpay-webhook")
+async def razorpay_webhook(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    x_razorpay_signature: Optional[str] = Header(None)
+):
+    """Razorpay webhook: marks the session paid and starts processing without waiting for the browser"""
+    if not RAZORPAY_WEBHOOK_SECRET:
+        raise HTTPException(status_code=503, detail="Webhook not configured")
+    
+    body = (await request.body()).decode()
+    try:
+        await payment_gateway.verify_webhook_signature(body, x_razorpay_signature or "", RAZORPAY_WEBHOOK_SECRET)
+    except Exception:
+        logger.warning("Razorpay webhook signature verification failed")
+        raise HTTPException(status_code=400, detail="Invalid webhook signature")
+    
+    event = json.loads(body)
+    event_type = event.get("event")
+    if event_type not in ("payment.captured", "order.paid"):
+        return {"status": "ignored", "event": event_type}
+    
+    payment_entity = event.get("payload", {}).get("payment", {}).get("entity", {})
+    order_entity = event.get("payload", {}).get("order", {}).get("entity", {})
+    payment_id = payment_entity.get("id")
+    order_id = payment_entity.get("order_id") or order_entity.get("id")
+    if not payment_id or not order_id:
+        return {"status": "ignored", "event": event_type}
+    
+    # payment.captured and order.paid both fire for one payment, and Razorpay
+    # redelivers on timeouts - only the first delivery per payment is processed
+    try:
+        claim = await db.payment_events.update_one(
+            {"payment_id": payment_id},
+            {"$setOnInsert": {
+                "payment_id": payment_id,
+                "order_id": order_id,
+                "event": event_type,
+                "received_at": datetime.now(timezone.utc).isoformat()
+            }},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        return {"status": "duplicate"}
+    if claim.upserted_id is None:
+        return {"status": "duplicate"}
+    
+    try:
+        session = await db.sessions.find_one(
+            {"$or": [{"razorpay_order_id": order_id}, {"upgrade_order_id": order_id}]},
+            {"_id": 0, "session_id": 1, "upgrade_order_id": 1}
+        )
+        if not session:
+            raise HTTPException(status_code=404, detail="No session for order")
+        session_id = session["session_id"]
+        
+        if session.get("upgrade_order_id") == order_id:
+            upgrade_claim = await claim_upgrade_run(session_id, order_id, payment_id)
+            if upgrade_claim:
+                run_id, new_tier = upgrade_claim
+                background_tasks.add_task(run_upgrade_pipeline, session_id, new_tier, run_id)
+        else:
+            await db.sessions.update_one(
+                {"session_id": session_id, "payment_status": {"$ne": "completed"}},
+                {"$set": {
+                    "payment_status": "completed",
+                    "razorpay_payment_id": payment_id,
+                    "payment_verified_at": datetime.now(timezone.utc).isoformat(),
+                    "payment_verified_by": "webhook"
+                }}
+            )
+            run_id = await claim_analysis_run(session_id)
+            if run_id:
+                background_tasks.add_task(run_analysis_pipeline, session_id, run_id)
+    except Exception:
+        # Release the claim so Razorpay's redelivery can retry this payment
+        await db.payment_events.delete_one({"payment_id": payment_id})
+        raise
+    
+    await db.payment_events.update_one(
+        {"payment_id": payment_id},
+        {"$set": {"session_id": session_id, "processed_at": datetime.now(timezone.utc).isoformat()}}
+    )
+    return {"status": "processed", "session_id": session_id}
+
 @api_router.post("/analyze")
 async def start_analysis(input_data: AnalysisInput, background_tasks: BackgroundTasks):
-    """Start the intelligence pipeline after payment"""
-    session = await db.sessions.find_one({"session_id": input_data.session_id}, {"_id": 0})
+    """Start the intelligence pipeline after payment (idempotent per session)"""
+    run_id = await claim_analysis_run(input_data.session_id)
+    
+    if run_id:
+        background_tasks.add_task(run_analysis_pipeline, input_data.session_id, run_id)
+        return {"status": "processing", "run_id": run_id, "message": "Analysis started. This may take 2-3 minutes."}
+    
+    session = await db.sessions.find_one(
+        {"session_id": input_data.session_id},
+        {"_id": 0, "status": 1, "payment_status": 1, "run_id": 1}
+    )
     
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -1208,23 +4288,152 @@ async def start_analysis(input_data: AnalysisInput, background_tasks: Background
     if session.get("payment_status") != "completed":
         raise HTTPException(status_code=402, detail="Payment required before analysis")
     
-    await db.sessions.update_one(
-        {"session_id": input_data.session_id},
-        {"$set": {
-            "status": "processing",
-            "analysis_started_at": datetime.now(timezone.utc).isoformat()
-        }}
-    )
-    
-    background_tasks.add_task(run_analysis_pipeline, input_data.session_id)
-    
-    return {"status": "processing", "message": "Analysis started. This may take 2-3 minutes."}
+    # Already claimed by an earlier trigger - report that run instead of starting another
+    return {
+        "status": session.get("status"),
+        "run_id": session.get("run_id"),
+        "message": "Analysis already started."
+    }
+
+class PartialSectionWriter:
+    """Persists streamed, unaudited section fields off the stream path.
+
+    Fields are buffered and written by one background task per section, so the
+    LLM stream never waits on Mongo and fields that arrive during a write are
+    coalesced into the next one. Writes only land while the run is processing,
+    so a late flush cannot resurrect partial_report after completion.
+    """
+
+    def __init__(self, run_filter: Dict[str, Any], section_key: str):
+        self.run_filter = {**run_filter, "status": "processing"}
+        self.section_key = section_key
+        self.pending: Dict[str, Any] = {}
+        self.clear = False
+        self.task: Optional[asyncio.Task] = None
+
+    async def __call__(self, field: str, value: Any):
+        self.pending[field] = value
+        self._schedule()
+
+    def reset(self):
+        """Drop a rejected draft's fields before its retry streams"""
+        self.pending.clear()
+        self.clear = True
+        self._schedule()
+
+    def _schedule(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._flush())
+
+    async def _flush(self):
+        while self.clear or self.pending:
+            if self.clear:
+                # $unset of the section cannot share an update with $set of its fields
+                self.clear = False
+                update = {"$unset": {f"partial_report.{self.section_key}": ""}}
+            else:
+                fields, self.pending = self.pending, {}
+                update = {"$set": {f"partial_report.{self.section_key}.{field}": value for field, value in fields.items()}}
+            try:
+                await db.sessions.update_one(self.run_filter, update)
+            except Exception as e:
+                logger.warning(f"Partial report write failed for {self.section_key}: {e}")
+
+def partial_field_writer(run_filter: Dict[str, Any], section_key: str) -> PartialSectionWriter:
+    """Persist streamed, unaudited section fields as they complete"""
+    return PartialSectionWriter(run_filter, section_key)
+
+def report_sections_for_tier(tier: int) -> List[str]:
+    """Report section keys generated for a tier, in pipeline order"""
+    sections = ["diagnosis", "risk"]
+    if tier >= 4498:
+        sections += ["execution", "decisions"]
+    return sections
+
+def section_ready_fields(section_key: str, content: Dict, next_section_key: Optional[str] = None) -> Dict[str, Any]:
+    """$set fields that publish an approved section and mark the next one as generating"""
+    fields = {
+        f"report.{section_key}": content,
+        f"section_status.{section_key}": "ready"
+    }
+    if next_section_key:
+        fields[f"section_status.{next_section_key}"] = "generating"
+    return fields
 
-async def run_analysis_pipeline(session_id: str):
+# ============== STAGE INPUTS ==============
+# User messages for each pipeline stage. benchmarks.py builds its prompts from
+# these too, so prompt-size and latency baselines track what production sends.
+
+def build_validation_input(resume_text: str, linkedin_text: str, linkedin_provided: bool) -> str:
+    linkedin_section = f"\n\nLINKEDIN:\n{linkedin_text}" if linkedin_provided else "\n\nLINKEDIN: Not provided"
+    return f"RESUME:\n{resume_text}{linkedin_section}"
+
+def build_extraction_input(target_role: str, resume_text: str, linkedin_text: str, linkedin_provided: bool) -> str:
+    linkedin_extraction = f"\n\n=== LINKEDIN CONTENT ===\n{linkedin_text}" if linkedin_provided else "\n\n=== LINKEDIN CONTENT ===\nNot provided. Apply confidence_modifier: reduced."
+    return f"""TARGET ROLE: {target_role}
+LINKEDIN PROVIDED: {linkedin_provided}
+
+=== RESUME CONTENT ===
+{resume_text}{linkedin_extraction}"""
+
+def build_candidate_header(target_role: str, full_name: Optional[str] = None, current_role: Optional[str] = None) -> str:
+    """Candidate lines that open every section input; upgrades only carry the target role"""
+    if full_name is None:
+        return f"TARGET ROLE: {target_role}"
+    return f"""CANDIDATE NAME: {full_name}
+CURRENT ROLE: {current_role}
+TARGET ROLE: {target_role}"""
+
+def build_diagnosis_input(header: str, linkedin_provided: bool, extraction_result: Dict) -> str:
+    return f"""{header}
+LINKEDIN PROVIDED: {linkedin_provided}
+
+=== STRUCTURED EXTRACTION DATA (Use ALL signal classes) ===
+{json.dumps(extraction_result, indent=2)}"""
+
+def build_section_input(
+    header: str,
+    extraction_result: Dict,
+    diagnosis_result: Dict,
+    risk_result: Optional[Dict] = None,
+    execution_result: Optional[Dict] = None
+) -> str:
+    """Input for risk, execution guardrails and decisions: every upstream section, in pipeline order"""
+    section_input = f"""{header}
+
+=== STRUCTURED EXTRACTION DATA ===
+{json.dumps(extraction_result, indent=2)}
+
+=== DIAGNOSIS DATA ===
+{json.dumps(diagnosis_result, indent=2)}"""
+    if risk_result is not None:
+        section_input += f"""
+
+=== RISK DATA ===
+{json.dumps(risk_result, indent=2)}"""
+    if execution_result is not None:
+        section_input += f"""
+
+=== EXECUTION GUARDRAILS ===
+{json.dumps(execution_result, indent=2)}"""
+    return section_input
+
+@traced("run_analysis_pipeline", attributes=("run_id",), session="session_id")
+async def run_analysis_pipeline(session_id: str, run_id: Optional[str] = None):
     """Execute the full intelligence pipeline with multi-signal synthesis"""
+    # Writes are scoped to this run's token so a superseded run cannot overwrite a newer one
+    run_filter = {"session_id": session_id, "run_id": run_id}
+    # Every LLM call in the run is attributed to the session and the report it produces
+    report_id = str(uuid.uuid4())
+    ledger = SessionLedger(session_id, run_id, report_id)
+    ledger_token = current_ledger.set(ledger)
+    pipelines_in_flight.inc(pipeline="analysis")
+    pipeline_started = stage_started = time.monotonic()
     try:
         session = await db.sessions.find_one({"session_id": session_id}, {"_id": 0})
+        ledger.seed(session.get("llm_usage"))
         tier = session.get("tier", 499)
+        set_span_attributes(tier=tier, report_id=report_id)
         
         resume_text = session.get("resume_text", "")
         linkedin_text = session.get("linkedin_text", "")
@@ -1233,67 +4442,59 @@ async def run_analysis_pipeline(session_id: str):
         
         # Initialize progress tracking
         await db.sessions.update_one(
-            {"session_id": session_id},
+            run_filter,
             {"$set": {"current_step": 1, "assembly_state": "not_started"}}
         )
         
         # Step 1: Input Validation (LinkedIn is optional)
-        linkedin_section = f"\n\nLINKEDIN:\n{linkedin_text}" if linkedin_provided else "\n\nLINKEDIN: Not provided"
-        validation_input = f"RESUME:\n{resume_text}{linkedin_section}"
-        validation_result = await call_llm(INPUT_VALIDATION_PROMPT, validation_input, "input_validation")
+        validation_input = build_validation_input(resume_text, linkedin_text, linkedin_provided)
+        validation_result = local_validate_input(resume_text, linkedin_text, linkedin_provided)
+        validation_source = "local"
+        if validation_result["confidence"] < LOCAL_VALIDATION_MIN_CONFIDENCE:
+            validation_result = await call_llm(INPUT_VALIDATION_PROMPT, validation_input, "input_validation")
+            validation_source = "llm"
+        count_event(f"input_validation.{validation_source}")
+        stage_started = observe_stage("analysis", "input_validation", stage_started)
         
         if not validation_result.get("is_valid", False):
             await db.sessions.update_one(
-                {"session_id": session_id},
+                run_filter,
                 {"$set": {
                     "status": "failed",
                     "error": validation_result.get("reason", "Invalid input"),
                     "failed_at": datetime.now(timezone.utc).isoformat()
-                }}
+                },
+                "$inc": ledger.inc_fields()}
             )
             return
         
         # Step 1 complete → Move to Step 2
         await db.sessions.update_one(
-            {"session_id": session_id},
-            {"$set": {"current_step": 2}}
+            run_filter,
+            {"$set": {"current_step": 2, "input_validation_source": validation_source}}
         )
         
         # Step 2: Signal Extraction (extracts Name and Current Role from resume)
-        linkedin_extraction = f"\n\n=== LINKEDIN CONTENT ===\n{linkedin_text}" if linkedin_provided else "\n\n=== LINKEDIN CONTENT ===\nNot provided. Apply confidence_modifier: reduced."
-        extraction_input = f"""TARGET ROLE: {target_role}
-LINKEDIN PROVIDED: {linkedin_provided}
+        extraction_input = build_extraction_input(target_role, resume_text, linkedin_text, linkedin_provided)
 
-=== RESUME CONTENT ===
-{resume_text}{linkedin_extraction}
-
-EXTRACT ALL 5 SIGNAL CLASSES. Do not collapse signals. Each class must be analyzed independently.
-IMPORTANT: Extract the candidate's full name and current/most recent job title from the resume for the identity_block.
-If LinkedIn not provided, mark relevant fields as 'not_available' and set confidence_modifier to 'reduced'."""
-
-        extraction_result = await call_llm(SIGNAL_EXTRACTION_PROMPT, extraction_input, "signal_extraction")
+        extraction_result = await call_llm(
+            SIGNAL_EXTRACTION_PROMPT,
+            extraction_input,
+            "signal_extraction",
+            SIGNAL_EXTRACTION_INSTRUCTIONS
+        )
+        stage_started = observe_stage("analysis", "signal_extraction", stage_started)
         
         # Extract name and current_role from extraction result
         identity_block = extraction_result.get("identity_block", {})
         full_name = identity_block.get("name", "Unknown")
         current_role = identity_block.get("current_role", "Unknown")
-        
-        # Step 2 complete → Move to Step 3
-        await db.sessions.update_one(
-            {"session_id": session_id},
-            {"$set": {
-                "current_step": 3,
-                "extraction_json": extraction_result,
-                "full_name": full_name,
-                "current_role": current_role
-            }}
-        )
+        header = build_candidate_header(target_role, full_name, current_role)
         
         report = {
             "metadata": {
                 "prompt_versions": PROMPT_VERSIONS,
                 "schema_versions": SCHEMA_VERSIONS,
-                "model": "gpt-4o",
                 "generated_at": datetime.now(timezone.utc).isoformat(),
                 "linkedin_provided": linkedin_provided,
                 "confidence_level": "full" if linkedin_provided else "reduced"
@@ -1306,122 +4507,135 @@ If LinkedIn not provided, mark relevant fields as 'not_available' and set confid
             }
         }
         
-        # Step 3: Diagnosis
-        diagnosis_input = f"""CANDIDATE NAME: {full_name}
-CURRENT ROLE: {current_role}
-TARGET ROLE: {target_role}
-LINKEDIN PROVIDED: {linkedin_provided}
-
-=== STRUCTURED EXTRACTION DATA (Use ALL signal classes) ===
-{json.dumps(extraction_result, indent=2)}
-
-Generate diagnosis using MULTI-SIGNAL SYNTHESIS with:
-1. Identity Block at the top
-2. Context Intro explaining this is market perception analysis
-3. Interpretation Anchors framing findings
-4. Reference AT LEAST 3 different signal classes in each section.
-DO NOT collapse into single-signal analysis."""
-
-        diagnosis_result = await generate_section_with_retry(
-            DIAGNOSIS_PROMPT, 
-            diagnosis_input, 
-            "diagnosis",
-            extraction_data=extraction_result
-        )
-        report["diagnosis"] = diagnosis_result
+        # Sections are published on the session as soon as each one is approved
+        section_status = {key: "pending" for key in report_sections_for_tier(tier)}
+        section_status["diagnosis"] = "generating"
         
-        # Step 3 complete → Move to Step 4
+        # Step 2 complete → Move to Step 3
         await db.sessions.update_one(
-            {"session_id": session_id},
-            {"$set": {"current_step": 4}}
-        )
-        
-        # Step 4: Risk Assessment (always included with ₹2999 tier)
-        risk_input = f"""CANDIDATE NAME: {full_name}
-CURRENT ROLE: {current_role}
-TARGET ROLE: {target_role}
-
-=== STRUCTURED EXTRACTION DATA ===
-{json.dumps(extraction_result, indent=2)}
-
-=== DIAGNOSIS DATA ===
-{json.dumps(diagnosis_result, indent=2)}
-
-Generate MINIMUM 4 independent risks from DIFFERENT signal classes. Each risk must have different evidence. Identify signal conflicts."""
-
-        risk_result = await generate_section_with_retry(
-            RISK_PROMPT, 
-            risk_input, 
-            "risk",
-            extraction_data=extraction_result
+            run_filter,
+            {"$set": {
+                "current_step": 3,
+                "extraction_json": extraction_result,
+                "full_name": full_name,
+                "current_role": current_role,
+                "report": report,
+                "section_status": section_status
+            }}
         )
-        report["risk"] = risk_result
         
-        # Step 4 complete → Move to Step 5 (assembly phase)
-        await db.sessions.update_one(
-            {"session_id": session_id},
-            {"$set": {"current_step": 5, "assembly_state": "in_progress"}}
-        )
+        # Later stages are closures over their upstream sections so a stage can be
+        # started speculatively from a draft that is still under audit
+        partial_writers = {key: partial_field_writer(run_filter, key) for key in ("diagnosis", "risk", "execution", "decisions")}
+        speculation = SectionSpeculation(on_discard=lambda section_key: partial_writers[section_key].reset())
         
-        # Step 5: Final Assembly (Execution Guardrails + Decision Intelligence for premium)
-        if tier >= 4498:
-            execution_input = f"""CANDIDATE NAME: {full_name}
-CURRENT ROLE: {current_role}
-TARGET ROLE: {target_role}
-
-=== STRUCTURED EXTRACTION DATA ===
-{json.dumps(extraction_result, indent=2)}
-
-=== DIAGNOSIS DATA ===
-{json.dumps(diagnosis_result, indent=2)}
+        async def generate_risk(diagnosis_result: Dict) -> Dict:
+            risk_input = build_section_input(header, extraction_result, diagnosis_result)
 
-=== RISK DATA ===
-{json.dumps(report.get('risk', {}), indent=2)}
-
-Generate guardrails for EACH signal class (identity, seniority, ownership, market positioning)."""
+            return await generate_section_with_retry(
+                RISK_PROMPT, 
+                risk_input, 
+                "risk",
+                extraction_data=extraction_result,
+                instructions=RISK_INSTRUCTIONS,
+                on_field=partial_writers["risk"],
+                speculation=speculation,
+                next_stage=("execution", lambda risk_result: generate_execution(diagnosis_result, risk_result)) if tier >= 4498 else None
+            )
+        
+        async def generate_execution(diagnosis_result: Dict, risk_result: Dict) -> Dict:
+            execution_input = build_section_input(header, extraction_result, diagnosis_result, risk_result)
 
-            execution_result = await generate_section_with_retry(
+            return await generate_section_with_retry(
                 EXECUTION_GUARDRAILS_PROMPT, 
                 execution_input, 
                 "execution_guardrails",
-                extraction_data=extraction_result
+                extraction_data=extraction_result,
+                instructions=EXECUTION_GUARDRAILS_INSTRUCTIONS,
+                on_field=partial_writers["execution"],
+                speculation=speculation,
+                next_stage=("decisions", lambda execution_result: generate_decisions(diagnosis_result, risk_result, execution_result))
             )
-            report["execution"] = execution_result
-            
+        
+        async def generate_decisions(diagnosis_result: Dict, risk_result: Dict, execution_result: Dict) -> Dict:
             # Decision Intelligence with COMMITMENTS
-            decision_input = f"""CANDIDATE NAME: {full_name}
-CURRENT ROLE: {current_role}
-TARGET ROLE: {target_role}
-
-=== STRUCTURED EXTRACTION DATA ===
-{json.dumps(extraction_result, indent=2)}
-
-=== DIAGNOSIS DATA ===
-{json.dumps(diagnosis_result, indent=2)}
+            decision_input = build_section_input(header, extraction_result, diagnosis_result, risk_result, execution_result)
 
-=== RISK DATA ===
-{json.dumps(report.get('risk', {}), indent=2)}
-
-=== EXECUTION GUARDRAILS ===
-{json.dumps(execution_result, indent=2)}
-
-Generate 3-5 COMMITMENTS (not decisions) with:
-1. Identity Block
-2. Context Intro
-3. Each commitment must have A/B options with MARKET DEFAULT
-4. Include STATE SHIFT SUMMARY showing before/after states
-5. No advice. Real trade-offs only."""
-
-            decision_result = await generate_section_with_retry(
+            return await generate_section_with_retry(
                 DECISION_INTELLIGENCE_PROMPT, 
                 decision_input, 
                 "decision_intelligence",
-                extraction_data=extraction_result
+                extraction_data=extraction_result,
+                instructions=DECISION_INTELLIGENCE_INSTRUCTIONS,
+                on_field=partial_writers["decisions"]
             )
-            report["decisions"] = decision_result
+        
+        # Step 3: Diagnosis
+        diagnosis_input = build_diagnosis_input(header, linkedin_provided, extraction_result)
+
+        try:
+            diagnosis_result = await generate_section_with_retry(
+                DIAGNOSIS_PROMPT, 
+                diagnosis_input, 
+                "diagnosis",
+                extraction_data=extraction_result,
+                instructions=DIAGNOSIS_INSTRUCTIONS,
+                on_field=partial_writers["diagnosis"],
+                speculation=speculation,
+                next_stage=("risk", generate_risk)
+            )
+            report["diagnosis"] = diagnosis_result
+            stage_started = observe_stage("analysis", "diagnosis", stage_started)
+            
+            # Step 3 complete → Move to Step 4
+            await db.sessions.update_one(
+                run_filter,
+                {"$set": {"current_step": 4, **section_ready_fields("diagnosis", diagnosis_result, "risk")}}
+            )
+            
+            # Step 4: Risk Assessment (always included with ₹2999 tier)
+            risk_result = await speculation.resolve("risk", diagnosis_result, generate_risk)
+            report["risk"] = risk_result
+            stage_started = observe_stage("analysis", "risk", stage_started)
+            
+            # Step 4 complete → Move to Step 5 (assembly phase)
+            await db.sessions.update_one(
+                run_filter,
+                {"$set": {
+                    "current_step": 5,
+                    "assembly_state": "in_progress",
+                    **section_ready_fields("risk", risk_result, "execution" if tier >= 4498 else None)
+                }}
+            )
+            
+            # Step 5: Final Assembly (Execution Guardrails + Decision Intelligence for premium)
+            if tier >= 4498:
+                execution_result = await speculation.resolve(
+                    "execution",
+                    risk_result,
+                    lambda risk_result: generate_execution(diagnosis_result, risk_result)
+                )
+                report["execution"] = execution_result
+                stage_started = observe_stage("analysis", "execution", stage_started)
+                await db.sessions.update_one(
+                    run_filter,
+                    {"$set": section_ready_fields("execution", execution_result, "decisions")}
+                )
+                
+                decision_result = await speculation.resolve(
+                    "decisions",
+                    execution_result,
+                    lambda execution_result: generate_decisions(diagnosis_result, risk_result, execution_result)
+                )
+                report["decisions"] = decision_result
+                stage_started = observe_stage("analysis", "decisions", stage_started)
+        finally:
+            speculation.cancel_all()
+        
+        report["metadata"]["model"] = ledger.models.get("diagnosis", get_llm_route("diagnosis")["model"])
+        report["metadata"]["models"] = dict(ledger.models)
         
         # Store immutable report in reports collection
-        report_id = str(uuid.uuid4())
         report_doc = {
             "report_id": report_id,
             "user_id": session.get("user_id"),
@@ -1435,35 +4649,43 @@ Generate 3-5 COMMITMENTS (not decisions) with:
         
         # Mark assembly as ready for UI finalization
         await db.sessions.update_one(
-            {"session_id": session_id},
+            run_filter,
             {"$set": {
                 "status": "completed",
                 "assembly_state": "ready_for_ui_finalize",
                 "report": report,
+                "section_status": {key: "ready" for key in report_sections_for_tier(tier)},
                 "report_id": report_id,
                 "completed_at": datetime.now(timezone.utc).isoformat()
-            }}
+            },
+            "$inc": ledger.inc_fields(),
+            "$unset": {"partial_report": ""}}
         )
         
+        observe_stage("analysis", "total", pipeline_started)
         logger.info(f"Analysis completed for session {session_id}, report_id: {report_id}")
         
     except Exception as e:
         logger.error(f"Analysis pipeline error: {e}")
         await db.sessions.update_one(
-            {"session_id": session_id},
+            run_filter,
             {"$set": {
                 "status": "failed",
                 "error": str(e),
                 "failed_at": datetime.now(timezone.utc).isoformat()
-            }}
+            },
+            "$inc": ledger.inc_fields()}
         )
+    finally:
+        pipelines_in_flight.dec(pipeline="analysis")
+        current_ledger.reset(ledger_token)
 
 @api_router.get("/report/{session_id}/progress")
 async def get_report_progress(session_id: str):
     """Get real-time analysis progress for frontend polling"""
     session = await db.sessions.find_one(
         {"session_id": session_id}, 
-        {"_id": 0, "current_step": 1, "assembly_state": 1, "status": 1, "error": 1}
+        {"_id": 0, "current_step": 1, "assembly_state": 1, "status": 1, "error": 1, "partial_report": 1, "section_status": 1}
     )
     
     if not session:
@@ -1492,7 +4714,33 @@ async def get_report_progress(session_id: str):
         "current_step": current_step,
         "assembly_state": assembly_state,
         "progress_percent": progress_percent,
-        "error": session.get("error") if status == "failed" else None
+        "error": session.get("error") if status == "failed" else None,
+        # Per-section readiness; the processing page hands over to the report once diagnosis is ready
+        "section_status": session.get("section_status"),
+        # Streamed fields not yet quality-audited; full content at /report/{id}/partial
+        "partial_fields": {
+            section: list(fields.keys())
+            for section, fields in (session.get("partial_report") or {}).items()
+        },
+        "career_verdict_preview": (session.get("partial_report") or {}).get("diagnosis", {}).get("career_verdict")
+    }
+
+@api_router.get("/report/{session_id}/partial")
+async def get_partial_report(session_id: str):
+    """Fields streamed so far for sections still being generated (unaudited)"""
+    session = await db.sessions.find_one(
+        {"session_id": session_id},
+        {"_id": 0, "status": 1, "current_step": 1, "partial_report": 1}
+    )
+    
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    return {
+        "status": session.get("status", "unknown"),
+        "current_step": session.get("current_step", 0),
+        "audited": False,
+        "sections": session.get("partial_report") or {}
     }
 
 
@@ -1507,7 +4755,24 @@ async def get_report(session_id: str):
     status = session.get("status", "unknown")
     
     if status == "processing":
-        return {"status": "processing", "message": "Analysis in progress. Please wait."}
+        # Approved sections are served while later ones are still generating
+        section_status = session.get("section_status") or {}
+        report = session.get("report") or {}
+        ready_report = {
+            key: value for key, value in report.items()
+            if key not in section_status or section_status[key] == "ready"
+        }
+        return {
+            "status": "processing",
+            "message": "Analysis in progress. Please wait.",
+            "tier": session.get("tier"),
+            "target_role": session.get("target_role"),
+            "full_name": session.get("full_name"),
+            "current_role": session.get("current_role"),
+            "linkedin_provided": session.get("linkedin_provided", False),
+            "section_status": section_status,
+            "report": ready_report if section_status else None
+        }
     
     if status == "failed":
         return {"status": "failed", "error": session.get("error", "Unknown error")}
@@ -1546,27 +4811,35 @@ async def upgrade_tier(upgrade: UpgradeRequest):
     
     upgrade_amount = upgrade.new_tier - current_tier
     
-    razorpay_order = razorpay_client.order.create({
-        "amount": upgrade_amount * 100,
-        "currency": "INR",
-        "payment_capture": 1,
-        "notes": {
-            "session_id": upgrade.session_id,
-            "tier": upgrade.new_tier,
-            "upgrade_from": current_tier
-        }
-    })
-    
-    await db.sessions.update_one(
-        {"session_id": upgrade.session_id},
-        {"$set": {
-            "upgrade_order_id": razorpay_order["id"],
-            "pending_upgrade_tier": upgrade.new_tier
-        }}
-    )
+    # Reuse the unpaid upgrade order if the same upgrade was requested before
+    existing_order_id = session.get("upgrade_order_id")
+    if (existing_order_id
+            and session.get("pending_upgrade_tier") == upgrade.new_tier
+            and session.get("upgrade_from_tier") == current_tier):
+        order_id = existing_order_id
+    else:
+        try:
+            razorpay_order = await payment_gateway.create_order(upgrade_amount * 100, {
+                "session_id": upgrade.session_id,
+                "tier": upgrade.new_tier,
+                "upgrade_from": current_tier
+            })
+        except PaymentGatewayError as e:
+            logger.error(f"Upgrade order creation failed: {e}")
+            raise HTTPException(status_code=502, detail="Payment gateway unavailable. Please try again.")
+        order_id = razorpay_order["id"]
+        
+        await db.sessions.update_one(
+            {"session_id": upgrade.session_id},
+            {"$set": {
+                "upgrade_order_id": order_id,
+                "pending_upgrade_tier": upgrade.new_tier,
+                "upgrade_from_tier": current_tier
+            }}
+        )
     
     return {
-        "order_id": razorpay_order["id"],
+        "order_id": order_id,
         "amount": upgrade_amount * 100,
         "currency": "INR",
         "upgrade_from": current_tier,
@@ -1577,129 +4850,148 @@ async def upgrade_tier(upgrade: UpgradeRequest):
 async def verify_upgrade(payment: PaymentVerify, background_tasks: BackgroundTasks):
     """Verify upgrade payment and run additional prompts"""
     try:
-        razorpay_client.utility.verify_payment_signature({
-            'razorpay_order_id': payment.razorpay_order_id,
-            'razorpay_payment_id': payment.razorpay_payment_id,
-            'razorpay_signature': payment.razorpay_signature
-        })
+        await payment_gateway.verify_payment_signature(
+            payment.razorpay_order_id,
+            payment.razorpay_payment_id,
+            payment.razorpay_signature
+        )
     except Exception:
         raise HTTPException(status_code=400, detail="Payment verification failed")
     
-    session = await db.sessions.find_one({"session_id": payment.session_id}, {"_id": 0})
-    new_tier = session.get("pending_upgrade_tier")
-    
-    await db.sessions.update_one(
-        {"session_id": payment.session_id},
-        {"$set": {
-            "tier": new_tier,
-            "status": "processing",
-            "upgrade_payment_id": payment.razorpay_payment_id
-        },
-        "$unset": {"pending_upgrade_tier": ""}}
+    upgrade_claim = await claim_upgrade_run(
+        payment.session_id,
+        payment.razorpay_order_id,
+        payment.razorpay_payment_id
     )
     
-    background_tasks.add_task(run_upgrade_pipeline, payment.session_id, new_tier)
+    if not upgrade_claim:
+        session = await db.sessions.find_one(
+            {"session_id": payment.session_id},
+            {"_id": 0, "status": 1, "tier": 1, "run_id": 1}
+        )
+        if not session:
+            raise HTTPException(status_code=404, detail="Session not found")
+        # Already applied by an earlier verify or the payment webhook
+        return {
+            "status": session.get("status"),
+            "tier": session.get("tier"),
+            "run_id": session.get("run_id"),
+            "message": "Upgrade already verified."
+        }
+    
+    run_id, new_tier = upgrade_claim
+    background_tasks.add_task(run_upgrade_pipeline, payment.session_id, new_tier, run_id)
     
-    return {"status": "success", "message": "Upgrade verified. Generating additional intelligence."}
+    return {"status": "success", "run_id": run_id, "message": "Upgrade verified. Generating additional intelligence."}
 
-async def run_upgrade_pipeline(session_id: str, new_tier: int):
+@traced("run_upgrade_pipeline", attributes=("new_tier", "run_id"), session="session_id")
+async def run_upgrade_pipeline(session_id: str, new_tier: int, run_id: Optional[str] = None):
     """Run only new prompts for upgraded tier (reuses existing extraction data)"""
+    run_filter = {"session_id": session_id, "run_id": run_id}
+    ledger = SessionLedger(session_id, run_id, None)
+    ledger_token = current_ledger.set(ledger)
+    pipelines_in_flight.inc(pipeline="upgrade")
+    pipeline_started = stage_started = time.monotonic()
     try:
         session = await db.sessions.find_one({"session_id": session_id}, {"_id": 0})
+        ledger.report_id = session.get("report_id")
+        ledger.seed(session.get("llm_usage"))
         
         extraction_result = session.get("extraction_json", {})
         report = session.get("report", {})
         target_role = session.get("target_role", "")
         diagnosis_result = report.get("diagnosis", {})
+        header = build_candidate_header(target_role)
+        
+        # Existing sections stay readable while the upgrade generates the new ones
+        await db.sessions.update_one(
+            run_filter,
+            {"$set": {"section_status": {
+                key: "ready" if key in report else "pending"
+                for key in report_sections_for_tier(new_tier)
+            }}}
+        )
         
         # Run Risk if upgrading to 2999+
         if new_tier >= 2999 and "risk" not in report:
-            risk_input = f"""TARGET ROLE: {target_role}
-
-=== STRUCTURED EXTRACTION DATA ===
-{json.dumps(extraction_result, indent=2)}
-
-=== DIAGNOSIS DATA ===
-{json.dumps(diagnosis_result, indent=2)}
-
-Generate MINIMUM 4 independent risks from DIFFERENT signal classes."""
+            await db.sessions.update_one(run_filter, {"$set": {"section_status.risk": "generating"}})
+            risk_input = build_section_input(header, extraction_result, diagnosis_result)
 
             risk_result = await generate_section_with_retry(
                 RISK_PROMPT, 
                 risk_input, 
                 "risk",
-                extraction_data=extraction_result
+                extraction_data=extraction_result,
+                instructions=RISK_INSTRUCTIONS,
+                on_field=partial_field_writer(run_filter, "risk")
             )
             report["risk"] = risk_result
+            stage_started = observe_stage("upgrade", "risk", stage_started)
+            await db.sessions.update_one(run_filter, {"$set": section_ready_fields("risk", risk_result)})
         
         # Run Execution + Decisions if upgrading to 4498
         if new_tier >= 4498:
             if "execution" not in report:
-                execution_input = f"""TARGET ROLE: {target_role}
-
-=== STRUCTURED EXTRACTION DATA ===
-{json.dumps(extraction_result, indent=2)}
-
-=== DIAGNOSIS DATA ===
-{json.dumps(diagnosis_result, indent=2)}
-
-=== RISK DATA ===
-{json.dumps(report.get('risk', {}), indent=2)}
-
-Generate guardrails for EACH signal class."""
+                await db.sessions.update_one(run_filter, {"$set": {"section_status.execution": "generating"}})
+                execution_input = build_section_input(header, extraction_result, diagnosis_result, report.get("risk", {}))
 
                 execution_result = await generate_section_with_retry(
                     EXECUTION_GUARDRAILS_PROMPT, 
                     execution_input, 
                     "execution_guardrails",
-                    extraction_data=extraction_result
+                    extraction_data=extraction_result,
+                    instructions=EXECUTION_GUARDRAILS_INSTRUCTIONS,
+                    on_field=partial_field_writer(run_filter, "execution")
                 )
                 report["execution"] = execution_result
+                stage_started = observe_stage("upgrade", "execution", stage_started)
+                await db.sessions.update_one(run_filter, {"$set": section_ready_fields("execution", execution_result)})
             
             if "decisions" not in report:
-                decision_input = f"""TARGET ROLE: {target_role}
-
-=== STRUCTURED EXTRACTION DATA ===
-{json.dumps(extraction_result, indent=2)}
-
-=== DIAGNOSIS DATA ===
-{json.dumps(diagnosis_result, indent=2)}
-
-=== RISK DATA ===
-{json.dumps(report.get('risk', {}), indent=2)}
-
-=== EXECUTION GUARDRAILS ===
-{json.dumps(report.get('execution', {}), indent=2)}
-
-Generate 3-5 FORCED DECISIONS from DIFFERENT signal conflicts."""
+                await db.sessions.update_one(run_filter, {"$set": {"section_status.decisions": "generating"}})
+                decision_input = build_section_input(
+                    header, extraction_result, diagnosis_result, report.get("risk", {}), report.get("execution", {})
+                )
 
                 decision_result = await generate_section_with_retry(
                     DECISION_INTELLIGENCE_PROMPT, 
                     decision_input, 
                     "decision_intelligence",
-                    extraction_data=extraction_result
+                    extraction_data=extraction_result,
+                    instructions=DECISION_INTELLIGENCE_INSTRUCTIONS,
+                    on_field=partial_field_writer(run_filter, "decisions")
                 )
                 report["decisions"] = decision_result
+                stage_started = observe_stage("upgrade", "decisions", stage_started)
         
         report["metadata"]["upgraded_at"] = datetime.now(timezone.utc).isoformat()
         report["metadata"]["tier"] = new_tier
+        report["metadata"]["upgrade_models"] = dict(ledger.models)
         
         await db.sessions.update_one(
-            {"session_id": session_id},
+            run_filter,
             {"$set": {
                 "status": "completed",
-                "report": report
-            }}
+                "report": report,
+                "section_status": {key: "ready" for key in report_sections_for_tier(new_tier)}
+            },
+            "$inc": ledger.inc_fields(),
+            "$unset": {"partial_report": ""}}
         )
+        observe_stage("upgrade", "total", pipeline_started)
         
     except Exception as e:
         logger.error(f"Upgrade pipeline error: {e}")
         await db.sessions.update_one(
-            {"session_id": session_id},
-            {"$set": {"status": "failed", "error": str(e)}}
+            run_filter,
+            {"$set": {"status": "failed", "error": str(e)}, "$inc": ledger.inc_fields()}
         )
+    finally:
+        pipelines_in_flight.dec(pipeline="upgrade")
+        current_ledger.reset(ledger_token)
 
 @api_router.post("/send-report")
+@traced("send_report", session="request.session_id")
 async def send_report_email(request: EmailReportRequest):
     """Generate PDF and send via email"""
     session = await db.sessions.find_one({"session_id": request.session_id}, {"_id": 0})
@@ -1741,7 +5033,12 @@ async def get_session_status(session_id: str):
 @api_router.get("/razorpay-key")
 async def get_razorpay_key():
     """Get Razorpay public key for frontend"""
-    return {"key_id": os.environ.get('RAZORPAY_KEY_ID')}
+    return {"key_id": RAZORPAY_KEY_ID}
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus scrape target for this worker"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 # Include the router
 app.include_router(api_router)
@@ -1753,7 +5050,48 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(RequestProfileMiddleware)
+app.add_middleware(RequestMetricsMiddleware)
+
+@app.on_event("startup")
+async def ensure_indexes():
+    await db.payment_events.create_index("payment_id", unique=True)
+    await db.llm_rate_windows.create_index("expires_at", expireAfterSeconds=0)
+
+@app.on_event("startup")
+async def start_llm_log_sink():
+    llm_log_sink.start()
+
+@app.on_event("startup")
+async def start_event_loop_watchdog():
+    if EVENT_LOOP_WATCHDOG:
+        event_loop_watchdog.start()
+
+@app.on_event("startup")
+async def install_profile_signal():
+    # kill -USR2 <worker pid> profiles that worker for PROFILE_SIGNAL_SECONDS
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGUSR2, lambda: asyncio.create_task(profile_to_disk()))
+    except (NotImplementedError, RuntimeError, AttributeError):
+        logger.info("SIGUSR2 profiling unavailable on this platform")
+
+@app.on_event("shutdown")
+async def stop_event_loop_watchdog():
+    await event_loop_watchdog.stop()
+
+@app.on_event("shutdown")
+async def drain_llm_log_sink():
+    # Registered before the client is closed so queued logs can still be written
+    await llm_log_sink.close()
+
+@app.on_event("shutdown")
+async def flush_spans():
+    await asyncio.to_thread(span_processor.shutdown)
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
+
+@app.on_event("shutdown")
+async def shutdown_payment_gateway():
+    await payment_gateway.close()
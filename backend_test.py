@@ -341,6 +341,28 @@ Spoke at SF Tech Meetup about Microservices Best Practices"""
         self.log_test("LLM Pipeline Endpoints Exist", all_exist, details)
         return all_exist
 
+    def test_razorpay_webhook_rejects_unsigned(self):
+        """Test POST /api/razorpay-webhook refuses events without a valid signature"""
+        try:
+            event = {
+                "event": "payment.captured",
+                "payload": {"payment": {"entity": {"id": "pay_test", "order_id": "order_test"}}}
+            }
+            response = requests.post(
+                f"{self.base_url}/api/razorpay-webhook",
+                json=event,
+                headers={"X-Razorpay-Signature": "invalid"},
+                timeout=10
+            )
+            # 400 = signature rejected, 503 = webhook secret not configured
+            success = response.status_code in (400, 503)
+            details = f"Status: {response.status_code}, Response: {response.text}"
+            self.log_test("Razorpay Webhook Signature Check", success, details)
+            return success
+        except Exception as e:
+            self.log_test("Razorpay Webhook Signature Check", False, str(e))
+            return False
+
     def test_report_endpoint_without_analysis(self):
         """Test GET /api/report/{session_id} (should return processing/pending status)"""
         if not self.session_id:
@@ -397,6 +419,9 @@ Spoke at SF Tech Meetup about Microservices Best Practices"""
         # Test LLM pipeline endpoints exist
         self.test_llm_pipeline_endpoints_exist()
         
+        # Test webhook signature enforcement
+        self.test_razorpay_webhook_rejects_unsigned()
+        
         return True
 
     def print_summary(self):
@@ -162,7 +162,7 @@ export default function ProcessingPage() {
         const res = await axios.get(`${API_URL}/api/report/${sessionId}/progress`);
         if (!mounted) return;
 
-        const { status, current_step, assembly_state, error: apiError } = res.data;
+        const { status, current_step, assembly_state, section_status, error: apiError } = res.data;
 
         // Update backend state
         setBackendStatus(status);
@@ -173,6 +173,18 @@ export default function ProcessingPage() {
           return;
         }
 
+        // The report page renders approved sections while later ones generate
+        if (
+          status === "processing" &&
+          section_status?.diagnosis === "ready" &&
+          !finalizationTriggeredRef.current
+        ) {
+          finalizationTriggeredRef.current = true;
+          setIsRedirecting(true);
+          navigate(isUpsellRoute ? `/complete_analyis/${sessionId}` : `/Intelligence_report_verdict/${sessionId}`);
+          return;
+        }
+
         // Track step changes for circular progress reset
         if (current_step !== lastBackendStepRef.current) {
           lastBackendStepRef.current = current_step;
@@ -48,6 +48,17 @@ const renderContent = (content) => {
   return String(content);
 };
 
+// Placeholder for a section that is still being generated
+const SectionGenerating = ({ title }) => (
+  <div className="mb-6 bg-zinc-900/50 border border-zinc-800 rounded-2xl p-5 flex items-center gap-3">
+    <Loader2 className="w-5 h-5 text-primary animate-spin shrink-0" />
+    <div>
+      <h3 className="font-bold text-sm">{title}</h3>
+      <p className="text-zinc-500 text-xs">Generating this section…</p>
+    </div>
+  </div>
+);
+
 // Helper to format key names
 const formatKey = (key) => {
   return key.replace(/_/g, ' ').replace(/\b\w/g, l => l.toUpperCase());
@@ -76,18 +87,35 @@ export default function ReportPage() {
   });
   const [upgrading, setUpgrading] = useState(false);
   const [razorpayKey, setRazorpayKey] = useState(null);
+  const [sectionStatus, setSectionStatus] = useState(null);
 
   useEffect(() => {
+    let pollTimer = null;
+
     const fetchReport = async () => {
       try {
         const res = await axios.get(`${API_URL}/api/report/${sessionId}`);
         
         if (res.data.status === "processing") {
-          navigate(`/Intelligence_report_generation/${sessionId}`);
+          // Render sections as they are approved; otherwise keep the progress page
+          const status = res.data.section_status || {};
+          if (status.diagnosis !== "ready") {
+            navigate(`/Intelligence_report_generation/${sessionId}`);
+            return;
+          }
+          setReport(res.data.report);
+          setTier(res.data.tier);
+          setTargetRole(res.data.target_role);
+          setFullName(res.data.full_name || "");
+          setCurrentRole(res.data.current_role || "");
+          setLinkedinProvided(res.data.linkedin_provided ?? true);
+          setSectionStatus(status);
+          pollTimer = setTimeout(fetchReport, 4000);
           return;
         }
         
         if (res.data.status === "completed") {
+          setSectionStatus(null);
           setReport(res.data.report);
           setTier(res.data.tier);
           setTargetRole(res.data.target_role);
@@ -119,12 +147,16 @@ export default function ReportPage() {
 
     fetchReport();
     fetchKey();
+
+    return () => clearTimeout(pollTimer);
   }, [sessionId, navigate]);
 
   const toggleSection = (section) => {
     setExpandedSections(prev => ({ ...prev, [section]: !prev[section] }));
   };
 
+  const isGenerating = (section) => Boolean(sectionStatus) && sectionStatus[section] !== "ready";
+
   const loadRazorpayScript = () => {
     return new Promise((resolve) => {
       if (window.Razorpay) return resolve(true);
@@ -437,6 +469,9 @@ export default function ReportPage() {
 
         {/* Risk Section or Upsell */}
         {tier >= 2999 ? (
+          isGenerating('risk') ? (
+            <SectionGenerating title="Risk Assessment" />
+          ) : (
           <motion.section
             initial={{ opacity: 0, y: 20 }}
             animate={{ opacity: 1, y: 0 }}
@@ -514,6 +549,7 @@ export default function ReportPage() {
               </div>
             )}
           </motion.section>
+          )
         ) : (
           <motion.div
             initial={{ opacity: 0, y: 20 }}
@@ -545,6 +581,9 @@ export default function ReportPage() {
         {tier >= 4498 ? (
           <>
             {/* Execution Guardrails */}
+            {isGenerating('execution') ? (
+              <SectionGenerating title="Execution Guardrails" />
+            ) : (
             <motion.section
               initial={{ opacity: 0, y: 20 }}
               animate={{ opacity: 1, y: 0 }}
@@ -610,8 +649,12 @@ export default function ReportPage() {
                 </div>
               )}
             </motion.section>
+            )}
 
             {/* Commitments (v3.0) */}
+            {isGenerating('decisions') ? (
+              <SectionGenerating title="Commitments" />
+            ) : (
             <motion.section
               initial={{ opacity: 0, y: 20 }}
               animate={{ opacity: 1, y: 0 }}
@@ -764,6 +807,7 @@ export default function ReportPage() {
                 </div>
               )}
             </motion.section>
+            )}
           </>
         ) : tier >= 2999 ? (
           /* ============== UPSELL SECTION - ₹1,499 (Simple Design) ============== */
@@ -824,47 +868,49 @@ export default function ReportPage() {
           </motion.div>
         )}
 
-        {/* Email Section */}
-        <motion.div
-          initial={{ opacity: 0, y: 20 }}
-          animate={{ opacity: 1, y: 0 }}
-          transition={{ delay: 0.5 }}
-          className="card p-5"
-        >
-          <div className="flex items-center gap-3 mb-4">
-            <Mail className="w-5 h-5 text-primary" />
-            <div>
-              <h3 className="font-bold text-sm">Get PDF via Email</h3>
-              <p className="text-zinc-500 text-xs">We&apos;ll send a formatted PDF report</p>
+        {/* Email Section (available once every section is ready) */}
+        {!sectionStatus && (
+          <motion.div
+            initial={{ opacity: 0, y: 20 }}
+            animate={{ opacity: 1, y: 0 }}
+            transition={{ delay: 0.5 }}
+            className="card p-5"
+          >
+            <div className="flex items-center gap-3 mb-4">
+              <Mail className="w-5 h-5 text-primary" />
+              <div>
+                <h3 className="font-bold text-sm">Get PDF via Email</h3>
+                <p className="text-zinc-500 text-xs">We&apos;ll send a formatted PDF report</p>
+              </div>
             </div>
-          </div>
 
-          {emailSent ? (
-            <div className="flex items-center gap-2 text-green-400 text-sm">
-              <CheckCircle2 className="w-5 h-5" />
-              Report sent successfully!
-            </div>
-          ) : (
-            <div className="flex gap-3">
-              <Input
-                type="email"
-                data-testid="report-email-input"
-                placeholder="your@email.com"
-                value={emailInput}
-                onChange={(e) => setEmailInput(e.target.value)}
-                className="bg-white/5 border-white/10 h-10 rounded-xl flex-1 text-sm"
-              />
-              <button
-                data-testid="send-report-btn"
-                onClick={handleSendEmail}
-                disabled={sendingEmail}
-                className="btn-primary px-4 py-2 text-sm"
-              >
-                {sendingEmail ? <Loader2 className="w-4 h-4 animate-spin" /> : "Send"}
-              </button>
-            </div>
-          )}
-        </motion.div>
+            {emailSent ? (
+              <div className="flex items-center gap-2 text-green-400 text-sm">
+                <CheckCircle2 className="w-5 h-5" />
+                Report sent successfully!
+              </div>
+            ) : (
+              <div className="flex gap-3">
+                <Input
+                  type="email"
+                  data-testid="report-email-input"
+                  placeholder="your@email.com"
+                  value={emailInput}
+                  onChange={(e) => setEmailInput(e.target.value)}
+                  className="bg-white/5 border-white/10 h-10 rounded-xl flex-1 text-sm"
+                />
+                <button
+                  data-testid="send-report-btn"
+                  onClick={handleSendEmail}
+                  disabled={sendingEmail}
+                  className="btn-primary px-4 py-2 text-sm"
+                >
+                  {sendingEmail ? <Loader2 className="w-4 h-4 animate-spin" /> : "Send"}
+                </button>
+              </div>
+            )}
+          </motion.div>
+        )}
 
         <p className="text-center text-zinc-700 text-xs mt-8">
           This is a diagnosis, not advice. The decisions are yours.
@@ -0,0 +1,22 @@
+"""
+Shared setup for the offline unit tests, which import backend/server.py directly.
+
+server.py reads its service settings at import time. The unit tests only call
+pure helpers and never reach MongoDB, OpenAI or Razorpay, so placeholder values
+are enough when the real ones are not in the environment.
+"""
+import os
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+for key, value in {
+    "MONGO_URL": "mongodb://localhost:27017",
+    "DB_NAME": "careeriq_unit_tests",
+    "OPENAI_API_KEY": "sk-unit-test",
+    "RAZORPAY_KEY_ID": "rzp_test_unit",
+    "RAZORPAY_KEY_SECRET": "unit-test-secret",
+}.items():
+    os.environ.setdefault(key, value)
@@ -0,0 +1,127 @@
+"""
+CareerIQ Circuit Breaker Tests
+Unit tests for CircuitBreaker, the per-model breaker in front of OpenAI calls.
+
+Key behaviour being tested:
+- Closed until the consecutive-failure threshold, then open for the cooldown
+- After the cooldown exactly one half-open probe goes out; others are told to retry
+- A successful probe closes the circuit, a failed one reopens it, an abandoned one frees the probe slot
+"""
+from types import SimpleNamespace
+
+import pytest
+
+import server
+from server import CircuitBreaker, CircuitOpenError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(server, "time", SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        probe = breaker.before_call()
+        breaker.record("failure", probe)
+
+
+class TestCircuitBreakerClosed:
+    """Failures below the threshold leave the circuit closed"""
+
+    def test_closed_breaker_lets_calls_through(self, clock):
+        breaker = CircuitBreaker("gpt-test", failures=3, cooldown=30)
+        assert breaker.before_call() is False
+        assert breaker.state == "closed"
+
+    def test_success_resets_the_failure_count(self, clock):
+        breaker = CircuitBreaker("gpt-test", failures=3, cooldown=30)
+        breaker.record("failure")
+        breaker.record("failure")
+        breaker.record("success")
+        breaker.record("failure")
+        assert breaker.state == "closed"
+        assert breaker.failures == 1
+
+    def test_abandoned_calls_do_not_count(self, clock):
+        breaker = CircuitBreaker("gpt-test", failures=2, cooldown=30)
+        for _ in range(5):
+            breaker.record("abandoned")
+        assert breaker.state == "closed"
+        assert breaker.failures == 0
+
+
+class TestCircuitBreakerOpen:
+    """Consecutive failures open the circuit for the cooldown"""
+
+    def test_threshold_opens_the_circuit(self, clock):
+        breaker = CircuitBreaker("gpt-test", failures=3, cooldown=30)
+        open_breaker(breaker)
+        assert breaker.state == "open"
+        with pytest.raises(CircuitOpenError) as error:
+            breaker.before_call()
+        assert error.value.model == "gpt-test"
+        assert error.value.retry_in == pytest.approx(30)
+
+    def test_retry_in_counts_down(self, clock):
+        breaker = CircuitBreaker("gpt-test", failures=1, cooldown=30)
+        open_breaker(breaker)
+        clock.now += 20
+        with pytest.raises(CircuitOpenError) as error:
+            breaker.before_call()
+        assert error.value.retry_in == pytest.approx(10)
+        assert breaker.snapshot() == {"state": "open", "consecutive_failures": 1, "open_for_seconds": 10.0}
+
+
+class TestCircuitBreakerHalfOpen:
+    """After the cooldown a single probe decides whether the circuit closes"""
+
+    def test_only_one_probe_goes_out(self, clock):
+        breaker = CircuitBreaker("gpt-test", failures=1, cooldown=30)
+        open_breaker(breaker)
+        clock.now += 30
+        assert breaker.before_call() is True
+        assert breaker.state == "half_open"
+        with pytest.raises(CircuitOpenError) as error:
+            breaker.before_call()
+        assert error.value.retry_in == 1.0
+
+    def test_successful_probe_closes_the_circuit(self, clock):
+        breaker = CircuitBreaker("gpt-test", failures=2, cooldown=30)
+        open_breaker(breaker)
+        clock.now += 31
+        probe = breaker.before_call()
+        breaker.record("success", probe)
+        assert breaker.state == "closed"
+        assert breaker.failures == 0
+        assert breaker.before_call() is False
+
+    def test_failed_probe_reopens_for_a_full_cooldown(self, clock):
+        breaker = CircuitBreaker("gpt-test", failures=5, cooldown=30)
+        open_breaker(breaker)
+        clock.now += 31
+        probe = breaker.before_call()
+        breaker.record("failure", probe)
+        assert breaker.state == "open"
+        assert breaker.opened_at == clock.now
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+    def test_abandoned_probe_frees_the_slot(self, clock):
+        breaker = CircuitBreaker("gpt-test", failures=1, cooldown=30)
+        open_breaker(breaker)
+        clock.now += 30
+        probe = breaker.before_call()
+        breaker.record("abandoned", probe)
+        assert breaker.state == "half_open"
+        assert breaker.before_call() is True
@@ -0,0 +1,113 @@
+"""
+CareerIQ Delta Repair Path Tests
+Unit tests for the JSON-path helpers behind SECTION_RETRY_MODE=repair.
+
+Key behaviour being tested:
+- parse_json_path splits keys and list indexes
+- repair_scope coarsens a violation path to its top-level field or list item
+- set_json_path replaces existing values and refuses paths that do not exist
+- section_repair_paths maps pre-audit, schema and quoted-violation feedback to repair scopes
+"""
+import copy
+
+from server import parse_json_path, repair_scope, set_json_path, section_repair_paths
+
+
+RISK = {
+    "independent_risks": [
+        {"risk_id": 1, "risk_name": "Title drift", "consequence": "Screened out for director roles"},
+        {"risk_id": 2, "risk_name": "Scope gap", "consequence": "Read as an individual contributor"}
+    ],
+    "signal_conflicts": [{"conflict_id": 1, "signal_a": "Senior title", "signal_b": "Executor bullets"}],
+    "risk_compounding_analysis": "Title drift and the scope gap reinforce each other."
+}
+
+
+class TestParseJsonPath:
+    """Keys and [index] segments come out typed"""
+
+    def test_keys_and_indexes(self):
+        assert parse_json_path("independent_risks[2].description") == ["independent_risks", 2, "description"]
+
+    def test_single_key(self):
+        assert parse_json_path("career_verdict") == ["career_verdict"]
+
+    def test_nested_indexes(self):
+        assert parse_json_path("a[0][1].b") == ["a", 0, 1, "b"]
+
+    def test_empty_path(self):
+        assert parse_json_path("") == []
+
+
+class TestRepairScope:
+    """Repairs rewrite whole list items or top-level fields"""
+
+    def test_list_item_path_keeps_the_item(self):
+        assert repair_scope("independent_risks[1].consequence") == "independent_risks[1]"
+
+    def test_nested_field_is_coarsened_to_top_level(self):
+        assert repair_scope("market_reading.identity_interpretation") == "market_reading"
+
+    def test_top_level_field_is_unchanged(self):
+        assert repair_scope("career_verdict") == "career_verdict"
+
+    def test_empty_path(self):
+        assert repair_scope("") == ""
+
+
+class TestSetJsonPath:
+    """Values are replaced in place only where the path already exists"""
+
+    def test_replaces_a_list_item(self):
+        report = copy.deepcopy(RISK)
+        assert set_json_path(report, "independent_risks[1]", {"risk_id": 2, "risk_name": "Rewritten"})
+        assert report["independent_risks"][1] == {"risk_id": 2, "risk_name": "Rewritten"}
+        assert report["independent_risks"][0] == RISK["independent_risks"][0]
+
+    def test_replaces_a_nested_field(self):
+        report = copy.deepcopy(RISK)
+        assert set_json_path(report, "signal_conflicts[0].signal_b", "Owned budget")
+        assert report["signal_conflicts"][0]["signal_b"] == "Owned budget"
+
+    def test_sets_a_top_level_field(self):
+        report = copy.deepcopy(RISK)
+        assert set_json_path(report, "most_damaging_risk_combination", "Drift plus gap")
+        assert report["most_damaging_risk_combination"] == "Drift plus gap"
+
+    def test_refuses_an_index_past_the_end(self):
+        report = copy.deepcopy(RISK)
+        assert not set_json_path(report, "independent_risks[5]", {})
+        assert report == RISK
+
+    def test_refuses_a_missing_parent(self):
+        report = copy.deepcopy(RISK)
+        assert not set_json_path(report, "missing[0].field", "x")
+        assert not set_json_path(report, "risk_compounding_analysis.field", "x")
+        assert report == RISK
+
+    def test_refuses_an_empty_path(self):
+        assert not set_json_path(copy.deepcopy(RISK), "", "x")
+
+
+class TestSectionRepairPaths:
+    """Audit feedback is turned into deduplicated, known repair scopes"""
+
+    def test_pre_audit_paths_are_scoped(self):
+        audit = {"violation_paths": ["independent_risks[0].consequence", "independent_risks[0].risk_name", "signal_conflicts"]}
+        assert section_repair_paths("risk", RISK, audit) == ["independent_risks[0]", "signal_conflicts"]
+
+    def test_schema_error_locations_are_converted(self):
+        audit = {"specific_violations": ["independent_risks.1.consequence: Field required"]}
+        assert section_repair_paths("risk", RISK, audit) == ["independent_risks[1]"]
+
+    def test_quoted_violation_text_is_located(self):
+        audit = {"specific_violations": ['"Read as an individual contributor"']}
+        assert section_repair_paths("risk", RISK, audit) == ["independent_risks[1]"]
+
+    def test_short_or_unmatched_quotes_are_ignored(self):
+        audit = {"specific_violations": ['"Scope gap"', '"Not in the report at all"']}
+        assert section_repair_paths("risk", RISK, audit) == []
+
+    def test_unknown_fields_are_dropped(self):
+        audit = {"violation_paths": ["invented_field", "risk_compounding_analysis"]}
+        assert section_repair_paths("risk", RISK, audit) == ["risk_compounding_analysis"]
@@ -0,0 +1,111 @@
+"""
+CareerIQ LLM Hedging Tests
+Unit tests for hedged_chat_completion, which races a duplicate against a slow OpenAI call.
+
+Key behaviour being tested:
+- The hedge delay counts from the moment the primary holds a limiter slot, not from the queue
+- No duplicate is sent while the limiter has queued callers or is paused after a 429
+- A call that is slow once sent, with an idle limiter, is still hedged
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import server
+from server import LLMRateLimiter, hedged_chat_completion, pipeline_counters
+
+
+REQUEST = {"model": "gpt-hedge-test", "messages": [{"role": "user", "content": "hi"}]}
+
+
+class FakeCompletions:
+    """Stands in for openai_client.chat.completions; every call takes `latency` seconds"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+
+    async def create(self, **request):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        message = SimpleNamespace(content='{"ok": true}')
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None, model=request["model"])
+
+
+@pytest.fixture
+def hedging(monkeypatch):
+    pipeline_counters.clear()
+    monkeypatch.setattr(server.llm_latency, "hedge_delay", lambda prompt_name: 0.1)
+
+    def install(latency, max_concurrency=1):
+        completions = FakeCompletions(latency)
+        monkeypatch.setattr(server, "openai_client", SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+        limiter = LLMRateLimiter(6000, 6_000_000, max_concurrency)
+        monkeypatch.setattr(server, "llm_rate_limiter", limiter)
+        return completions, limiter
+
+    return install
+
+
+class TestHedgeDelay:
+    """Time spent queued on the limiter does not count toward the hedge delay"""
+
+    def test_call_stuck_in_the_queue_is_not_hedged(self, hedging):
+        completions, limiter = hedging(latency=0.02)
+
+        async def scenario():
+            # Another call holds the only concurrency slot for longer than the hedge delay
+            await limiter.concurrency.acquire()
+            call = asyncio.create_task(hedged_chat_completion("risk", 10, None, REQUEST))
+            await asyncio.sleep(0.3)
+            assert completions.calls == 0
+            await limiter.concurrency.release()
+            return await call
+
+        content, _, _ = asyncio.run(scenario())
+        assert content == '{"ok": true}'
+        assert completions.calls == 1
+        assert "llm_hedge.issued.risk" not in pipeline_counters
+
+    def test_slow_call_with_an_idle_limiter_is_hedged(self, hedging):
+        completions, _ = hedging(latency=0.3, max_concurrency=4)
+        asyncio.run(hedged_chat_completion("risk", 10, None, REQUEST))
+        assert completions.calls == 2
+        assert pipeline_counters["llm_hedge.issued.risk"] == 1
+
+
+class TestHedgeWhileCongested:
+    """A backed-up or paused limiter suppresses duplicates"""
+
+    def test_no_hedge_while_callers_are_queued(self, hedging):
+        completions, limiter = hedging(latency=0.3, max_concurrency=1)
+
+        async def scenario():
+            call = asyncio.create_task(hedged_chat_completion("risk", 10, None, REQUEST))
+            await asyncio.sleep(0.01)
+            # Another caller queues behind the call for its whole run
+            waiter = asyncio.create_task(limiter.acquire(10))
+            result = await call
+            await waiter
+            await limiter.release(10)
+            return result
+
+        asyncio.run(scenario())
+        assert completions.calls == 1
+        assert "llm_hedge.issued.risk" not in pipeline_counters
+        assert pipeline_counters["llm_hedge.skipped.risk"] == 1
+
+    def test_no_hedge_while_paused_after_a_429(self, hedging):
+        completions, limiter = hedging(latency=0.3, max_concurrency=4)
+
+        async def scenario():
+            call = asyncio.create_task(hedged_chat_completion("risk", 10, None, REQUEST))
+            await asyncio.sleep(0.05)
+            limiter.paused_until = time.monotonic() + 5
+            return await call
+
+        asyncio.run(scenario())
+        assert completions.calls == 1
+        assert pipeline_counters["llm_hedge.skipped.risk"] == 1
@@ -0,0 +1,115 @@
+"""
+CareerIQ LLM Rate Limiting Tests
+Unit tests for TokenBucket, the per-minute request and token budgets in front of OpenAI.
+
+Key behaviour being tested:
+- Buckets start full and refill continuously, capped at capacity
+- charge() settles usage beyond the estimate and can leave the bucket in debt
+- acquire() waits for the refill instead of failing, and requests above capacity are clamped
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import server
+from server import TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def use_clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(server, "time", SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+class TestTokenBucketRefill:
+    """Continuous refill at per_minute / 60 per second"""
+
+    def test_starts_full(self, monkeypatch):
+        use_clock(monkeypatch)
+        bucket = TokenBucket(600)
+        assert bucket.capacity == 600
+        assert bucket.available == 600
+
+    def test_refills_in_proportion_to_elapsed_time(self, monkeypatch):
+        clock = use_clock(monkeypatch)
+        bucket = TokenBucket(600)
+        bucket.charge(600)
+        assert bucket.available == 0
+        clock.now += 30
+        bucket._refill()
+        assert bucket.available == 300
+
+    def test_refill_is_capped_at_capacity(self, monkeypatch):
+        clock = use_clock(monkeypatch)
+        bucket = TokenBucket(600)
+        bucket.charge(100)
+        clock.now += 3600
+        bucket._refill()
+        assert bucket.available == 600
+
+    def test_charge_can_leave_the_bucket_in_debt(self, monkeypatch):
+        clock = use_clock(monkeypatch)
+        bucket = TokenBucket(60)
+        bucket.charge(90)
+        assert bucket.available == -30
+        clock.now += 45
+        bucket._refill()
+        assert bucket.available == 15
+
+
+class TestTokenBucketAcquire:
+    """acquire() takes tokens immediately when available, otherwise waits for the refill"""
+
+    def test_acquire_within_budget_does_not_wait(self):
+        async def scenario():
+            bucket = TokenBucket(6000)
+            started = time.monotonic()
+            await bucket.acquire(1000)
+            return time.monotonic() - started, bucket.available
+
+        elapsed, available = asyncio.run(scenario())
+        assert elapsed < 0.05
+        assert 5000 <= available < 5001
+
+    def test_acquire_waits_for_the_refill(self):
+        async def scenario():
+            # 6000 per minute refills 100 per second
+            bucket = TokenBucket(6000)
+            bucket.charge(6000)
+            started = time.monotonic()
+            await bucket.acquire(20)
+            return time.monotonic() - started
+
+        elapsed = asyncio.run(scenario())
+        assert 0.15 <= elapsed < 1.0
+
+    def test_waiters_are_served_in_order(self):
+        async def scenario():
+            bucket = TokenBucket(6000)
+            bucket.charge(6000)
+            order = []
+
+            async def waiter(name):
+                await bucket.acquire(10)
+                order.append(name)
+
+            await asyncio.gather(waiter("first"), waiter("second"), waiter("third"))
+            return order
+
+        assert asyncio.run(scenario()) == ["first", "second", "third"]
+
+    def test_requests_above_capacity_are_clamped(self):
+        async def scenario():
+            bucket = TokenBucket(60)
+            await asyncio.wait_for(bucket.acquire(10_000), timeout=1)
+            return bucket.available
+
+        assert asyncio.run(scenario()) < 1
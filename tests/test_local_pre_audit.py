@@ -0,0 +1,168 @@
+"""
+CareerIQ Local Pre-Audit Tests
+Unit tests for local_pre_audit, the mechanical subset of the quality auditor's hard rules.
+
+Key rules being tested:
+- Advice words are rejected in model-written prose, but not in quoted resume evidence
+- All five signal classes must be addressed
+- Minimum item counts per section
+- Risks must span at least four distinct categories
+"""
+import copy
+
+from server import local_pre_audit, ADVICE_PATTERN, SIGNAL_CLASS_KEYWORDS
+
+
+COVERAGE_TEXT = (
+    "Titles read as a mid-level role; ownership of execution is unclear; "
+    "seniority and scope look capped; the professional identity lacks positioning; "
+    "market fit for the target role shows gaps."
+)
+
+
+def diagnosis_section():
+    return {
+        "identity_block": {"name": "Should Consider", "current_role": "Manager", "target_role": "Director"},
+        "career_verdict": COVERAGE_TEXT,
+        "authority_breakpoints": [
+            {"breakpoint": "No budget authority stated", "signal_class": "seniority", "market_consequence": "Read as a contributor"},
+            {"breakpoint": "Team size missing", "signal_class": "ownership", "market_consequence": "Scope is discounted"},
+            {"breakpoint": "Title lags scope", "signal_class": "title", "market_consequence": "Filtered at screening"},
+        ],
+        "career_risks": [
+            {"risk_type": "Plateau", "risk_description": "Stays at the current level", "probability_trigger": "Another lateral move"},
+            {"risk_type": "Drift", "risk_description": "Identity blurs across functions", "probability_trigger": "Generalist titles"},
+            {"risk_type": "Mismatch", "risk_description": "Target role expects P&L", "probability_trigger": "No P&L evidence"},
+        ],
+    }
+
+
+def risk_section(categories=("identity", "ownership", "seniority", "market")):
+    return {
+        "independent_risks": [
+            {
+                "risk_id": index + 1,
+                "risk_category": category,
+                "risk_name": f"{category} risk",
+                "evidence_from_profile": "Could not ship without owner sign-off",
+                "market_perception": COVERAGE_TEXT,
+            }
+            for index, category in enumerate(categories)
+        ],
+        "signal_conflicts": [
+            {"conflict_id": 1, "signal_a": "Senior title", "signal_b": "Executor bullets"},
+            {"conflict_id": 2, "signal_a": "Strategy headline", "signal_b": "No P&L"},
+        ],
+    }
+
+
+class TestAdvicePattern:
+    """ADVICE_PATTERN flags prescriptive language"""
+
+    def test_matches_advice_words(self):
+        for text in ["You should apply", "Consider a pivot", "We recommend this", "Try to lead", "You might want to"]:
+            assert ADVICE_PATTERN.search(text), text
+
+    def test_ignores_words_containing_advice_stems(self):
+        for text in ["Shoulder the load", "Considerable scope", "Recommendation letters on file"]:
+            assert not ADVICE_PATTERN.search(text), text
+
+    def test_every_signal_class_is_covered_by_the_fixture(self):
+        for name, pattern in SIGNAL_CLASS_KEYWORDS.items():
+            assert pattern.search(COVERAGE_TEXT), name
+
+
+class TestLocalPreAuditAdvice:
+    """Advice words in model-written fields are rejected; quoted evidence is exempt"""
+
+    def test_clean_section_is_approved(self):
+        verdict = local_pre_audit("diagnosis", diagnosis_section())
+        assert verdict == {"approved": True, "source": "local_pre_audit"}
+
+    def test_advice_in_prose_is_rejected_with_its_path(self):
+        section = diagnosis_section()
+        section["career_verdict"] += " You should reframe your titles."
+        verdict = local_pre_audit("diagnosis", section)
+        assert not verdict["approved"]
+        assert "career_verdict" in verdict["violation_paths"]
+        assert any("ADVICE CONTAMINATION" in reason for reason in verdict["rejection_reasons"])
+
+    def test_identity_block_is_not_scanned(self):
+        section = diagnosis_section()
+        section["identity_block"]["current_role"] = "Consultant who could lead"
+        assert local_pre_audit("diagnosis", section)["approved"]
+
+    def test_quoted_evidence_fields_are_not_scanned(self):
+        verdict = local_pre_audit("risk", risk_section())
+        assert verdict["approved"], verdict
+
+    def test_inline_quotes_are_not_scanned(self):
+        section = diagnosis_section()
+        section["career_verdict"] += ' The JD asks candidates to "consider global expansion" and “try to scale”.'
+        assert local_pre_audit("diagnosis", section)["approved"]
+
+    def test_advice_outside_quotes_is_still_rejected(self):
+        section = diagnosis_section()
+        section["career_verdict"] += ' The JD says "scale teams"; you should mirror it.'
+        verdict = local_pre_audit("diagnosis", section)
+        assert not verdict["approved"]
+        assert "'should'" in verdict["specific_violations"][0]
+
+
+class TestLocalPreAuditSignalClasses:
+    """All five signal classes must appear somewhere in the section"""
+
+    def test_missing_classes_are_named(self):
+        section = diagnosis_section()
+        section["career_verdict"] = "A short verdict."
+        for risk in section["career_risks"]:
+            risk["risk_description"] = "Unclear"
+            risk["probability_trigger"] = "Unclear"
+        for breakpoint in section["authority_breakpoints"]:
+            breakpoint.update(signal_class="x", breakpoint="x", market_consequence="x")
+        verdict = local_pre_audit("diagnosis", section)
+        assert not verdict["approved"]
+        missing = next(reason for reason in verdict["rejection_reasons"] if reason.startswith("MISSING SIGNAL CLASSES"))
+        for name in ("identity", "market fit"):
+            assert name in missing
+
+
+class TestLocalPreAuditMinimumCounts:
+    """Each section must meet its prompt's minimum item counts"""
+
+    def test_too_few_breakpoints_is_rejected(self):
+        section = diagnosis_section()
+        section["authority_breakpoints"] = section["authority_breakpoints"][:2]
+        verdict = local_pre_audit("diagnosis", section)
+        assert not verdict["approved"]
+        assert "authority_breakpoints" in verdict["violation_paths"]
+        assert "MINIMUM COUNT: authority_breakpoints has 2, needs at least 3" in verdict["rejection_reasons"]
+
+    def test_missing_list_counts_as_zero(self):
+        section = diagnosis_section()
+        del section["career_risks"]
+        verdict = local_pre_audit("diagnosis", section)
+        assert "MINIMUM COUNT: career_risks has 0, needs at least 3" in verdict["rejection_reasons"]
+
+    def test_sections_without_minimums_skip_the_rule(self):
+        section = copy.deepcopy(diagnosis_section())
+        del section["career_risks"]
+        assert local_pre_audit("execution", section)["approved"]
+
+
+class TestLocalPreAuditRiskCategories:
+    """Risks must come from at least four distinct categories"""
+
+    def test_four_categories_pass(self):
+        assert local_pre_audit("risk", risk_section())["approved"]
+
+    def test_repeated_categories_are_rejected(self):
+        verdict = local_pre_audit("risk", risk_section(("identity", "identity", "ownership", "ownership")))
+        assert not verdict["approved"]
+        assert "SINGLE-SIGNAL DOMINANCE: risks span only 2 categories" in verdict["rejection_reasons"]
+        assert "independent_risks" in verdict["violation_paths"]
+
+    def test_category_rule_only_applies_to_risk(self):
+        section = diagnosis_section()
+        section["independent_risks"] = [{"risk_category": "identity"}]
+        assert local_pre_audit("diagnosis", section)["approved"]
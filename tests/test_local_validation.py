@@ -0,0 +1,96 @@
+"""
+CareerIQ Local Input Validation Tests
+Unit tests for local_validate_input, which decides clear-cut uploads without the LLM.
+
+Key behaviour being tested:
+- Only confidence >= LOCAL_VALIDATION_MIN_CONFIDENCE is final; anything lower goes to the LLM
+- Short resumes are rejected outright
+- Placeholder text is flagged but left to the LLM, so a real resume is never hard-rejected for it
+- Professional indicators and LinkedIn content set the acceptance confidence
+"""
+from server import local_validate_input, PLACEHOLDER_PATTERN, LOCAL_VALIDATION_MIN_CONFIDENCE
+
+
+RESUME = """Priya Sharma - Senior Product Manager
+PROFESSIONAL SUMMARY
+Product leader with eight years in B2B SaaS.
+EXPERIENCE
+Senior Product Manager, Acme Technologies Pvt Ltd, Jan 2019 - Present
+Led a team of six engineers and launched the analytics suite used by 400 customers.
+Owned the pricing roadmap and delivered a 30% increase in annual recurring revenue.
+Product Analyst, Beta Solutions, 2016 - 2018
+Built reporting dashboards and managed vendor integrations for the finance team.
+EDUCATION
+MBA, Indian Institute of Management, 2016
+SKILLS
+Roadmapping, pricing, stakeholder management, SQL
+"""
+
+LINKEDIN = "Headline: Senior Product Manager\nAbout: Product leader\nExperience: Acme Technologies"
+
+
+def is_final(result):
+    return result["confidence"] >= LOCAL_VALIDATION_MIN_CONFIDENCE
+
+
+class TestPlaceholderPattern:
+    """PLACEHOLDER_PATTERN only matches whole placeholder phrases"""
+
+    def test_matches_placeholder_text(self):
+        for text in ["Lorem ipsum dolor", "[Your Name]", "Your name here", "asdf asdf", "This is a sample resume."]:
+            assert PLACEHOLDER_PATTERN.search(text), text
+
+    def test_ignores_substrings_of_real_words(self):
+        for text in ["priya.asdfgh@example.com", "token qwasdfer", "resampled resumes"]:
+            assert not PLACEHOLDER_PATTERN.search(text), text
+
+
+class TestLocalValidateInput:
+    """Decisions and confidence levels of the local validator"""
+
+    def test_complete_resume_is_accepted_locally(self):
+        result = local_validate_input(RESUME, "", False)
+        assert result["is_valid"]
+        assert is_final(result)
+        assert result["linkedin_confidence_penalty"] is True
+        assert len(result["indicators"]) >= 4
+
+    def test_short_resume_is_rejected_locally(self):
+        result = local_validate_input("Product Manager at Acme", "", False)
+        assert not result["is_valid"]
+        assert is_final(result)
+        assert "300 characters" in result["reason"]
+
+    def test_placeholder_hit_goes_to_the_llm(self):
+        resume = RESUME + "\nReviewed every sample resume submitted by campus hires.\n"
+        result = local_validate_input(resume, "", False)
+        assert not result["is_valid"]
+        assert not is_final(result)
+        assert "placeholder" in result["reason"]
+
+    def test_asdf_inside_a_handle_is_not_a_placeholder(self):
+        result = local_validate_input(RESUME + "\nGitHub: github.com/asdfcoder\n", "", False)
+        assert result["is_valid"]
+        assert is_final(result)
+
+    def test_junk_text_goes_to_the_llm(self):
+        result = local_validate_input("1234 5678 ---- //// " * 30, "", False)
+        assert not result["is_valid"]
+        assert not is_final(result)
+
+    def test_few_indicators_goes_to_the_llm(self):
+        text = "I enjoy hiking and painting on weekends with my family and friends. " * 6
+        result = local_validate_input(text, "", False)
+        assert not result["is_valid"]
+        assert not is_final(result)
+
+    def test_linkedin_with_profile_content_keeps_confidence(self):
+        result = local_validate_input(RESUME, LINKEDIN, True)
+        assert result["is_valid"]
+        assert is_final(result)
+        assert result["linkedin_confidence_penalty"] is False
+
+    def test_unreadable_linkedin_lowers_confidence(self):
+        result = local_validate_input(RESUME, "random words without structure " * 5, True)
+        assert result["is_valid"]
+        assert not is_final(result)
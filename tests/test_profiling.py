@@ -0,0 +1,90 @@
+"""
+CareerIQ Profiling Tests
+Unit tests for ProfileSession and the admin-key checks in front of the profiler.
+
+Key behaviour being tested:
+- finish() summarizes on a worker thread, registers the profile and frees the profile lock
+- Memory tracing is off unless asked for
+- A non-ASCII X-Admin-Key is refused like any wrong key instead of raising
+"""
+import asyncio
+import inspect
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+import server
+from server import ProfileSession, RequestProfileMiddleware, profile_lock, recent_profiles, require_admin
+
+
+class TestProfileSessionFinish:
+    """The blocking summary runs off the loop thread"""
+
+    def test_collect_runs_on_a_worker_thread(self):
+        async def scenario():
+            loop_thread = threading.get_ident()
+            session = ProfileSession("window", 0.005, memory=False)
+            collected_on = []
+            collect = session.collect
+
+            def recording_collect(top):
+                collected_on.append(threading.get_ident())
+                return collect(top)
+
+            session.collect = recording_collect
+            assert session.start()
+            await asyncio.sleep(0.02)
+            profile = await session.finish(5)
+            return loop_thread, collected_on, profile
+
+        loop_thread, collected_on, profile = asyncio.run(scenario())
+        assert collected_on and collected_on[0] != loop_thread
+        assert recent_profiles[profile["profile_id"]] is profile
+        assert profile["allocations"] is None
+        assert not profile_lock.locked()
+
+    def test_memory_is_opt_in(self):
+        assert inspect.signature(server.profile_workers).parameters["memory"].default is False
+
+
+class TestAdminKeyChecks:
+    """Wrong keys, including non-ASCII ones, are refused without a server error"""
+
+    def test_require_admin_refuses_a_non_ascii_key(self, monkeypatch):
+        monkeypatch.setattr(server, "ADMIN_API_KEY", "secret")
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(require_admin("sécret"))
+        assert error.value.status_code == 403
+
+    def test_require_admin_accepts_the_key(self, monkeypatch):
+        monkeypatch.setattr(server, "ADMIN_API_KEY", "secret")
+        asyncio.run(require_admin("secret"))
+
+    def run_middleware(self, admin_key: bytes):
+        sent = []
+
+        async def app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            "type": "http",
+            "method": "POST",
+            "path": "/api/upload",
+            "headers": [(b"x-profile", b"cpu"), (b"x-admin-key", admin_key)]
+        }
+        asyncio.run(RequestProfileMiddleware(app)(scope, None, send))
+        return dict(sent[0]["headers"])
+
+    def test_middleware_passes_a_non_ascii_key_through_unprofiled(self, monkeypatch):
+        monkeypatch.setattr(server, "ADMIN_API_KEY", "secret")
+        assert b"x-profile-id" not in self.run_middleware("sécret".encode("utf-8"))
+
+    def test_middleware_profiles_with_the_admin_key(self, monkeypatch):
+        monkeypatch.setattr(server, "ADMIN_API_KEY", "secret")
+        headers = self.run_middleware(b"secret")
+        assert headers[b"x-profile-id"].decode() in recent_profiles
+        assert not profile_lock.locked()
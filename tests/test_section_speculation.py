@@ -0,0 +1,117 @@
+"""
+CareerIQ Section Speculation Tests
+Unit tests for SectionSpeculation, which starts the next report stage from a draft under audit.
+
+Key behaviour being tested:
+- A committed draft reuses its speculative run (hit)
+- Discarding a run also cancels the runs it started itself
+- Discarded sections are reported through on_discard; cancel_all is counted apart from misses
+"""
+import asyncio
+
+from server import SectionSpeculation, pipeline_counters
+
+
+class TestSectionSpeculation:
+    """Hits, cascading discards and counters"""
+
+    def setup_method(self):
+        pipeline_counters.clear()
+
+    def test_committed_draft_reuses_the_speculative_run(self):
+        async def scenario():
+            speculation = SectionSpeculation(enabled=True)
+            draft = {"draft": 1}
+            calls = []
+
+            async def stage(upstream):
+                calls.append(upstream)
+                return {"from": upstream["draft"]}
+
+            speculation.start("risk", draft, stage)
+            result = await speculation.resolve("risk", draft, stage)
+            return result, calls
+
+        result, calls = asyncio.run(scenario())
+        assert result == {"from": 1}
+        assert len(calls) == 1
+        assert pipeline_counters["speculation.hits.risk"] == 1
+
+    def test_discard_cancels_runs_started_by_the_discarded_run(self):
+        async def scenario():
+            discarded = []
+            speculation = SectionSpeculation(enabled=True, on_discard=discarded.append)
+            execution_started = asyncio.Event()
+            execution_cancelled = asyncio.Event()
+
+            async def execution_stage(risk_draft):
+                execution_started.set()
+                try:
+                    await asyncio.sleep(60)
+                except asyncio.CancelledError:
+                    execution_cancelled.set()
+                    raise
+
+            async def risk_stage(diagnosis_draft):
+                risk_draft = {"risk_from": diagnosis_draft}
+                speculation.start("execution", risk_draft, execution_stage)
+                return risk_draft
+
+            diagnosis_draft = {"draft": 1}
+            speculation.start("risk", diagnosis_draft, risk_stage)
+            await execution_started.wait()
+            # The risk run has finished; its execution run is still going
+            assert speculation.runs["risk"].task.done()
+            assert speculation.discard("risk", diagnosis_draft)
+            await asyncio.sleep(0)
+            return speculation, discarded, execution_cancelled.is_set()
+
+        speculation, discarded, execution_cancelled = asyncio.run(scenario())
+        assert execution_cancelled
+        assert speculation.runs == {}
+        assert discarded == ["risk", "execution"]
+        assert pipeline_counters["speculation.misses.risk"] == 1
+        assert pipeline_counters["speculation.misses.execution"] == 1
+
+    def test_discard_ignores_runs_from_another_draft(self):
+        async def scenario():
+            speculation = SectionSpeculation(enabled=True)
+
+            async def stage(upstream):
+                return upstream
+
+            speculation.start("risk", {"draft": 2}, stage)
+            kept = not speculation.discard("risk", {"draft": 1})
+            speculation.cancel_all()
+            return kept
+
+        assert asyncio.run(scenario())
+
+    def test_cancel_all_is_not_a_miss(self):
+        async def scenario():
+            discarded = []
+            speculation = SectionSpeculation(enabled=True, on_discard=discarded.append)
+
+            async def stage(upstream):
+                await asyncio.sleep(60)
+
+            speculation.start("decisions", {"draft": 1}, stage)
+            speculation.cancel_all()
+            return discarded
+
+        assert asyncio.run(scenario()) == []
+        assert pipeline_counters["speculation.cancelled.decisions"] == 1
+        assert "speculation.misses.decisions" not in pipeline_counters
+
+    def test_disabled_speculation_runs_the_stage_on_resolve(self):
+        async def scenario():
+            speculation = SectionSpeculation(enabled=False)
+
+            async def stage(upstream):
+                return {"fresh": upstream}
+
+            speculation.start("risk", {"draft": 1}, stage)
+            return await speculation.resolve("risk", {"draft": 1}, stage)
+
+        assert asyncio.run(scenario()) == {"fresh": {"draft": 1}}
+        assert "speculation.started.risk" not in pipeline_counters
@@ -0,0 +1,123 @@
+"""
+CareerIQ Streaming Field Tests
+Unit tests for the streamed-section path: IncrementalJSONObjectParser and PartialSectionWriter.
+
+Key behaviour being tested:
+- Every top-level field is reported exactly once, whatever the chunk size
+- Strings containing braces, commas, quotes and escapes do not split fields
+- Partial writes are coalesced off the stream path and cleared before a retry
+"""
+import asyncio
+import json
+
+import server
+from server import IncrementalJSONObjectParser, PartialSectionWriter
+
+
+DOCUMENT = {
+    "career_verdict": "Read as a {senior} executor, not an \"owner\", in 2 markets\\regions",
+    "authority_breakpoints": [
+        {"breakpoint": "No budget, no P&L", "signal_class": "ownership"},
+        {"breakpoint": "Title [Lead] lags scope", "signal_class": "title"}
+    ],
+    "confidence": 0.82,
+    "linkedin_provided": False,
+    "extra": None,
+    "nested": {"a": {"b": [1, 2, {"c": "}"}]}},
+    "unicode": "Bengaluru – ₹ 499",
+    "empty_list": [],
+    "last": "done"
+}
+
+
+def feed_in_chunks(text, size):
+    parser = IncrementalJSONObjectParser()
+    fields = []
+    for start in range(0, len(text), size):
+        fields.extend(parser.feed(text[start:start + size]))
+    return fields
+
+
+class TestIncrementalJSONObjectParser:
+    """Fields come out complete and in order for every chunking of the stream"""
+
+    def test_every_chunk_size_yields_every_field_once(self):
+        for text in (json.dumps(DOCUMENT), json.dumps(DOCUMENT, indent=2, ensure_ascii=False)):
+            for size in range(1, len(text) + 1):
+                fields = feed_in_chunks(text, size)
+                assert fields == list(DOCUMENT.items()), f"chunk size {size}"
+
+    def test_fields_are_reported_as_soon_as_they_close(self):
+        parser = IncrementalJSONObjectParser()
+        assert parser.feed('{"first": "one", "second": [1, ') == [("first", "one")]
+        assert parser.feed('2]') == []
+        assert parser.feed(', "third": true}') == [("second", [1, 2]), ("third", True)]
+
+    def test_truncated_stream_reports_only_closed_fields(self):
+        text = json.dumps(DOCUMENT)
+        cut = text.index('"confidence"')
+        fields = feed_in_chunks(text[:cut + len('"confidence": 0.8')], 7)
+        assert [key for key, _ in fields] == ["career_verdict", "authority_breakpoints"]
+
+
+class RecordingCollection:
+    """Stands in for db.sessions; records updates and can hold each write open"""
+
+    def __init__(self):
+        self.updates = []
+        self.gate = None
+
+    async def update_one(self, query, update):
+        if self.gate is not None:
+            await self.gate.wait()
+        self.updates.append((query, update))
+
+
+def run_writer(scenario):
+    sessions = RecordingCollection()
+    original = server.db
+    server.db = type("FakeDB", (), {"sessions": sessions})()
+    try:
+        asyncio.run(scenario(sessions))
+    finally:
+        server.db = original
+    return sessions.updates
+
+
+class TestPartialSectionWriter:
+    """Writes are buffered, coalesced, scoped to the processing run and cleared on retry"""
+
+    def test_fields_written_during_a_write_are_coalesced(self):
+        async def scenario(sessions):
+            sessions.gate = asyncio.Event()
+            writer = PartialSectionWriter({"session_id": "s", "run_id": "r"}, "risk")
+            await writer("a", 1)
+            await asyncio.sleep(0)
+            await writer("b", 2)
+            await writer("c", 3)
+            sessions.gate.set()
+            await writer.task
+
+        updates = run_writer(scenario)
+        assert [update for _, update in updates] == [
+            {"$set": {"partial_report.risk.a": 1}},
+            {"$set": {"partial_report.risk.b": 2, "partial_report.risk.c": 3}}
+        ]
+        assert all(query == {"session_id": "s", "run_id": "r", "status": "processing"} for query, _ in updates)
+
+    def test_reset_clears_the_section_before_the_retry_fields(self):
+        async def scenario(sessions):
+            writer = PartialSectionWriter({"session_id": "s", "run_id": "r"}, "diagnosis")
+            await writer("career_verdict", "draft 1")
+            await writer.task
+            await writer("context_intro", "never written")
+            writer.reset()
+            await writer("career_verdict", "draft 2")
+            await writer.task
+
+        updates = [update for _, update in run_writer(scenario)]
+        assert updates == [
+            {"$set": {"partial_report.diagnosis.career_verdict": "draft 1"}},
+            {"$unset": {"partial_report.diagnosis": ""}},
+            {"$set": {"partial_report.diagnosis.career_verdict": "draft 2"}}
+        ]